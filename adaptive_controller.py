@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CONTROLADOR ADAPTATIVO AIMD - SCRAPERS PLAYWRIGHT
+Ajusta la concurrencia y la pausa entre perfiles según lo que responde
+TikTok: sube la concurrencia de uno en uno y acorta la pausa mientras los
+éxitos y las latencias son sanos, y recorta a la mitad ante captchas,
+timeouts o picos de errores (additive increase / multiplicative decrease)
+"""
+
+import random
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+# =============================================================================
+# 1. CONFIGURACIÓN
+# =============================================================================
+
+FALLOS_CONGESTION = ('bloqueo', 'timeout')   # Recorte inmediato
+VENTANA_RESULTADOS = 20                      # Resultados recientes para la tasa de error
+UMBRAL_TASA_ERROR = 0.3                      # Tasa de error que dispara un recorte
+
+def clasificar_error(mensaje):
+    """
+    Tipo de fallo a partir del texto de error de un scraper
+
+    Returns:
+        str: 'bloqueo' (captcha/challenge), 'timeout' o 'error'
+    """
+    texto = (mensaje or '').lower()
+    if any(patron in texto for patron in ('captcha', 'challenge', 'verify', 'blocked', 'login')):
+        return 'bloqueo'
+    if 'timeout' in texto or 'timed out' in texto:
+        return 'timeout'
+    return 'error'
+
+# =============================================================================
+# 2. CONTROLADOR
+# =============================================================================
+
+class ControladorAIMD:
+    """
+    Límite de concurrencia dinámico y pausa adaptativa compartidos por los trabajadores
+
+    Uso:
+        async with controlador.turno():
+            inicio = time.time()
+            ok = await extraer(...)
+            controlador.registrar(ok, time.time() - inicio, fallo=None if ok else 'error')
+        await controlador.esperar()
+
+    Args:
+        concurrencia_inicial / concurrencia_min / concurrencia_max (int): Perfiles en paralelo
+        retardo_inicial / retardo_min / retardo_max (float): Pausa en segundos tras cada perfil
+        latencia_objetivo (float): Por encima de esta latencia un éxito no cuenta para subir
+        factor_recorte (float): Multiplicador de la concurrencia al recortar
+        paso_retardo (float): Segundos que se restan a la pausa en cada subida
+    """
+
+    def __init__(self, concurrencia_inicial=2, concurrencia_min=1, concurrencia_max=8,
+                 retardo_inicial=3.0, retardo_min=0.5, retardo_max=30.0,
+                 latencia_objetivo=10.0, factor_recorte=0.5, paso_retardo=0.5):
+        self.concurrencia_min = max(1, int(concurrencia_min))
+        self.concurrencia_max = max(self.concurrencia_min, int(concurrencia_max))
+        self.concurrencia = min(self.concurrencia_max, max(self.concurrencia_min, int(concurrencia_inicial)))
+        self.retardo_min = retardo_min
+        self.retardo_max = retardo_max
+        self.retardo = min(retardo_max, max(retardo_min, retardo_inicial))
+        self.latencia_objetivo = latencia_objetivo
+        self.factor_recorte = factor_recorte
+        self.paso_retardo = paso_retardo
+
+        self.en_curso = 0
+        self._condicion = asyncio.Condition()
+        self._recientes = deque(maxlen=VENTANA_RESULTADOS)
+        self._exitos_seguidos = 0
+        self._resultados_desde_recorte = 0
+        self._hubo_recorte = False
+
+        self.subidas = 0
+        self.recortes = 0
+        self.exitos = 0
+        self.fallos = 0
+        self.inicio = time.time()
+
+    # -------------------------------------------------------------------------
+    # Límite de concurrencia
+    # -------------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def turno(self):
+        """Espera a que haya hueco bajo el límite de concurrencia actual"""
+        async with self._condicion:
+            await self._condicion.wait_for(lambda: self.en_curso < self.concurrencia)
+            self.en_curso += 1
+        try:
+            yield
+        finally:
+            async with self._condicion:
+                self.en_curso -= 1
+                self._condicion.notify_all()
+
+    async def esperar(self):
+        """Pausa actual con ±25% de jitter"""
+        await asyncio.sleep(self.retardo * random.uniform(0.75, 1.25))
+
+    # -------------------------------------------------------------------------
+    # Realimentación
+    # -------------------------------------------------------------------------
+
+    def registrar(self, exito, latencia=None, fallo=None):
+        """
+        Informa del resultado de un perfil
+
+        Args:
+            exito (bool): El perfil se extrajo correctamente
+            latencia (float): Segundos que tardó la extracción
+            fallo (str): 'bloqueo', 'timeout' o 'error' cuando exito es False
+        """
+        self._recientes.append(bool(exito))
+        self._resultados_desde_recorte += 1
+
+        if exito:
+            self.exitos += 1
+            if latencia is not None and latencia > self.latencia_objetivo:
+                # Respuestas lentas: señal temprana de saturación, no se sube
+                self._exitos_seguidos = 0
+                return
+            self._exitos_seguidos += 1
+            # Una "ronda" completa de éxitos (tantos como la concurrencia) por subida
+            if self._exitos_seguidos >= self.concurrencia:
+                self._subir()
+            return
+
+        self.fallos += 1
+        self._exitos_seguidos = 0
+        fallo = fallo or 'error'
+        if fallo in FALLOS_CONGESTION or self.tasa_error() > UMBRAL_TASA_ERROR:
+            self._recortar(fallo)
+
+    def tasa_error(self):
+        """Proporción de fallos en los últimos resultados"""
+        if not self._recientes:
+            return 0.0
+        return 1 - sum(self._recientes) / len(self._recientes)
+
+    def _subir(self):
+        self._exitos_seguidos = 0
+        if self.concurrencia < self.concurrencia_max:
+            self.concurrencia += 1
+        self.retardo = max(self.retardo_min, self.retardo - self.paso_retardo)
+        self.subidas += 1
+
+    def _recortar(self, motivo):
+        # Los perfiles que ya estaban en vuelo al recortar fallarán igual:
+        # no se recorta de nuevo hasta que haya pasado una ronda completa
+        if self._hubo_recorte and self._resultados_desde_recorte < self.concurrencia:
+            return
+
+        anterior = self.concurrencia
+        self.concurrencia = max(self.concurrencia_min, int(self.concurrencia * self.factor_recorte))
+        self.retardo = min(self.retardo_max, self.retardo * 2)
+        self._resultados_desde_recorte = 0
+        self._hubo_recorte = True
+        self.recortes += 1
+        print(f"[WARNING]  Backoff por {motivo}: concurrencia {anterior} -> {self.concurrencia}, "
+              f"pausa {self.retardo:.1f}s")
+
+    def estado(self):
+        """Resumen para la barra de progreso y el informe final"""
+        minutos = max((time.time() - self.inicio) / 60, 1e-9)
+        return {
+            'concurrencia': self.concurrencia,
+            'pausa': round(self.retardo, 1),
+            'tasa_error': round(self.tasa_error(), 2),
+            'perfiles_min': round((self.exitos + self.fallos) / minutos, 1),
+            'subidas': self.subidas,
+            'recortes': self.recortes
+        }
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+POOL DE CONTEXTOS DE NAVEGADOR - SCRAPERS PLAYWRIGHT
+N contextos con M páginas cada uno. Un semáforo limita las navegaciones
+simultáneas, cada contexto tiene su propio fingerprint y se recicla tras
+K navegaciones para no acumular estado (cookies, memoria, rastreo). Con un
+gestor de sesiones cada contexto arranca con una sesión guardada
+"""
+
+import asyncio
+import random
+from contextlib import asynccontextmanager
+
+# =============================================================================
+# 1. CONFIGURACIÓN
+# =============================================================================
+
+NUM_CONTEXTOS_DEFAULT = 2
+PAGINAS_POR_CONTEXTO_DEFAULT = 2
+NAVEGACIONES_POR_CONTEXTO_DEFAULT = 40
+REINTENTOS_APERTURA = 3     # Intentos de reabrir un contexto al reciclarlo
+ESPERA_APERTURA_S = 2.0     # Base del backoff exponencial entre intentos
+
+USER_AGENTS_ESCRITORIO = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+]
+
+# Pares idioma/zona horaria coherentes entre sí
+LOCALES_ZONAS = [
+    ('en-US', 'America/New_York'),
+    ('en-US', 'America/Chicago'),
+    ('en-US', 'America/Los_Angeles'),
+    ('en-GB', 'Europe/London')
+]
+
+VIEWPORTS = [(1280, 720), (1366, 768), (1440, 900), (1536, 864), (1920, 1080)]
+
+SCRIPT_ANTI_DETECCION = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined,
+    });
+"""
+
+class PoolAgotado(RuntimeError):
+    """Ningún contexto del pool se pudo reabrir: no quedan páginas que prestar"""
+
+def generar_fingerprint():
+    """
+    Opciones de new_context con un fingerprint de escritorio aleatorio pero coherente
+
+    Returns:
+        dict: user_agent, viewport, locale y timezone_id
+    """
+    ancho, alto = random.choice(VIEWPORTS)
+    locale, zona = random.choice(LOCALES_ZONAS)
+    return {
+        'user_agent': random.choice(USER_AGENTS_ESCRITORIO),
+        'viewport': {'width': ancho, 'height': alto},
+        'locale': locale,
+        'timezone_id': zona
+    }
+
+# =============================================================================
+# 2. CONTEXTO DEL POOL
+# =============================================================================
+
+class ContextoPool:
+    """Un contexto de navegador con sus páginas reutilizables"""
+
+    def __init__(self, indice):
+        self.indice = indice
+        self.context = None
+        self.fingerprint = None
+        self.paginas_libres = []
+        self.en_uso = 0
+        self.navegaciones = 0
+        self.generacion = 0
+        self.reciclando = False
+        self.sesion = None        # Ruta de la sesión guardada (session_manager)
+        self.desafiado = False    # Recibió un challenge: se recicla y su sesión se retira
+        self.fallido = False      # No se pudo reabrir al reciclarlo: fuera del pool
+
+    def admite_pagina(self, limite_navegaciones):
+        """Puede prestar una página sin pasarse del presupuesto de navegaciones"""
+        return (not self.reciclando
+                and not self.desafiado
+                and not self.fallido
+                and self.paginas_libres
+                and self.navegaciones + self.en_uso < limite_navegaciones)
+
+# =============================================================================
+# 3. POOL
+# =============================================================================
+
+class PoolNavegadores:
+    """
+    Pool de N contextos × M páginas sobre un único navegador
+
+    Uso:
+        pool = PoolNavegadores(browser, num_contextos=2, paginas_por_contexto=2)
+        await pool.iniciar()
+        async with pool.pagina() as page:
+            await page.goto(url)
+        await pool.cerrar()
+
+    Con filtro_red (network_filter.FiltroRed) cada contexto aborta los
+    recursos innecesarios. Con gestor_sesiones (session_manager.GestorSesiones)
+    cada contexto arranca con una sesión guardada y su fingerprint, y al
+    reciclarse o cerrarse guarda su estado (o retira la sesión si recibió un
+    challenge, ver marcar_desafiado). Las páginas pertenecen al pool: no
+    deben cerrarse al terminar.
+
+    Si un contexto no se puede reabrir al reciclarlo (tras REINTENTOS_APERTURA
+    intentos con backoff) queda fuera del pool; cuando ya no queda ninguno,
+    pagina() lanza PoolAgotado en lugar de esperar para siempre.
+    """
+
+    def __init__(self, browser, num_contextos=NUM_CONTEXTOS_DEFAULT,
+                 paginas_por_contexto=PAGINAS_POR_CONTEXTO_DEFAULT,
+                 navegaciones_por_contexto=NAVEGACIONES_POR_CONTEXTO_DEFAULT,
+                 opciones_contexto=None, scripts_iniciales=(SCRIPT_ANTI_DETECCION,),
+                 filtro_red=None, gestor_sesiones=None):
+        self.browser = browser
+        self.num_contextos = max(1, int(num_contextos))
+        self.paginas_por_contexto = max(1, int(paginas_por_contexto))
+        self.navegaciones_por_contexto = max(1, int(navegaciones_por_contexto))
+        self.opciones_contexto = dict(opciones_contexto or {})
+        self.scripts_iniciales = list(scripts_iniciales or [])
+        self.filtro_red = filtro_red
+        self.gestor_sesiones = gestor_sesiones
+
+        self.contextos = [ContextoPool(i) for i in range(self.num_contextos)]
+        self._semaforo = asyncio.Semaphore(self.capacidad)
+        self._condicion = asyncio.Condition()
+        self._prestadas = {}   # id(page) -> contexto, para marcar_desafiado
+        self._error = None     # PoolAgotado cuando ningún contexto se pudo reabrir
+        self.reciclados = 0
+        self.desafiados = 0
+
+    @property
+    def capacidad(self):
+        """Páginas que pueden navegar a la vez"""
+        return self.num_contextos * self.paginas_por_contexto
+
+    # -------------------------------------------------------------------------
+    # Ciclo de vida de los contextos
+    # -------------------------------------------------------------------------
+
+    async def _abrir_contexto(self, contexto):
+        """Crea el contexto de navegador (sesión guardada o fingerprint nuevo) y sus M páginas"""
+        opciones = dict(self.opciones_contexto)
+        fingerprint = None
+        if self.gestor_sesiones:
+            contexto.sesion, estado, fingerprint = self.gestor_sesiones.siguiente()
+            if estado:
+                opciones['storage_state'] = estado
+
+        # Una sesión conserva el fingerprint con el que se creó
+        contexto.fingerprint = fingerprint or generar_fingerprint()
+        try:
+            contexto.context = await self.browser.new_context(**{**contexto.fingerprint, **opciones})
+            for script in self.scripts_iniciales:
+                await contexto.context.add_init_script(script)
+            if self.filtro_red:
+                # A nivel de contexto: cubre todas sus páginas
+                await self.filtro_red.instalar(contexto.context)
+
+            contexto.paginas_libres = [await contexto.context.new_page() for _ in range(self.paginas_por_contexto)]
+        except Exception:
+            await self._descartar_apertura(contexto)
+            raise
+        contexto.en_uso = 0
+        contexto.navegaciones = 0
+        contexto.desafiado = False
+        contexto.generacion += 1
+
+    async def _descartar_apertura(self, contexto):
+        """Deshace una apertura a medias: cierra el contexto y devuelve la sesión sin guardarla"""
+        if contexto.context:
+            try:
+                await contexto.context.close()
+            except Exception:
+                pass
+        if self.gestor_sesiones and contexto.sesion:
+            self.gestor_sesiones.liberar(contexto.sesion)
+        contexto.context = None
+        contexto.sesion = None
+        contexto.paginas_libres = []
+
+    async def _guardar_sesion(self, contexto):
+        """Persiste el estado del contexto en su sesión, o la retira si recibió un challenge"""
+        if not self.gestor_sesiones or not contexto.context:
+            return
+        if contexto.desafiado:
+            if contexto.sesion:
+                self.gestor_sesiones.retirar(contexto.sesion)
+            return
+        try:
+            await self.gestor_sesiones.guardar(contexto.context, contexto.sesion, contexto.fingerprint)
+        except Exception as e:
+            self.gestor_sesiones.liberar(contexto.sesion)
+            print(f"[WARNING]  No se pudo guardar la sesión del contexto {contexto.indice}: {e}")
+
+    async def _cerrar_contexto(self, contexto):
+        await self._guardar_sesion(contexto)
+        contexto.sesion = None
+        if contexto.context:
+            try:
+                await contexto.context.close()
+            except Exception as e:
+                print(f"[WARNING]  Error cerrando contexto {contexto.indice}: {e}")
+        contexto.context = None
+        contexto.paginas_libres = []
+
+    async def _reciclar(self, contexto):
+        """Sustituye un contexto agotado por uno nuevo (sin páginas en uso)"""
+        await self._cerrar_contexto(contexto)
+        error = None
+        try:
+            for intento in range(REINTENTOS_APERTURA):
+                try:
+                    await self._abrir_contexto(contexto)
+                    self.reciclados += 1
+                    error = None
+                    break
+                except Exception as e:
+                    error = e
+                    print(f"[WARNING]  No se pudo reabrir el contexto {contexto.indice} "
+                          f"(intento {intento + 1}/{REINTENTOS_APERTURA}): {e}")
+                    if intento + 1 < REINTENTOS_APERTURA:
+                        await asyncio.sleep(ESPERA_APERTURA_S * 2 ** intento)
+        finally:
+            async with self._condicion:
+                contexto.reciclando = False
+                if error is not None:
+                    contexto.fallido = True
+                    print(f"[ERROR] Contexto {contexto.indice} fuera del pool: {error}")
+                    if all(c.fallido for c in self.contextos):
+                        self._error = PoolAgotado(f"Ningún contexto del pool se pudo reabrir: {error}")
+                self._condicion.notify_all()
+
+    async def iniciar(self):
+        """Abre todos los contextos del pool (si alguno falla, cierra los abiertos y relanza)"""
+        resultados = await asyncio.gather(
+            *[self._abrir_contexto(contexto) for contexto in self.contextos],
+            return_exceptions=True
+        )
+        errores = [r for r in resultados if isinstance(r, BaseException)]
+        if errores:
+            # Los que sí abrieron guardan su sesión y la liberan para otros procesos
+            await asyncio.gather(*[
+                self._cerrar_contexto(contexto)
+                for contexto, resultado in zip(self.contextos, resultados)
+                if not isinstance(resultado, BaseException)
+            ])
+            raise errores[0]
+
+    async def cerrar(self):
+        """Cierra todos los contextos (el navegador lo cierra quien lo creó)"""
+        await asyncio.gather(*[self._cerrar_contexto(contexto) for contexto in self.contextos])
+
+    # -------------------------------------------------------------------------
+    # Préstamo de páginas
+    # -------------------------------------------------------------------------
+
+    def _elegir_contexto(self):
+        """Contexto disponible con más páginas libres (reparte la carga)"""
+        disponibles = [c for c in self.contextos if c.admite_pagina(self.navegaciones_por_contexto)]
+        return max(disponibles, key=lambda c: len(c.paginas_libres)) if disponibles else None
+
+    async def _tomar_pagina(self):
+        async with self._condicion:
+            await self._condicion.wait_for(lambda: self._error is not None or self._elegir_contexto() is not None)
+            if self._error is not None:
+                raise self._error
+            contexto = self._elegir_contexto()
+            contexto.en_uso += 1
+            return contexto, contexto.paginas_libres.pop()
+
+    async def _devolver_pagina(self, contexto, page, generacion):
+        reciclar = False
+        async with self._condicion:
+            if contexto.generacion != generacion:
+                # El contexto ya se recicló mientras la página estaba prestada
+                return
+            contexto.en_uso -= 1
+            contexto.navegaciones += 1
+
+            if page.is_closed():
+                try:
+                    page = await contexto.context.new_page()
+                except Exception:
+                    page = None
+            if page is not None:
+                contexto.paginas_libres.append(page)
+
+            if contexto.en_uso == 0 and (contexto.navegaciones >= self.navegaciones_por_contexto
+                                         or contexto.desafiado
+                                         or not contexto.paginas_libres):
+                contexto.reciclando = True
+                reciclar = True
+            else:
+                self._condicion.notify_all()
+
+        if reciclar:
+            await self._reciclar(contexto)
+
+    @asynccontextmanager
+    async def pagina(self):
+        """Presta una página del pool mientras dure el bloque async with"""
+        async with self._semaforo:
+            contexto, page = await self._tomar_pagina()
+            generacion = contexto.generacion
+            self._prestadas[id(page)] = contexto
+            try:
+                yield page
+            finally:
+                self._prestadas.pop(id(page), None)
+                await self._devolver_pagina(contexto, page, generacion)
+
+    def marcar_desafiado(self, page):
+        """
+        Marca el contexto de una página prestada como quemado por un challenge
+
+        Deja de prestar páginas, se recicla en cuanto se devuelvan las que
+        tiene en uso y su sesión se retira en lugar de guardarse.
+        """
+        contexto = self._prestadas.get(id(page))
+        if contexto and not contexto.desafiado:
+            contexto.desafiado = True
+            self.desafiados += 1
+
+    def estadisticas(self):
+        """Resumen del estado del pool"""
+        return {
+            'contextos': self.num_contextos,
+            'paginas_por_contexto': self.paginas_por_contexto,
+            'capacidad': self.capacidad,
+            'en_uso': sum(c.en_uso for c in self.contextos),
+            'reciclados': self.reciclados,
+            'desafiados': self.desafiados,
+            'fallidos': sum(1 for c in self.contextos if c.fallido)
+        }
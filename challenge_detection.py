@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DETECCIÓN TEMPRANA DE CHALLENGES - SCRAPERS PLAYWRIGHT
+Comprueba justo después de navegar si TikTok ha servido un captcha, una
+verificación o un muro de login en lugar del perfil, para abortar en el
+acto (sin agotar los timeouts de los selectores), marcar el contexto como
+quemado y reencolar el perfil con backoff
+"""
+
+import random
+
+# =============================================================================
+# 1. MARCADORES
+# =============================================================================
+
+SELECTORES_CAPTCHA = [
+    '#captcha-verify-image',
+    '#captcha_container',
+    '.captcha_verify_container',
+    '.captcha-disable-scroll',
+    '#tiktok-verify-ele',
+    'iframe[src*="captcha"]',
+    '[class*="captcha-verify"]'
+]
+SELECTORES_LOGIN = [
+    '[data-e2e="login-modal"]',
+    '#login-modal',
+    'form[action*="login"]'
+]
+# Un captcha se da por challenge siempre; un muro de login solo si además no hay perfil
+SELECTOR_DESAFIO = ", ".join(SELECTORES_CAPTCHA)
+SELECTOR_PERFIL = '[data-e2e="user-title"], #__UNIVERSAL_DATA_FOR_REHYDRATION__, #SIGI_STATE'
+
+# Sin patrones sueltos como 'captcha' o 'verify': aparecen en usernames y nicknames
+RUTAS_DESAFIO = ('/login', '/verify')
+PATRONES_TITULO = ('security check', 'access denied')
+
+# Un único evaluate con todas las comprobaciones
+SCRIPT_DETECCION = """
+    (config) => {
+        const captcha = document.querySelector(config.captcha);
+        if (captcha) return {tipo: 'captcha', motivo: 'selector captcha'};
+
+        const ruta = location.pathname + location.search;
+        if (config.rutas.some(r => ruta.includes(r))) {
+            return {tipo: 'login', motivo: 'redirección a ' + location.pathname};
+        }
+
+        const titulo = (document.title || '').toLowerCase();
+        const patron = config.titulos.find(p => titulo.includes(p));
+        if (patron) return {tipo: 'captcha', motivo: 'título "' + document.title + '"'};
+
+        const perfil = document.querySelector(config.perfil);
+        const login = document.querySelector(config.login);
+        if (login && !perfil) return {tipo: 'login', motivo: 'muro de login sin perfil'};
+
+        return null;
+    }
+"""
+
+CONFIG_SCRIPT_DETECCION = {
+    'captcha': SELECTOR_DESAFIO,
+    'login': ", ".join(SELECTORES_LOGIN),
+    'perfil': SELECTOR_PERFIL,
+    'rutas': list(RUTAS_DESAFIO),
+    'titulos': list(PATRONES_TITULO)
+}
+
+# =============================================================================
+# 2. DETECCIÓN
+# =============================================================================
+
+class DesafioDetectado(Exception):
+    """TikTok respondió con un challenge en lugar del perfil"""
+
+    def __init__(self, tipo, motivo=""):
+        self.tipo = tipo
+        self.motivo = motivo
+        # El texto contiene 'challenge' para que clasificar_error lo trate como 'bloqueo'
+        super().__init__(f"challenge ({tipo}): {motivo}")
+
+async def detectar_desafio(page):
+    """
+    Comprueba la página recién navegada
+
+    Returns:
+        dict: {'tipo': 'captcha'|'login', 'motivo': str} o None si es el perfil
+    """
+    try:
+        return await page.evaluate(SCRIPT_DETECCION, CONFIG_SCRIPT_DETECCION)
+    except Exception:
+        # Página navegando o cerrada: no hay evidencia de challenge
+        return None
+
+async def comprobar_desafio(page):
+    """Como detectar_desafio, pero lanza DesafioDetectado si hay challenge"""
+    desafio = await detectar_desafio(page)
+    if desafio:
+        raise DesafioDetectado(desafio['tipo'], desafio['motivo'])
+
+# =============================================================================
+# 3. BACKOFF DE REENCOLADO
+# =============================================================================
+
+MAX_REINTENTOS_DESAFIO = 3
+BACKOFF_BASE_S = 5.0
+BACKOFF_MAX_S = 120.0
+
+def backoff_desafio(intento, base=BACKOFF_BASE_S, maximo=BACKOFF_MAX_S):
+    """
+    Espera antes de reintentar un perfil bloqueado: exponencial con jitter
+
+    Args:
+        intento (int): Reintento que se va a hacer (1, 2, ...)
+
+    Returns:
+        float: Segundos de espera
+    """
+    return random.uniform(0.5, 1.0) * min(maximo, base * 2 ** (intento - 1))
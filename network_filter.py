@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FILTRO DE RED - SCRAPERS PLAYWRIGHT
+Capa de enrutado (context.route) que aborta los recursos que el scraper no
+necesita: imágenes, vídeo, fuentes y analítica/rastreo de terceros. Los
+scrapers solo leen nodos de texto del perfil, así que cada página carga una
+fracción de los bytes y termina antes
+"""
+
+from urllib.parse import urlparse
+
+# =============================================================================
+# 1. CONFIGURACIÓN POR DEFECTO
+# =============================================================================
+
+# Tipos de recurso de Playwright (request.resource_type) que nunca hacen falta.
+# Las hojas de estilo se mantienen: sin ellas is_visible()/offsetParent fallan
+TIPOS_BLOQUEADOS_DEFAULT = {'image', 'media', 'font', 'imageset', 'texttrack', 'beacon', 'ping', 'manifest'}
+
+# Hosts propios de TikTok (y sus CDN) que sí sirven HTML, scripts y API
+HOSTS_PERMITIDOS_DEFAULT = {
+    'tiktok.com',
+    'tiktokcdn.com',
+    'tiktokcdn-us.com',
+    'tiktokv.com',
+    'tiktokw.us',
+    'ttwstatic.com',
+    'byteoversea.com',
+    'ibytedtos.com'
+}
+
+# Telemetría y analítica, aunque cuelgue de un host permitido
+HOSTS_BLOQUEADOS_DEFAULT = {
+    'mon.tiktokv.com',
+    'mon-va.byteoversea.com',
+    'mcs.tiktokv.com',
+    'mcs-va.tiktokv.com',
+    'mcs.tiktokw.us',
+    'log.tiktokv.com',
+    'analytics.tiktok.com',
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'facebook.net',
+    'facebook.com',
+    'bat.bing.com',
+    'sentry.io'
+}
+
+# Fragmentos de URL que se dejan pasar siempre (lo imprescindible para el perfil)
+URLS_PERMITIDAS_DEFAULT = ('/api/user/detail', '/api/post/item_list')
+
+def _coincide_host(host, dominios):
+    """host es alguno de los dominios o un subdominio suyo"""
+    return any(host == dominio or host.endswith('.' + dominio) for dominio in dominios)
+
+# =============================================================================
+# 2. FILTRO
+# =============================================================================
+
+class FiltroRed:
+    """
+    Decide qué peticiones abortar y lo aplica con route() sobre un contexto o página
+
+    Args:
+        tipos_bloqueados (set): resource_type que se abortan siempre
+        hosts_permitidos (set): Dominios propios; el resto de hosts se consideran de terceros
+        hosts_bloqueados (set): Dominios abortados aunque sean propios (telemetría)
+        urls_permitidas (tuple): Fragmentos de URL que nunca se bloquean
+        bloquear_terceros (bool): Abortar las peticiones a hosts fuera de hosts_permitidos
+    """
+
+    def __init__(self, tipos_bloqueados=None, hosts_permitidos=None, hosts_bloqueados=None,
+                 urls_permitidas=None, bloquear_terceros=True):
+        self.tipos_bloqueados = set(TIPOS_BLOQUEADOS_DEFAULT if tipos_bloqueados is None else tipos_bloqueados)
+        self.hosts_permitidos = set(HOSTS_PERMITIDOS_DEFAULT if hosts_permitidos is None else hosts_permitidos)
+        self.hosts_bloqueados = set(HOSTS_BLOQUEADOS_DEFAULT if hosts_bloqueados is None else hosts_bloqueados)
+        self.urls_permitidas = tuple(URLS_PERMITIDAS_DEFAULT if urls_permitidas is None else urls_permitidas)
+        self.bloquear_terceros = bloquear_terceros
+
+        self.bloqueadas = 0
+        self.permitidas = 0
+
+    def debe_bloquear(self, url, tipo_recurso):
+        """
+        Returns:
+            bool: True si la petición no hace falta para extraer el perfil
+        """
+        if any(fragmento in url for fragmento in self.urls_permitidas):
+            return False
+        if tipo_recurso == 'document':
+            return False
+        if tipo_recurso in self.tipos_bloqueados:
+            return True
+
+        host = (urlparse(url).hostname or '').lower()
+        if not host:
+            # data:, blob: y similares no salen a la red
+            return False
+        if _coincide_host(host, self.hosts_bloqueados):
+            return True
+        return self.bloquear_terceros and not _coincide_host(host, self.hosts_permitidos)
+
+    async def _manejar(self, route):
+        request = route.request
+        if self.debe_bloquear(request.url, request.resource_type):
+            self.bloqueadas += 1
+            await route.abort()
+        else:
+            self.permitidas += 1
+            await route.continue_()
+
+    async def instalar(self, destino):
+        """Aplica el filtro a un BrowserContext o a una Page"""
+        await destino.route('**/*', self._manejar)
+
+    def estadisticas(self):
+        """Peticiones abortadas/permitidas desde que se creó el filtro"""
+        total = self.bloqueadas + self.permitidas
+        return {
+            'bloqueadas': self.bloqueadas,
+            'permitidas': self.permitidas,
+            'porcentaje_bloqueado': round(100 * self.bloqueadas / total, 1) if total else 0.0
+        }
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ESCRITOR DE SALIDA EN STREAMING - SCRAPERS PLAYWRIGHT
+Tarea asíncrona alimentada por una cola: mantiene el archivo abierto y
+vuelca las filas por intervalo de tiempo o por número de filas, así que el
+coste de escritura por perfil es constante. Sumideros CSV, JSONL y Parquet
+"""
+
+import os
+import csv
+import json
+import time
+import asyncio
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    PARQUET_DISPONIBLE = False
+
+# =============================================================================
+# 1. CONFIGURACIÓN
+# =============================================================================
+
+INTERVALO_VOLCADO_S = 2.0   # Segundos máximos que una fila espera en memoria
+FILAS_POR_VOLCADO = 50      # Filas que fuerzan un volcado antes del intervalo
+
+FORMATOS = {'.csv': 'csv', '.jsonl': 'jsonl', '.parquet': 'parquet'}
+
+def formato_desde_ruta(ruta):
+    """csv, jsonl o parquet según la extensión (csv por defecto)"""
+    return FORMATOS.get(os.path.splitext(ruta)[1].lower(), 'csv')
+
+# =============================================================================
+# 2. SUMIDEROS
+# =============================================================================
+
+class SumideroCSV:
+    """CSV abierto en modo append; el encabezado solo si el archivo es nuevo o está vacío"""
+
+    confirma_al_cerrar = False
+
+    def __init__(self, ruta, columnas):
+        nuevo = not os.path.exists(ruta) or os.path.getsize(ruta) == 0
+        self.archivo = open(ruta, 'a', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.archivo, fieldnames=columnas, extrasaction='ignore')
+        if nuevo:
+            self.writer.writeheader()
+
+    def escribir(self, filas):
+        self.writer.writerows(filas)
+        self.archivo.flush()
+
+    def cerrar(self):
+        self.archivo.close()
+
+class SumideroJSONL:
+    """Un objeto JSON por línea, en modo append"""
+
+    confirma_al_cerrar = False
+
+    def __init__(self, ruta, columnas):
+        self.columnas = columnas
+        self.archivo = open(ruta, 'a', encoding='utf-8')
+
+    def escribir(self, filas):
+        for fila in filas:
+            registro = {c: fila.get(c) for c in self.columnas} if self.columnas else fila
+            self.archivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self.archivo.flush()
+
+    def cerrar(self):
+        self.archivo.close()
+
+class SumideroParquet:
+    """
+    Un row group por volcado (todas las columnas como texto, igual que el CSV)
+
+    Parquet no admite append y el footer solo se escribe al cerrar: se
+    escribe en un archivo temporal (con las filas previas como primer row
+    group) que sustituye al original con os.replace en cerrar(). Un corte
+    deja intacto el archivo anterior, así que las filas solo se confirman
+    al cerrar (confirma_al_cerrar).
+    """
+
+    confirma_al_cerrar = True
+
+    def __init__(self, ruta, columnas):
+        if not PARQUET_DISPONIBLE:
+            raise ImportError("La salida Parquet necesita pyarrow (pip install pyarrow)")
+        self.ruta = ruta
+        self.ruta_temporal = f"{ruta}.tmp"
+        self.columnas = columnas
+        self.esquema = pa.schema([(c, pa.string()) for c in columnas])
+        previas = pq.read_table(ruta).cast(self.esquema) if os.path.exists(ruta) else None
+        self.writer = pq.ParquetWriter(self.ruta_temporal, self.esquema)
+        if previas is not None and previas.num_rows:
+            self.writer.write_table(previas)
+
+    def escribir(self, filas):
+        columnas = {
+            c: [None if fila.get(c) is None else str(fila.get(c)) for fila in filas]
+            for c in self.columnas
+        }
+        self.writer.write_table(pa.table(columnas, schema=self.esquema))
+
+    def cerrar(self):
+        self.writer.close()
+        os.replace(self.ruta_temporal, self.ruta)
+
+SUMIDEROS = {'csv': SumideroCSV, 'jsonl': SumideroJSONL, 'parquet': SumideroParquet}
+
+# =============================================================================
+# 3. ESCRITOR
+# =============================================================================
+
+_FIN = object()
+
+class EscritorPerfiles:
+    """
+    Productor/consumidor de filas de salida
+
+    Uso:
+        escritor = EscritorPerfiles("data/generated_input/stats_progressive.csv", columnas)
+        await escritor.iniciar()
+        escritor.poner(fila, confirmacion=lambda ok: checkpoint.registrar(...))
+        await escritor.cerrar()
+
+    confirmacion(ok) se llama cuando la fila ya está en disco (ok=True) o
+    si el volcado falló (ok=False): es el punto para registrar el
+    checkpoint, de modo que nunca marca como hecho algo que no se escribió.
+    Con sumideros que solo quedan legibles al cerrar (Parquet) las
+    confirmaciones se aplazan hasta cerrar(). El volcado corre en un hilo
+    para no bloquear el bucle de eventos.
+    """
+
+    def __init__(self, ruta, columnas, formato=None,
+                 intervalo_volcado=INTERVALO_VOLCADO_S, filas_por_volcado=FILAS_POR_VOLCADO):
+        self.ruta = ruta
+        self.columnas = list(columnas)
+        self.formato = formato or formato_desde_ruta(ruta)
+        if self.formato not in SUMIDEROS:
+            raise ValueError(f"Formato de salida desconocido: {self.formato} (opciones: {', '.join(SUMIDEROS)})")
+        self.intervalo_volcado = intervalo_volcado
+        self.filas_por_volcado = max(1, int(filas_por_volcado))
+
+        self._cola = asyncio.Queue()
+        self._tarea = None
+        self._sumidero = None
+        self._confirmaciones_diferidas = []
+        self.filas_escritas = 0
+        self.volcados = 0
+        self.errores = 0
+
+    async def iniciar(self):
+        """Abre el sumidero y arranca la tarea consumidora"""
+        os.makedirs(os.path.dirname(self.ruta) or '.', exist_ok=True)
+        self._sumidero = SUMIDEROS[self.formato](self.ruta, self.columnas)
+        self._tarea = asyncio.create_task(self._consumir())
+
+    def poner(self, fila, confirmacion=None):
+        """Encola una fila (no bloquea al scraper)"""
+        self._cola.put_nowait((fila, confirmacion))
+
+    async def cerrar(self):
+        """Vuelca lo pendiente, cierra el archivo y aplica las confirmaciones aplazadas"""
+        if self._tarea:
+            self._cola.put_nowait(_FIN)
+            await self._tarea
+            self._tarea = None
+        if self._sumidero:
+            ok = True
+            try:
+                await asyncio.to_thread(self._sumidero.cerrar)
+            except Exception as e:
+                ok = False
+                self.errores += 1
+                print(f"[ERROR] Error cerrando {self.ruta}: {e}")
+            finally:
+                self._sumidero = None
+                confirmaciones, self._confirmaciones_diferidas = self._confirmaciones_diferidas, []
+                for confirmacion in confirmaciones:
+                    confirmacion(ok)
+
+    async def _consumir(self):
+        pendientes = []
+        limite = None   # Momento en que la fila pendiente más antigua debe estar en disco
+        while True:
+            espera = None if limite is None else max(limite - time.monotonic(), 0)
+            try:
+                elemento = await asyncio.wait_for(self._cola.get(), timeout=espera)
+            except asyncio.TimeoutError:
+                elemento = None
+
+            if elemento is _FIN:
+                await self._volcar(pendientes)
+                return
+            if elemento is not None:
+                if not pendientes:
+                    limite = time.monotonic() + self.intervalo_volcado
+                pendientes.append(elemento)
+
+            if pendientes and (len(pendientes) >= self.filas_por_volcado or time.monotonic() >= limite):
+                await self._volcar(pendientes)
+                pendientes = []
+                limite = None
+
+    async def _volcar(self, pendientes):
+        if not pendientes:
+            return
+        try:
+            await asyncio.to_thread(self._sumidero.escribir, [fila for fila, _ in pendientes])
+            ok = True
+            self.filas_escritas += len(pendientes)
+            self.volcados += 1
+        except Exception as e:
+            ok = False
+            self.errores += 1
+            print(f"[ERROR] Error volcando {len(pendientes)} filas a {self.ruta}: {e}")
+
+        for _, confirmacion in pendientes:
+            if not confirmacion:
+                continue
+            if ok and self._sumidero.confirma_al_cerrar:
+                self._confirmaciones_diferidas.append(confirmacion)
+            else:
+                confirmacion(ok)
+
+    def estadisticas(self):
+        return {
+            'formato': self.formato,
+            'filas_escritas': self.filas_escritas,
+            'volcados': self.volcados,
+            'errores': self.errores,
+            'en_cola': self._cola.qsize()
+        }
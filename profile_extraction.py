@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+EXTRACCIÓN DE PERFILES - SCRAPERS PLAYWRIGHT
+Lee el estado de hidratación que TikTok incrusta en la página
+(__UNIVERSAL_DATA_FOR_REHYDRATION__ o SIGI_STATE) con un único
+page.evaluate: sin esperas fijas ni selectores en serie, y con contadores
+numéricos exactos en lugar de los textos abreviados del DOM. Cuando falta,
+el fallback DOM recoge todos los campos en otro único evaluate. La espera
+de carga es por eventos (respuesta de datos, script de hidratación o
+selector clave), no por pausas fijas. extraer_perfil junta navegación,
+espera, detección de challenge y extracción en una sola ruta
+"""
+
+import asyncio
+from datetime import datetime
+
+from challenge_detection import SELECTOR_DESAFIO, DesafioDetectado, comprobar_desafio
+
+# =============================================================================
+# 1. SCRIPT EN PÁGINA
+# =============================================================================
+
+# Devuelve solo user + stats (no todo el estado, que pesa cientos de KB)
+SCRIPT_HIDRATACION = """
+() => {
+    const leerJSON = (id) => {
+        const el = document.getElementById(id);
+        if (!el || !el.textContent) return null;
+        try { return JSON.parse(el.textContent); } catch (e) { return null; }
+    };
+
+    const universal = leerJSON('__UNIVERSAL_DATA_FOR_REHYDRATION__');
+    if (universal) {
+        const scope = universal.__DEFAULT_SCOPE__ || {};
+        const detalle = scope['webapp.user-detail'];
+        if (detalle && detalle.userInfo && detalle.userInfo.user) {
+            return {
+                fuente: '__UNIVERSAL_DATA_FOR_REHYDRATION__',
+                user: detalle.userInfo.user,
+                stats: detalle.userInfo.stats || detalle.userInfo.statsV2 || {},
+                statusCode: detalle.statusCode
+            };
+        }
+    }
+
+    const sigi = leerJSON('SIGI_STATE') || window.SIGI_STATE || null;
+    if (sigi && sigi.UserModule && sigi.UserModule.users) {
+        const claves = Object.keys(sigi.UserModule.users);
+        if (claves.length) {
+            const clave = claves[0];
+            return {
+                fuente: 'SIGI_STATE',
+                user: sigi.UserModule.users[clave],
+                stats: (sigi.UserModule.stats || {})[clave] || {},
+                statusCode: 0
+            };
+        }
+    }
+
+    return null;
+}
+"""
+
+# =============================================================================
+# 2. NORMALIZACIÓN
+# =============================================================================
+
+def _contador(stats, *claves):
+    """Primer contador presente en stats convertido a int (None si no hay)"""
+    for clave in claves:
+        valor = stats.get(clave)
+        if valor is None or valor == '':
+            continue
+        try:
+            return int(valor)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+def normalizar_perfil_hidratacion(datos):
+    """
+    Convierte el user/stats del estado de hidratación al profile_info de los scrapers
+
+    Returns:
+        dict: profile_info (None si el estado no trae un usuario utilizable)
+    """
+    if not datos or not isinstance(datos.get('user'), dict):
+        return None
+
+    user = datos['user']
+    stats = datos.get('stats') or {}
+    username = user.get('uniqueId')
+    if not username:
+        return None
+
+    seguidores = _contador(stats, 'followerCount')
+    siguiendo = _contador(stats, 'followingCount')
+    likes = _contador(stats, 'heartCount', 'heart', 'diggCount')
+
+    return {
+        "username": username,
+        "nickname": user.get('nickname', ''),
+        "bio": (user.get('signature') or '').strip() or "No bio yet.",
+        "follower_count": seguidores if seguidores is not None else "No disponible",
+        "following_count": siguiendo if siguiendo is not None else "No disponible",
+        "likes_count": likes if likes is not None else "No disponible",
+        "video_count": _contador(stats, 'videoCount'),
+        "is_verified": bool(user.get('verified', False)),
+        "is_private": bool(user.get('privateAccount', False) or user.get('secret', False))
+    }
+
+# =============================================================================
+# 3. EXTRACCIÓN
+# =============================================================================
+
+async def extraer_desde_hidratacion(page):
+    """
+    Lee el perfil del JSON de hidratación en un solo round trip
+
+    Returns:
+        tuple: (profile_info, fuente) o (None, None) si la página no lo trae
+    """
+    try:
+        datos = await page.evaluate(SCRIPT_HIDRATACION)
+    except Exception as e:
+        print(f"[DEBUG] Estado de hidratación no disponible: {e}")
+        return None, None
+
+    perfil = normalizar_perfil_hidratacion(datos)
+    if perfil is None:
+        return None, None
+    return perfil, datos.get('fuente')
+
+# =============================================================================
+# 4. FALLBACK DOM EN UN SOLO EVALUATE
+# =============================================================================
+
+SELECTORES_USERNAME = ['h1[data-e2e="user-title"]', '[data-e2e="user-title"]', 'h1']
+SELECTOR_BIO = '[data-e2e="user-bio"]'
+SELECTOR_SEGUIDORES = '[data-e2e="followers-count"]'
+SELECTOR_SIGUIENDO = '[data-e2e="following-count"]'
+SELECTOR_LIKES = '[data-e2e="likes-count"]'
+
+SELECTORES_VERIFICADO = [
+    '[data-e2e="user-verified"]',
+    '.tiktok-1b18hxz-DivVerifyIconContainer',
+    'svg[width="18"][height="18"]',
+    '[aria-label*="verified" i]',
+    'span[data-e2e="user-verified"]',
+    '.verified-icon',
+    'svg[data-e2e="verified-icon"]'
+]
+PATRONES_VERIFICADO = ['verified', 'verificado', 'checkmark', 'check-mark']
+
+SELECTORES_PRIVADO = [
+    '[data-e2e="user-page-private-lock"]',
+    '.private-lock',
+    'svg[data-icon="lock"]',
+    'svg[class*="lock"]'
+]
+PATRONES_PRIVADO = ['This account is private', 'Esta cuenta es privada', 'Private account']
+
+# Un único recorrido del DOM con todos los selectores y sus alternativas
+SCRIPT_DOM = """
+(cfg) => {
+    const visible = (el) => !!el && (el.offsetParent !== null || el.getClientRects().length > 0);
+    const texto = (selector) => {
+        const el = document.querySelector(selector);
+        const valor = el ? (el.innerText || el.textContent || '').trim() : '';
+        return valor || null;
+    };
+    const primeroVisible = (selectores) => {
+        for (const selector of selectores) {
+            try {
+                for (const el of document.querySelectorAll(selector)) {
+                    if (visible(el)) return selector;
+                }
+            } catch (e) { /* selector no soportado */ }
+        }
+        return null;
+    };
+
+    let username = null, selectorUsername = null;
+    for (const selector of cfg.username) {
+        username = texto(selector);
+        if (username) { selectorUsername = selector; break; }
+    }
+
+    // Heurística de verificado: patrón cerca de la primera '@' del HTML
+    const html = document.documentElement.innerHTML;
+    let verificadoHtml = false;
+    const indice = html.indexOf('@');
+    if (indice >= 0 && /icon|svg/i.test(html)) {
+        const cercano = html.slice(Math.max(0, indice - 200), indice + 200).toLowerCase();
+        verificadoHtml = cfg.patronesVerificado.some((p) => cercano.includes(p));
+    }
+
+    const cuerpo = document.body ? document.body.innerText : '';
+    return {
+        username: username,
+        selectorUsername: selectorUsername,
+        bio: texto(cfg.bio),
+        seguidores: texto(cfg.seguidores),
+        siguiendo: texto(cfg.siguiendo),
+        likes: texto(cfg.likes),
+        selectorVerificado: primeroVisible(cfg.verificado),
+        verificadoHtml: verificadoHtml,
+        selectorPrivado: primeroVisible(cfg.privado),
+        mensajePrivado: cfg.patronesPrivado.find((p) => cuerpo.includes(p) || html.includes(p)) || null
+    };
+}
+"""
+
+CONFIG_SCRIPT_DOM = {
+    'username': SELECTORES_USERNAME,
+    'bio': SELECTOR_BIO,
+    'seguidores': SELECTOR_SEGUIDORES,
+    'siguiendo': SELECTOR_SIGUIENDO,
+    'likes': SELECTOR_LIKES,
+    'verificado': SELECTORES_VERIFICADO,
+    'patronesVerificado': PATRONES_VERIFICADO,
+    'privado': SELECTORES_PRIVADO,
+    'patronesPrivado': PATRONES_PRIVADO
+}
+
+def username_desde_url(url):
+    """Username de respaldo tomado de la URL del perfil"""
+    return url.split('@')[-1].split('?')[0].split('/')[0]
+
+def componer_perfil_dom(datos, url):
+    """
+    Aplica valores por defecto y las reglas de verificado/privado al resultado del script DOM
+
+    Una cuenta con estadísticas y bio visibles se considera pública aunque
+    algún selector de candado coincida.
+
+    Returns:
+        dict: profile_info
+    """
+    datos = datos or {}
+    perfil = {
+        "username": datos.get('username') or username_desde_url(url),
+        "bio": datos.get('bio') or "No bio yet.",
+        "follower_count": datos.get('seguidores') or "No disponible",
+        "following_count": datos.get('siguiendo') or "No disponible",
+        "likes_count": datos.get('likes') or "No disponible",
+        "is_verified": bool(datos.get('selectorVerificado') or datos.get('verificadoHtml')),
+        "is_private": False
+    }
+
+    estadisticas_visibles = (
+        datos.get('seguidores') and datos.get('siguiendo') and datos.get('bio')
+    )
+    if not estadisticas_visibles:
+        perfil["is_private"] = bool(datos.get('selectorPrivado') or datos.get('mensajePrivado'))
+
+    return perfil
+
+async def extraer_desde_dom(page, url):
+    """
+    Recoge todos los campos del perfil del DOM en un único round trip
+
+    Returns:
+        tuple: (profile_info, datos crudos del script con los selectores que coincidieron)
+    """
+    datos = await page.evaluate(SCRIPT_DOM, CONFIG_SCRIPT_DOM)
+    return componer_perfil_dom(datos, url), datos
+
+# =============================================================================
+# 5. ESPERA DE PERFIL LISTO
+# =============================================================================
+
+TIMEOUT_LISTO_MS_DEFAULT = 8000
+
+SELECTOR_HIDRATACION = '#__UNIVERSAL_DATA_FOR_REHYDRATION__, #SIGI_STATE'
+URLS_DATOS_PERFIL = ('/api/user/detail',)
+
+def _es_respuesta_perfil(response):
+    return response.ok and any(fragmento in response.url for fragmento in URLS_DATOS_PERFIL)
+
+def esperar_respuesta_perfil(page, timeout_ms=TIMEOUT_LISTO_MS_DEFAULT):
+    """
+    Lanza la espera de la respuesta de la API de usuario. Es la única espera
+    que debe arrancar antes de page.goto, para no perder la respuesta
+
+    Returns:
+        asyncio.Future: se resuelve con la respuesta (o falla por timeout)
+    """
+    return asyncio.ensure_future(page.wait_for_response(_es_respuesta_perfil, timeout=timeout_ms))
+
+async def esperar_perfil_listo(page, timeout_ms=TIMEOUT_LISTO_MS_DEFAULT, respuesta=None):
+    """
+    Espera a la primera señal de que los datos del perfil están disponibles:
+    la respuesta de la API de usuario, el script de hidratación o el título
+    del perfil en el DOM. Un captcha también corta la espera ('desafio'),
+    para no agotar el timeout en una página que nunca mostrará el perfil
+
+    Las esperas de selector deben empezar con la navegación ya confirmada:
+    en una página reutilizada coincidirían con el DOM del perfil anterior.
+    La respuesta de red, en cambio, se lanza antes de navegar:
+        respuesta = esperar_respuesta_perfil(page, timeout_ms)
+        await page.goto(url, wait_until="commit")
+        senal = await esperar_perfil_listo(page, timeout_ms, respuesta)
+
+    Returns:
+        str: 'respuesta', 'hidratacion', 'selector' o 'desafio' (None si vence el timeout)
+    """
+    if respuesta is None:
+        respuesta = esperar_respuesta_perfil(page, timeout_ms)
+    esperas = {
+        respuesta: 'respuesta',
+        asyncio.ensure_future(page.wait_for_selector(SELECTOR_HIDRATACION, state='attached', timeout=timeout_ms)): 'hidratacion',
+        asyncio.ensure_future(page.wait_for_selector(SELECTORES_USERNAME[1], timeout=timeout_ms)): 'selector',
+        asyncio.ensure_future(page.wait_for_selector(SELECTOR_DESAFIO, state='attached', timeout=timeout_ms)): 'desafio'
+    }
+    pendientes = set(esperas)
+    try:
+        while pendientes:
+            hechas, pendientes = await asyncio.wait(pendientes, return_when=asyncio.FIRST_COMPLETED)
+            for tarea in hechas:
+                if not tarea.cancelled() and tarea.exception() is None:
+                    return esperas[tarea]
+        return None
+    finally:
+        for tarea in pendientes:
+            tarea.cancel()
+        await asyncio.gather(*pendientes, return_exceptions=True)
+
+# =============================================================================
+# 6. NAVEGACIÓN Y EXTRACCIÓN COMPLETA
+# =============================================================================
+
+def _metadatos(url, status, metodo, **extra):
+    return {
+        "url": url,
+        "extraction_date": datetime.now().isoformat(),
+        "extraction_method": metodo,
+        "status": status,
+        **extra
+    }
+
+PERFIL_ERROR = {
+    "username": "error",
+    "bio": "Error during extraction",
+    "follower_count": "Error",
+    "following_count": "Error",
+    "likes_count": "Error",
+    "is_verified": False,
+    "is_private": False
+}
+
+async def extraer_perfil(page, url, timeout_listo_ms=TIMEOUT_LISTO_MS_DEFAULT, metodo="Playwright"):
+    """
+    Navega al perfil y lo extrae: espera por eventos, detección de challenge,
+    hidratación y, si falta, fallback DOM. Es la única ruta de extracción de
+    todos los scrapers (scraper_engine.py)
+
+    Returns:
+        dict: {'extraction_metadata': {..., 'status': 'success'|'blocked'|'error'},
+               'profile_info': dict (None si 'blocked': no debe generar fila)}
+    """
+    try:
+        # Solo la respuesta de la API se espera desde antes de navegar; los
+        # selectores esperan a que la navegación se confirme, porque en una
+        # página reutilizada el DOM anterior sigue presente hasta entonces
+        respuesta = esperar_respuesta_perfil(page, timeout_listo_ms)
+        try:
+            try:
+                await page.goto(url, wait_until="commit", timeout=20000)
+            except Exception:
+                await page.goto(url, wait_until="load", timeout=15000)
+        except Exception:
+            respuesta.cancel()
+            await asyncio.gather(respuesta, return_exceptions=True)
+            raise
+        senal = await esperar_perfil_listo(page, timeout_listo_ms, respuesta)
+
+        # Captcha o muro de login: se aborta ya, sin esperar a los selectores
+        await comprobar_desafio(page)
+
+        perfil, fuente = await extraer_desde_hidratacion(page)
+        if perfil and perfil['username'].lower() != username_desde_url(url).lower():
+            # Estado de otro perfil (p. ej. hidratación de la navegación anterior)
+            print(f"[WARNING]  Hidratación de @{perfil['username']} al extraer {url}: se usa el DOM")
+            perfil = None
+        if perfil:
+            return {
+                "extraction_metadata": _metadatos(url, "success", f"{metodo} ({fuente})", signal=senal),
+                "profile_info": perfil
+            }
+
+        # La señal pudo ser la respuesta de red: el DOM aún no tiene por qué estar pintado
+        if senal in ('respuesta', 'hidratacion'):
+            try:
+                await page.wait_for_selector(SELECTORES_USERNAME[1], timeout=timeout_listo_ms)
+            except Exception:
+                pass
+
+        perfil, datos_dom = await extraer_desde_dom(page, url)
+        if datos_dom.get('selectorUsername') in SELECTORES_USERNAME[:2]:
+            titulo = (datos_dom.get('username') or '').lstrip('@').lower()
+            if titulo != username_desde_url(url).lower():
+                raise ValueError(f"El DOM muestra @{titulo}, no el perfil solicitado")
+
+        return {
+            "extraction_metadata": _metadatos(
+                url, "success", f"{metodo} (DOM)", signal=senal,
+                selector_username=datos_dom.get('selectorUsername')
+            ),
+            "profile_info": perfil
+        }
+
+    except DesafioDetectado as e:
+        return {
+            "extraction_metadata": _metadatos(url, "blocked", metodo, error=str(e), challenge_type=e.tipo),
+            "profile_info": None
+        }
+    except Exception as e:
+        return {
+            "extraction_metadata": _metadatos(url, "error", metodo, error=str(e)),
+            "profile_info": dict(PERFIL_ERROR)
+        }
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CHECKPOINT DE SCRAPING - REANUDACIÓN DE EJECUCIONES LARGAS
+Manifiesto JSONL (solo se añade) con el estado de cada URL procesada. Al
+reanudar se saltan las URLs ya correctas, se reintentan solo las que
+fallaron y la salida incremental (CSV o JSONL) se compacta para que no
+queden filas duplicadas ni líneas truncadas por un corte
+"""
+
+import os
+import csv
+import json
+from datetime import datetime
+
+# =============================================================================
+# 1. MANIFIESTO
+# =============================================================================
+
+def ruta_checkpoint(archivo_csv):
+    """Manifiesto asociado a un CSV: stats_progressive.csv -> stats_progressive_checkpoint.jsonl"""
+    return f"{os.path.splitext(archivo_csv)[0]}_checkpoint.jsonl"
+
+class CheckpointScraping:
+    """
+    Estado por URL persistido línea a línea
+
+    Cada registro se escribe y se sincroniza a disco antes de seguir, así
+    que un corte pierde como mucho el perfil en curso. La última línea de
+    una URL es la que vale.
+    """
+
+    def __init__(self, ruta_manifiesto):
+        self.ruta = ruta_manifiesto
+        self.estados = {}
+        self._salto_pendiente = False
+        self._cargar()
+
+    def _cargar(self):
+        if not os.path.exists(self.ruta):
+            return
+
+        with open(self.ruta, 'r', encoding='utf-8') as f:
+            for linea in f:
+                # Sin salto final: la próxima línea no debe pegarse a la truncada
+                self._salto_pendiente = not linea.endswith("\n")
+                try:
+                    registro = json.loads(linea)
+                except json.JSONDecodeError:
+                    # Línea truncada por un corte a mitad de escritura
+                    continue
+                self.estados[registro['url']] = registro
+
+    def completado(self, url):
+        """La URL ya se extrajo correctamente en una ejecución anterior"""
+        return self.estados.get(url, {}).get('status') == 'success'
+
+    def pendientes(self, usuarios):
+        """Usuarios sin extracción correcta (nuevos o con error previo)"""
+        return [usuario for usuario in usuarios if not self.completado(usuario['url'])]
+
+    def registrar(self, url, username, status):
+        """Añade el estado de una URL al manifiesto"""
+        intentos = self.estados.get(url, {}).get('intentos', 0) + 1
+        registro = {
+            'url': url,
+            'username': username,
+            'status': status,
+            'intentos': intentos,
+            'fecha': datetime.now().isoformat()
+        }
+
+        os.makedirs(os.path.dirname(self.ruta) or '.', exist_ok=True)
+        with open(self.ruta, 'a', encoding='utf-8') as f:
+            if self._salto_pendiente:
+                f.write("\n")
+                self._salto_pendiente = False
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.estados[url] = registro
+
+    def reiniciar(self):
+        """Descarta el manifiesto para empezar desde cero"""
+        if os.path.exists(self.ruta):
+            os.remove(self.ruta)
+        self.estados = {}
+        self._salto_pendiente = False
+
+    def resumen(self):
+        """Cuenta de URLs por estado"""
+        conteo = {}
+        for registro in self.estados.values():
+            conteo[registro['status']] = conteo.get(registro['status'], 0) + 1
+        return conteo
+
+# =============================================================================
+# 2. COMPACTACIÓN DEL CSV INCREMENTAL
+# =============================================================================
+
+def compactar_csv(archivo_csv, checkpoint, columna_url='URL'):
+    """
+    Reescribe el CSV dejando una fila (la última) por cada URL correcta según el checkpoint
+
+    Las filas de URLs con error se descartan porque se van a reintentar, y
+    las escritas justo antes de un corte sin llegar al manifiesto también.
+    La reescritura es atómica (archivo temporal + os.replace).
+
+    Returns:
+        tuple: (filas conservadas, filas descartadas)
+    """
+    if not os.path.exists(archivo_csv):
+        return 0, 0
+
+    with open(archivo_csv, 'r', newline='', encoding='utf-8') as f:
+        lector = csv.DictReader(f)
+        columnas = lector.fieldnames
+        filas = list(lector)
+
+    if not columnas or columna_url not in columnas:
+        return 0, len(filas)
+
+    ultimas = {}
+    for fila in filas:
+        url = fila.get(columna_url)
+        # Una fila truncada deja columnas a None
+        if url and checkpoint.completado(url) and None not in fila.values():
+            ultimas[url] = fila
+
+    ruta_temporal = f"{archivo_csv}.tmp"
+    with open(ruta_temporal, 'w', newline='', encoding='utf-8') as f:
+        escritor = csv.DictWriter(f, fieldnames=columnas)
+        escritor.writeheader()
+        escritor.writerows(ultimas.values())
+    os.replace(ruta_temporal, archivo_csv)
+
+    return len(ultimas), len(filas) - len(ultimas)
+
+def compactar_jsonl(archivo_jsonl, checkpoint, columna_url='URL'):
+    """
+    Equivalente de compactar_csv para la salida JSONL
+
+    Las líneas que no se pueden leer (truncadas por un corte) se descartan
+    junto con las de URLs que no constan como correctas en el checkpoint.
+
+    Returns:
+        tuple: (filas conservadas, filas descartadas)
+    """
+    if not os.path.exists(archivo_jsonl):
+        return 0, 0
+
+    ultimas = {}
+    total = 0
+    with open(archivo_jsonl, 'r', encoding='utf-8') as f:
+        for linea in f:
+            if not linea.strip():
+                continue
+            total += 1
+            try:
+                registro = json.loads(linea)
+            except json.JSONDecodeError:
+                continue
+            url = registro.get(columna_url) if isinstance(registro, dict) else None
+            if url and checkpoint.completado(url):
+                ultimas[url] = registro
+
+    ruta_temporal = f"{archivo_jsonl}.tmp"
+    with open(ruta_temporal, 'w', encoding='utf-8') as f:
+        for registro in ultimas.values():
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    os.replace(ruta_temporal, archivo_jsonl)
+
+    return len(ultimas), total - len(ultimas)
+
+COMPACTADORES = {'csv': compactar_csv, 'jsonl': compactar_jsonl}
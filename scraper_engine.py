@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MOTOR DE SCRAPING DE PERFILES - ESTRATEGIAS INTERCAMBIABLES
+Un único motor (navegador, pool de contextos, filtro de red, sesiones,
+controlador AIMD, checkpoint y salida CSV) con tres estrategias de
+ejecución: secuencial (uno por uno), por lotes (gather por lote) y pool
+(cola con un trabajador por página). Las filas salen por un escritor en
+streaming (output_writer.py: CSV, JSONL o Parquet). Los scripts
+simple_tiktok_scraper_optimized, tiktok_scraper_Zversion y
+tiktok_scraper_Zversion2 son perfiles de este motor
+"""
+
+import os
+import csv
+import time
+import asyncio
+import argparse
+import pandas as pd
+from tqdm import tqdm
+from playwright.async_api import async_playwright
+
+from browser_pool import (
+    PoolNavegadores, PoolAgotado, NUM_CONTEXTOS_DEFAULT, PAGINAS_POR_CONTEXTO_DEFAULT,
+    NAVEGACIONES_POR_CONTEXTO_DEFAULT
+)
+from network_filter import FiltroRed
+from profile_extraction import extraer_perfil, TIMEOUT_LISTO_MS_DEFAULT
+from scrape_checkpoint import CheckpointScraping, ruta_checkpoint, COMPACTADORES
+from adaptive_controller import ControladorAIMD, clasificar_error
+from session_manager import GestorSesiones
+from challenge_detection import backoff_desafio, MAX_REINTENTOS_DESAFIO
+from output_writer import EscritorPerfiles, formato_desde_ruta, SUMIDEROS
+
+# =============================================================================
+# 1. CONFIGURACIÓN
+# =============================================================================
+
+ARCHIVO_EXCEL = "data/Input/usernames.xlsx"
+ARCHIVO_CSV_PROGRESIVO = "data/generated_input/stats_progressive.csv"
+ARCHIVO_CSV_FINAL = "data/generated_input/stats_final.csv"
+TAMANO_LOTE_DEFAULT = 10
+
+COLUMNAS_CSV = [
+    'URL',
+    'username',
+    'followers_count',
+    'following_count',
+    'likes_count',
+    'bio',
+    'is_verified',
+    'is_private'
+]
+
+ARGS_NAVEGADOR = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-blink-features=AutomationControlled'
+]
+
+# =============================================================================
+# 2. ENTRADA Y SALIDA
+# =============================================================================
+
+def fila_csv(resultado):
+    """Fila del CSV de estadísticas para un resultado de procesar_usuario"""
+    if resultado.get("profile_data") and resultado["profile_data"].get("profile_info"):
+        profile_info = resultado["profile_data"]["profile_info"]
+        return {
+            'URL': resultado.get('url', 'N/A'),
+            'username': profile_info.get('username', 'N/A'),
+            'followers_count': profile_info.get('follower_count', 'N/A'),
+            'following_count': profile_info.get('following_count', 'N/A'),
+            'likes_count': profile_info.get('likes_count', 'N/A'),
+            'bio': profile_info.get('bio', 'N/A'),
+            'is_verified': profile_info.get('is_verified', False),
+            'is_private': profile_info.get('is_private', False)
+        }
+
+    # Datos de error
+    return {
+        'URL': resultado.get('url', 'N/A'),
+        'username': resultado.get('username', 'error'),
+        'followers_count': 'Error',
+        'following_count': 'Error',
+        'likes_count': 'Error',
+        'bio': 'Error during extraction',
+        'is_verified': False,
+        'is_private': False
+    }
+
+def guardar_stats_csv(resultados_data, archivo_csv=ARCHIVO_CSV_FINAL):
+    """
+    Guarda los resultados en un archivo CSV con las columnas solicitadas
+    (los perfiles bloqueados por challenge no generan fila)
+
+    Returns:
+        str: Ruta del archivo guardado (None si falla)
+    """
+    try:
+        os.makedirs(os.path.dirname(archivo_csv), exist_ok=True)
+        filas_csv = [fila_csv(r) for r in resultados_data if r and r["status"] != "blocked"]
+
+        with open(archivo_csv, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=COLUMNAS_CSV)
+            writer.writeheader()
+            writer.writerows(filas_csv)
+
+        return archivo_csv
+
+    except Exception as e:
+        print(f"[ERROR] Error guardando CSV: {e}")
+        return None
+
+def cargar_usuarios_desde_excel(archivo_excel=ARCHIVO_EXCEL, limite=None):
+    """
+    Carga la lista de usuarios desde el archivo Excel
+
+    Args:
+        archivo_excel (str): Ruta al archivo Excel
+        limite (int or None): Número máximo de usuarios a procesar. Si es None, carga todos
+
+    Returns:
+        list: Lista de diccionarios con username y URL
+    """
+    try:
+        print(f"[INFO] Cargando usuarios desde: {archivo_excel}")
+        df = pd.read_excel(archivo_excel)
+
+        if "username" not in df.columns:
+            print("[ERROR] Columna username no encontrada en el archivo Excel")
+            return []
+
+        if limite is not None:
+            df = df.head(limite)
+            print(f"[INFO] Aplicando límite de {limite} usuarios")
+        else:
+            print(f"[INFO] Cargando TODOS los usuarios ({len(df)} encontrados)")
+
+        usuarios = []
+        for _, row in df.iterrows():
+            username = row["username"]
+            url = row.get("URL", f"https://www.tiktok.com/@{username}")
+            usuarios.append({"username": username, "url": url})
+
+        print(f"[OK] {len(usuarios)} usuarios cargados desde Excel")
+        return usuarios
+
+    except Exception as e:
+        print(f"[ERROR] Error leyendo archivo Excel: {e}")
+        return []
+
+# =============================================================================
+# 3. MOTOR
+# =============================================================================
+
+class MotorScraping:
+    """
+    Recursos compartidos por todas las estrategias
+
+    Uso:
+        motor = MotorScraping(num_contextos=2, paginas_por_contexto=2)
+        await motor.iniciar()
+        resultado, segundos = await motor.procesar_perfil(url)
+        await motor.cerrar()
+
+    procesar_perfil hace un intento: turno del controlador AIMD, página
+    del pool, extraer_perfil y realimentación (un challenge marca el
+    contexto como quemado). Los reintentos los decide la estrategia.
+    """
+
+    def __init__(self, num_contextos=NUM_CONTEXTOS_DEFAULT,
+                 paginas_por_contexto=PAGINAS_POR_CONTEXTO_DEFAULT,
+                 navegaciones_por_contexto=NAVEGACIONES_POR_CONTEXTO_DEFAULT,
+                 bloquear_recursos=True, usar_sesiones=True, validar_sesiones=True,
+                 timeout_listo_ms=TIMEOUT_LISTO_MS_DEFAULT,
+                 concurrencia_inicial=2, retardo_inicial=3.0, retardo_min=1.0):
+        self.num_contextos = num_contextos
+        self.paginas_por_contexto = paginas_por_contexto
+        self.navegaciones_por_contexto = navegaciones_por_contexto
+        self.timeout_listo_ms = timeout_listo_ms
+        self.validar_sesiones = validar_sesiones
+        self.concurrencia_inicial = concurrencia_inicial
+        self.retardo_inicial = retardo_inicial
+        self.retardo_min = retardo_min
+
+        # Imágenes, vídeo, fuentes y analítica no hacen falta para leer el perfil
+        self.filtro_red = FiltroRed() if bloquear_recursos else None
+        # Sesiones guardadas entre ejecuciones: cada contexto arranca en caliente
+        self.gestor_sesiones = GestorSesiones() if usar_sesiones else None
+
+        self.playwright = None
+        self.browser = None
+        self.pool = None
+        self.controlador = None
+
+    async def iniciar(self):
+        """Navegador invisible, sesiones validadas, pool de contextos y controlador AIMD"""
+        self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(headless=True, args=ARGS_NAVEGADOR)
+
+        if self.gestor_sesiones:
+            self.gestor_sesiones.importar_legacy()
+            validas = self.gestor_sesiones.validar()
+            if validas and self.validar_sesiones:
+                validas = await self.gestor_sesiones.validar_en_navegador(self.browser)
+            print(f"[INFO] Sesiones guardadas válidas: {validas}/{self.gestor_sesiones.tamano_pool}")
+
+        self.pool = PoolNavegadores(
+            self.browser,
+            num_contextos=self.num_contextos,
+            paginas_por_contexto=self.paginas_por_contexto,
+            navegaciones_por_contexto=self.navegaciones_por_contexto,
+            filtro_red=self.filtro_red,
+            gestor_sesiones=self.gestor_sesiones
+        )
+        await self.pool.iniciar()
+
+        # Concurrencia y pausa adaptativas, con la capacidad del pool como techo
+        self.controlador = ControladorAIMD(
+            concurrencia_inicial=min(self.concurrencia_inicial, self.pool.capacidad),
+            concurrencia_max=self.pool.capacidad,
+            retardo_inicial=self.retardo_inicial,
+            retardo_min=self.retardo_min
+        )
+
+    async def cerrar(self):
+        """Cierra el pool (guarda las sesiones), el navegador y Playwright"""
+        if self.pool:
+            await self.pool.cerrar()
+        if self.browser:
+            await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
+
+    async def procesar_perfil(self, url):
+        """
+        Un intento de extracción de un perfil
+
+        Returns:
+            tuple: (resultado de extraer_perfil, segundos)
+        """
+        async with self.controlador.turno():
+            inicio = time.time()
+            async with self.pool.pagina() as page:
+                page.set_default_timeout(15000)
+                resultado = await extraer_perfil(page, url, self.timeout_listo_ms)
+                metadatos = resultado["extraction_metadata"]
+                if metadatos["status"] == "blocked":
+                    # Contexto quemado: deja de prestar páginas, se recicla y su sesión se retira
+                    self.pool.marcar_desafiado(page)
+
+            segundos = time.time() - inicio
+            self.controlador.registrar(
+                metadatos["status"] == "success", segundos,
+                fallo='bloqueo' if metadatos["status"] == "blocked" else clasificar_error(metadatos.get("error"))
+            )
+        return resultado, segundos
+
+    def resumen(self):
+        """Estado final del controlador, el pool, el filtro de red y las sesiones"""
+        return {
+            'aimd': self.controlador.estado() if self.controlador else None,
+            'pool': self.pool.estadisticas() if self.pool else None,
+            'red': self.filtro_red.estadisticas() if self.filtro_red else None,
+            'sesiones': self.gestor_sesiones.resumen() if self.gestor_sesiones else None
+        }
+
+# =============================================================================
+# 4. ESTRATEGIAS
+# =============================================================================
+# Todas reciben tareas (i, usuario, reintento) y una corrutina procesar que
+# devuelve True cuando el perfil hay que reencolarlo (challenge)
+
+async def estrategia_secuencial(motor, tareas, procesar, **opciones):
+    """Uno por uno, con la pausa adaptativa entre perfiles"""
+    for i, usuario, reintento in tareas:
+        while await procesar(i, usuario, reintento):
+            reintento += 1
+            await asyncio.sleep(backoff_desafio(reintento))
+        await motor.controlador.esperar()
+
+async def estrategia_lotes(motor, tareas, procesar, tamano_lote=TAMANO_LOTE_DEFAULT, **opciones):
+    """
+    Lotes en paralelo (el controlador AIMD limita cuántos navegan a la vez);
+    los perfiles reencolados entran al principio del lote siguiente
+    """
+    pendientes = list(tareas)
+    while pendientes:
+        lote, pendientes = pendientes[:tamano_lote], pendientes[tamano_lote:]
+        reencolar = await asyncio.gather(*[procesar(i, usuario, reintento) for i, usuario, reintento in lote])
+        reencolados = [(i, usuario, reintento + 1)
+                       for (i, usuario, reintento), volver in zip(lote, reencolar) if volver]
+        if reencolados:
+            await asyncio.sleep(backoff_desafio(max(t[2] for t in reencolados)))
+            pendientes = reencolados + pendientes
+        elif pendientes:
+            await motor.controlador.esperar()
+
+async def estrategia_pool(motor, tareas, procesar, **opciones):
+    """Cola de perfiles con un trabajador por página del pool; cada uno pausa por su cuenta"""
+    cola = asyncio.Queue()
+    for tarea in tareas:
+        cola.put_nowait(tarea)
+
+    async def trabajador():
+        while not cola.empty():
+            i, usuario, reintento = cola.get_nowait()
+            if await procesar(i, usuario, reintento):
+                # Backoff fuera del turno; el contexto quemado ya no presta páginas,
+                # así que el reintento cae en otro contexto (o en uno reciclado)
+                espera = backoff_desafio(reintento + 1)
+                print(f"[REFRESH] {usuario['username']} reencolado tras challenge, reintento en {espera:.1f}s")
+                await asyncio.sleep(espera)
+                cola.put_nowait((i, usuario, reintento + 1))
+                continue
+
+            if not cola.empty():
+                await motor.controlador.esperar()
+
+    num_trabajadores = min(motor.pool.capacidad, cola.qsize())
+    await asyncio.gather(*[trabajador() for _ in range(num_trabajadores)])
+
+ESTRATEGIAS = {
+    'secuencial': estrategia_secuencial,
+    'lotes': estrategia_lotes,
+    'pool': estrategia_pool
+}
+
+# =============================================================================
+# 5. EJECUCIÓN
+# =============================================================================
+
+async def ejecutar_scraping(estrategia='pool', usuarios=None, reanudar=True,
+                            archivo_excel=ARCHIVO_EXCEL, limite=None,
+                            archivo_csv_incremental=ARCHIVO_CSV_PROGRESIVO,
+                            archivo_csv_final=ARCHIVO_CSV_FINAL,
+                            num_contextos=NUM_CONTEXTOS_DEFAULT,
+                            paginas_por_contexto=PAGINAS_POR_CONTEXTO_DEFAULT,
+                            tamano_lote=TAMANO_LOTE_DEFAULT, formato_salida=None, **opciones_motor):
+    """
+    Ejecuta una pasada completa de scraping con la estrategia indicada
+
+    Args:
+        estrategia (str): 'secuencial', 'lotes' o 'pool'
+        usuarios (list): Usuarios a procesar (por defecto, los del Excel)
+        reanudar (bool): Continuar desde el checkpoint (salta los perfiles ya
+            correctos y reintenta los fallidos). Con False empieza desde cero.
+        archivo_csv_incremental (str): Salida incremental (su checkpoint va al lado)
+        archivo_csv_final (str): CSV de backup al terminar (None para no generarlo)
+        num_contextos / paginas_por_contexto (int): Tamaño del pool (secuencial usa 1×1)
+        tamano_lote (int): Perfiles por lote en la estrategia 'lotes'
+        formato_salida (str): 'csv', 'jsonl' o 'parquet' (por defecto, según la extensión)
+        **opciones_motor: Resto de argumentos de MotorScraping
+
+    Returns:
+        dict: Resumen de la ejecución (None si no había nada que hacer)
+    """
+    if estrategia not in ESTRATEGIAS:
+        raise ValueError(f"Estrategia desconocida: {estrategia} (opciones: {', '.join(ESTRATEGIAS)})")
+    if estrategia == 'secuencial':
+        num_contextos = paginas_por_contexto = 1
+    formato_salida = formato_salida or formato_desde_ruta(archivo_csv_incremental)
+
+    print(f"TIKTOK PROFILE SCRAPER - ESTRATEGIA {estrategia.upper()}")
+    print("=" * 75)
+
+    if usuarios is None:
+        usuarios = cargar_usuarios_desde_excel(archivo_excel, limite=limite)
+    if not usuarios:
+        print("[ERROR] No se pudieron cargar usuarios. Terminando.")
+        return None
+
+    os.makedirs(os.path.dirname(archivo_csv_incremental), exist_ok=True)
+
+    # Checkpoint de URLs procesadas junto al CSV incremental
+    checkpoint = CheckpointScraping(ruta_checkpoint(archivo_csv_incremental))
+    if reanudar:
+        # Una fila por perfil correcto; las de error se reintentan. Parquet no
+        # se compacta: quien lo lea debe quedarse con la última fila por URL
+        compactar = COMPACTADORES.get(formato_salida)
+        conservadas, descartadas = (compactar(archivo_csv_incremental, checkpoint)
+                                    if compactar else (0, 0))
+        total = len(usuarios)
+        usuarios = checkpoint.pendientes(usuarios)
+        print(f"[REFRESH] Reanudando: {total - len(usuarios)} perfiles ya completados, "
+              f"{len(usuarios)} pendientes")
+        if conservadas or descartadas:
+            print(f"[INFO] Salida {formato_salida} compactada: {conservadas} filas conservadas, {descartadas} descartadas para reintento")
+        if not usuarios:
+            print(f"[OK] Todos los perfiles ya están en {archivo_csv_incremental}")
+            return None
+    else:
+        if os.path.exists(archivo_csv_incremental):
+            os.remove(archivo_csv_incremental)
+            print(f"[INFO] Archivo CSV previo eliminado: {archivo_csv_incremental}")
+        checkpoint.reiniciar()
+
+    motor = MotorScraping(num_contextos=num_contextos, paginas_por_contexto=paginas_por_contexto, **opciones_motor)
+    # Escritor en streaming: archivo abierto toda la ejecución, volcados por lotes
+    escritor = EscritorPerfiles(archivo_csv_incremental, COLUMNAS_CSV, formato=formato_salida)
+
+    try:
+        await motor.iniciar()
+        await escritor.iniciar()
+        print(f"[INFO] Pool de {motor.pool.num_contextos} contextos × {motor.pool.paginas_por_contexto} páginas "
+              f"({motor.pool.capacidad} perfiles en paralelo como máximo)")
+        print(f"[INFO] Total a procesar: {len(usuarios)} usuarios")
+
+        resultados_data = [None] * len(usuarios)
+        conteo = {'success': 0, 'error': 0, 'blocked': 0}
+
+        with tqdm(total=len(usuarios), desc="Procesando perfiles", unit="perfil") as pbar:
+
+            async def procesar(i, usuario, reintento):
+                """Procesa un usuario; devuelve True si hay que reencolarlo por un challenge"""
+                try:
+                    resultado_data, segundos = await motor.procesar_perfil(usuario["url"])
+                    status = resultado_data["extraction_metadata"]["status"]
+                except PoolAgotado:
+                    # Sin contextos no hay nada que reintentar: se aborta la ejecución
+                    raise
+                except Exception as e:
+                    print(f"[ERROR] Excepción procesando {usuario['username']}: {e}")
+                    motor.controlador.registrar(False, fallo=clasificar_error(str(e)))
+                    resultado_data, segundos, status = None, 0, "error"
+
+                if status == "blocked" and reintento < MAX_REINTENTOS_DESAFIO:
+                    return True
+
+                resultado_final = {
+                    "username": usuario["username"],
+                    "url": usuario["url"],
+                    "status": status,
+                    "profile_data": resultado_data
+                }
+                resultados_data[i - 1] = resultado_final
+                conteo[status] += 1
+
+                if status == "blocked":
+                    # Sin fila en la salida: el checkpoint lo deja pendiente para la próxima ejecución
+                    print(f"[WARNING]  {usuario['username']} bloqueado tras {reintento + 1} intentos")
+                    checkpoint.registrar(usuario["url"], usuario["username"], "blocked")
+                else:
+                    # El checkpoint se registra cuando la fila ya está en disco
+                    # (si el volcado falla queda como error y se reintenta)
+                    def confirmar(ok, usuario=usuario, status=status):
+                        checkpoint.registrar(usuario["url"], usuario["username"], status if ok else "error")
+                    escritor.poner(fila_csv(resultado_final), confirmacion=confirmar)
+
+                pbar.update(1)
+                pbar.set_postfix({
+                    "OK": conteo['success'],
+                    "Err": conteo['error'],
+                    "Bloq": conteo['blocked'],
+                    "Tiempo": f"{segundos:.1f}s",
+                    "Conc": motor.controlador.concurrencia
+                })
+                return False
+
+            tareas = [(i, usuario, 0) for i, usuario in enumerate(usuarios, 1)]
+            await ESTRATEGIAS[estrategia](motor, tareas, procesar, tamano_lote=tamano_lote)
+    finally:
+        # Primero el escritor: las filas en cola y sus confirmaciones del
+        # checkpoint no dependen de que el navegador se cierre bien
+        try:
+            await escritor.cerrar()
+        finally:
+            await motor.cerrar()
+
+    resumen = motor.resumen()
+    estado_aimd = resumen['aimd']
+    print(f"\n{'='*75}")
+    print(f"[SUMMARY] RESUMEN FINAL")
+    print(f"{'='*75}")
+    print(f"[INFO] Perfiles exitosos: {conteo['success']} / {len(usuarios)} "
+          f"({conteo['success'] / len(usuarios) * 100:.1f}%)")
+    print(f"[INFO] Con error: {conteo['error']} | Bloqueados por challenge (sin fila): {conteo['blocked']}")
+    print(f"[INFO] Control adaptativo: concurrencia final {estado_aimd['concurrencia']}, "
+          f"pausa {estado_aimd['pausa']}s, {estado_aimd['perfiles_min']} perfiles/min")
+    if resumen['red']:
+        print(f"[INFO] Peticiones bloqueadas: {resumen['red']['bloqueadas']} "
+              f"({resumen['red']['porcentaje_bloqueado']}% del total)")
+    if resumen['sesiones']:
+        print(f"[INFO] Sesiones guardadas: {resumen['sesiones']['sesiones']}/{resumen['sesiones']['tamano_pool']} "
+              f"({resumen['sesiones']['retiradas']} retiradas)")
+
+    stats_salida = escritor.estadisticas()
+    print(f"[INFO] Salida {stats_salida['formato']}: {stats_salida['filas_escritas']} filas en "
+          f"{stats_salida['volcados']} volcados ({stats_salida['errores']} volcados fallidos)")
+
+    if archivo_csv_final:
+        if guardar_stats_csv(resultados_data, archivo_csv_final):
+            print(f"[OK] Archivo CSV final (backup): {archivo_csv_final}")
+    print(f"[OK] Datos guardados en: {archivo_csv_incremental}")
+
+    resumen['conteo'] = conteo
+    resumen['salida'] = stats_salida
+    return resumen
+
+# =============================================================================
+# 6. CLI
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Scraper de perfiles de TikTok")
+    parser.add_argument("--estrategia", choices=sorted(ESTRATEGIAS), default='pool',
+                        help="secuencial (uno por uno), lotes (gather por lote) o pool (cola de trabajadores)")
+    parser.add_argument("--contextos", type=int, default=NUM_CONTEXTOS_DEFAULT, help="Contextos del pool")
+    parser.add_argument("--paginas", type=int, default=PAGINAS_POR_CONTEXTO_DEFAULT, help="Páginas por contexto")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE_DEFAULT, help="Perfiles por lote (estrategia lotes)")
+    parser.add_argument("--excel", default=ARCHIVO_EXCEL, help="Excel con la columna username")
+    parser.add_argument("--limite", type=int, default=None, help="Procesar solo los N primeros usuarios")
+    parser.add_argument("--salida", default=ARCHIVO_CSV_PROGRESIVO,
+                        help="Archivo incremental de salida (.csv, .jsonl o .parquet)")
+    parser.add_argument("--formato", choices=sorted(SUMIDEROS), default=None,
+                        help="Formato de salida (por defecto, según la extensión de --salida)")
+    parser.add_argument("--desde-cero", action="store_true",
+                        help="Ignora el checkpoint y borra el CSV de salida antes de empezar")
+    parser.add_argument("--sin-sesiones", action="store_true",
+                        help="Arranca los contextos en frío, sin el pool de sesiones guardadas")
+    args = parser.parse_args()
+
+    asyncio.run(ejecutar_scraping(
+        estrategia=args.estrategia,
+        reanudar=not args.desde_cero,
+        archivo_excel=args.excel,
+        limite=args.limite,
+        archivo_csv_incremental=args.salida,
+        num_contextos=args.contextos,
+        paginas_por_contexto=args.paginas,
+        tamano_lote=args.lote,
+        formato_salida=args.formato,
+        usar_sesiones=not args.sin_sesiones
+    ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# =============================================================================
+# CARNIVAL CRUISES - CACHE DE ANÁLISIS MULTIMEDIA
+# Resultados de OCR, transcripción y análisis visual indexados por el hash
+# del contenido del video y la versión del analizador
+# =============================================================================
+
+import os
+import hashlib
+import yaml
+from datetime import datetime
+
+# =============================================================================
+# 1. CONFIGURACIÓN
+# =============================================================================
+
+CACHE_DIR = "data/Output/analysis_cache"
+TAMANO_BLOQUE_HASH = 1024 * 1024  # Lectura por bloques de 1 MB
+
+# =============================================================================
+# 2. CLAVES DE CACHE
+# =============================================================================
+
+def calcular_hash_video(video_path, tamano_bloque=TAMANO_BLOQUE_HASH):
+    """Calcula el SHA-256 del contenido del video leyendo por bloques"""
+    sha = hashlib.sha256()
+    with open(video_path, 'rb') as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+def _ruta_entrada(video_hash, version, cache_dir):
+    """Ruta del archivo YAML para un hash y versión de analizador"""
+    return os.path.join(cache_dir, f"{video_hash}_v{version}.yml")
+
+# =============================================================================
+# 3. LECTURA Y ESCRITURA
+# =============================================================================
+
+def cargar_analisis_cacheado(video_hash, version, cache_dir=CACHE_DIR):
+    """
+    Busca un análisis multimedia previo para el video
+
+    Args:
+        video_hash (str): Hash del contenido del video
+        version (str): Versión del analizador multimedia
+        cache_dir (str): Directorio del cache
+
+    Returns:
+        dict: Entrada cacheada (textos_ocr, transcripcion, analisis_visual) o None
+    """
+    ruta = _ruta_entrada(video_hash, version, cache_dir)
+    if not os.path.exists(ruta):
+        return None
+
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            entrada = yaml.safe_load(f)
+        if not entrada or entrada.get('cache_metadata', {}).get('analyzer_version') != version:
+            return None
+        return entrada
+    except Exception as e:
+        print(f"        [WARNING]  Entrada de cache ilegible ({os.path.basename(ruta)}): {e}")
+        return None
+
+def guardar_analisis_cacheado(video_hash, version, video_id, textos_ocr, transcripcion,
+                              analisis_visual, cache_dir=CACHE_DIR):
+    """Guarda el análisis multimedia de un video (escritura atómica)"""
+    os.makedirs(cache_dir, exist_ok=True)
+    ruta = _ruta_entrada(video_hash, version, cache_dir)
+
+    entrada = {
+        'cache_metadata': {
+            'video_hash': video_hash,
+            'analyzer_version': version,
+            'video_id': video_id,
+            'created_at': datetime.now().isoformat()
+        },
+        'textos_ocr': textos_ocr,
+        'transcripcion': transcripcion,
+        'analisis_visual': analisis_visual
+    }
+
+    try:
+        ruta_temporal = f"{ruta}.tmp"
+        with open(ruta_temporal, 'w', encoding='utf-8') as f:
+            yaml.dump(entrada, f, default_flow_style=False, allow_unicode=True, indent=2)
+        os.replace(ruta_temporal, ruta)
+        return ruta
+    except Exception as e:
+        print(f"        [WARNING]  No se pudo guardar en cache: {e}")
+        return None
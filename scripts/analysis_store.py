@@ -0,0 +1,258 @@
+# =============================================================================
+# CARNIVAL CRUISES - ALMACÉN DE RESULTADOS DE ANÁLISIS
+# SQLite con los campos de puntuación promovidos a columnas indexadas y el
+# contexto consolidado (voluminoso) en una tabla aparte comprimida
+# =============================================================================
+
+import os
+import json
+import zlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# =============================================================================
+# 1. CONFIGURACIÓN Y ESQUEMA
+# =============================================================================
+
+DB_PATH_DEFAULT = "data/Output/carnival_analysis/analysis_results.db"
+
+# Valores permitidos por analysis_prompt.txt, de mejor a peor (el índice es el rango)
+TIPOS_CUENTA = [
+    "INDIVIDUAL_PERSON", "LOCAL_BUSINESS", "CORPORATE_BUSINESS", "CONTENT_CREATOR",
+    "HOME_BUSINESS", "EDUCATIONAL_MOTIVATIONAL", "ARTISTIC_ENTERTAINMENT",
+    "ORGANIZATION_INSTITUTION", "SUSPICIOUS_BOT", "ADULT_CONTENT", "INACTIVE", "OTHER"
+]
+VALORES_CARNIVAL = [
+    "Excellent_Prime_Target", "Very_Good_Strong_Prospect", "Good_Solid_Prospect",
+    "Fair_Potential_Value", "Poor_Limited_Interest", "Very_Poor_Not_Viable"
+]
+NIVELES_PRIORIDAD = [
+    "Priority_1_Immediate", "Priority_2_High", "Priority_3_Medium",
+    "Priority_4_Low", "Priority_5_Minimal"
+]
+NIVELES_CONFIANZA = ["High", "Medium", "Low"]
+
+RANGO_DESCONOCIDO = 99
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS analysis_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    analysis_date TEXT NOT NULL,
+    account_type_primary TEXT,
+    account_subtype TEXT,
+    confidence_level TEXT,
+    follower_tier TEXT,
+    overall_carnival_value TEXT,
+    carnival_value_rank INTEGER,
+    priority_level TEXT,
+    priority_rank INTEGER,
+    timeline_for_engagement TEXT,
+    analysis_confidence TEXT,
+    follower_count INTEGER,
+    is_verified INTEGER,
+    schema_valid INTEGER NOT NULL,
+    validation_errors TEXT,
+    result_file TEXT,
+    analysis_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_username ON analysis_results(username, analysis_date);
+CREATE INDEX IF NOT EXISTS idx_results_ranking ON analysis_results(carnival_value_rank, priority_rank);
+CREATE INDEX IF NOT EXISTS idx_results_account_type ON analysis_results(account_type_primary);
+CREATE TABLE IF NOT EXISTS analysis_context (
+    result_id INTEGER PRIMARY KEY REFERENCES analysis_results(id) ON DELETE CASCADE,
+    context_blob BLOB NOT NULL
+);
+"""
+
+# =============================================================================
+# 2. VALIDACIÓN
+# =============================================================================
+
+def _rango(valor, permitidos):
+    """Posición de valor en la lista de permitidos (RANGO_DESCONOCIDO si no está)"""
+    return permitidos.index(valor) if valor in permitidos else RANGO_DESCONOCIDO
+
+def validar_analisis(analisis):
+    """
+    Comprueba la estructura mínima que exige el prompt
+
+    Returns:
+        list: Errores encontrados (vacía si el análisis es válido)
+    """
+    if not isinstance(analisis, dict):
+        return ["el análisis no es un objeto JSON"]
+
+    errores = []
+    perfil = analisis.get('profile_analysis')
+    marketing = analisis.get('marketing_priority_assessment')
+
+    if not isinstance(perfil, dict):
+        errores.append("falta profile_analysis")
+    else:
+        if perfil.get('account_type_primary') not in TIPOS_CUENTA:
+            errores.append(f"account_type_primary inválido: {perfil.get('account_type_primary')!r}")
+        if 'confidence_level' in perfil and perfil['confidence_level'] not in NIVELES_CONFIANZA:
+            errores.append(f"confidence_level inválido: {perfil['confidence_level']!r}")
+
+    if not isinstance(marketing, dict):
+        errores.append("falta marketing_priority_assessment")
+    else:
+        if marketing.get('overall_carnival_value') not in VALORES_CARNIVAL:
+            errores.append(f"overall_carnival_value inválido: {marketing.get('overall_carnival_value')!r}")
+        if 'priority_level' in marketing and marketing['priority_level'] not in NIVELES_PRIORIDAD:
+            errores.append(f"priority_level inválido: {marketing['priority_level']!r}")
+
+    return errores
+
+def _entero(valor):
+    """Convierte contadores a int (None si no es posible)"""
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+# =============================================================================
+# 3. ALMACÉN
+# =============================================================================
+
+class AlmacenAnalisis:
+    """Resultados de análisis consultables por columnas (thread-safe)"""
+
+    def __init__(self, db_path=DB_PATH_DEFAULT):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(ESQUEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Conexión corta que confirma al salir sin error y siempre se cierra"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys=ON")
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def guardar(self, username, datos_consolidados, analisis, archivo_resultado=None):
+        """
+        Inserta un análisis con sus columnas de puntuación y el contexto comprimido
+
+        Returns:
+            int: id del resultado insertado
+        """
+        errores = validar_analisis(analisis)
+        analisis = analisis if isinstance(analisis, dict) else {}
+        perfil = analisis.get('profile_analysis') or {}
+        metricas = perfil.get('account_metrics') or {}
+        marketing = analisis.get('marketing_priority_assessment') or {}
+        calidad = analisis.get('data_quality_assessment') or {}
+        stats = datos_consolidados.get('profile_stats', {})
+        info = datos_consolidados.get('profile_basic_info', {})
+
+        fila = (
+            username,
+            datetime.now().isoformat(),
+            perfil.get('account_type_primary'),
+            perfil.get('account_subtype'),
+            perfil.get('confidence_level'),
+            metricas.get('follower_tier'),
+            marketing.get('overall_carnival_value'),
+            _rango(marketing.get('overall_carnival_value'), VALORES_CARNIVAL),
+            marketing.get('priority_level'),
+            _rango(marketing.get('priority_level'), NIVELES_PRIORIDAD),
+            marketing.get('timeline_for_engagement'),
+            calidad.get('analysis_confidence'),
+            _entero(stats.get('follower_count')),
+            1 if info.get('verified') else 0,
+            0 if errores else 1,
+            json.dumps(errores, ensure_ascii=False) if errores else None,
+            archivo_resultado,
+            json.dumps(analisis, ensure_ascii=False, default=str)
+        )
+        contexto = zlib.compress(json.dumps(datos_consolidados, ensure_ascii=False, default=str).encode('utf-8'))
+
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                """INSERT INTO analysis_results
+                   (username, analysis_date, account_type_primary, account_subtype, confidence_level,
+                    follower_tier, overall_carnival_value, carnival_value_rank, priority_level,
+                    priority_rank, timeline_for_engagement, analysis_confidence, follower_count,
+                    is_verified, schema_valid, validation_errors, result_file, analysis_json)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                fila
+            )
+            conn.execute("INSERT INTO analysis_context (result_id, context_blob) VALUES (?, ?)",
+                         (cursor.lastrowid, contexto))
+            return cursor.lastrowid
+
+    def ranking(self, limite=100, tipo_cuenta=None, solo_validos=True):
+        """
+        Último análisis de cada usuario ordenado por valor para Carnival y prioridad
+
+        Returns:
+            list: dicts con las columnas promovidas (sin el JSON completo)
+        """
+        condiciones = ["r.id = (SELECT MAX(id) FROM analysis_results WHERE username = r.username)"]
+        parametros = []
+        if tipo_cuenta:
+            condiciones.append("r.account_type_primary = ?")
+            parametros.append(tipo_cuenta)
+        if solo_validos:
+            condiciones.append("r.schema_valid = 1")
+        parametros.append(limite)
+
+        with self._connect() as conn:
+            filas = conn.execute(
+                f"""SELECT r.id, r.username, r.analysis_date, r.account_type_primary, r.account_subtype,
+                           r.overall_carnival_value, r.priority_level, r.timeline_for_engagement,
+                           r.follower_tier, r.follower_count, r.is_verified, r.result_file
+                    FROM analysis_results r
+                    WHERE {' AND '.join(condiciones)}
+                    ORDER BY r.carnival_value_rank, r.priority_rank, r.follower_count DESC
+                    LIMIT ?""",
+                parametros
+            ).fetchall()
+        return [dict(fila) for fila in filas]
+
+    def cargar_analisis(self, result_id):
+        """Análisis completo de la IA para un resultado"""
+        with self._connect() as conn:
+            fila = conn.execute("SELECT analysis_json FROM analysis_results WHERE id = ?", (result_id,)).fetchone()
+        return json.loads(fila['analysis_json']) if fila else None
+
+    def cargar_contexto(self, result_id):
+        """Datos consolidados de entrada guardados con un resultado"""
+        with self._connect() as conn:
+            fila = conn.execute("SELECT context_blob FROM analysis_context WHERE result_id = ?", (result_id,)).fetchone()
+        return json.loads(zlib.decompress(fila['context_blob']).decode('utf-8')) if fila else None
+
+_almacen_default = None
+_almacen_lock = threading.Lock()
+
+def obtener_almacen():
+    """Almacén compartido del proceso"""
+    global _almacen_default
+    with _almacen_lock:
+        if _almacen_default is None:
+            _almacen_default = AlmacenAnalisis()
+        return _almacen_default
+
+# =============================================================================
+# 4. CONSULTA DESDE CONSOLA
+# =============================================================================
+
+if __name__ == "__main__":
+    print("[CHART] RANKING DE CUENTAS ANALIZADAS")
+    print("=" * 65)
+    for posicion, fila in enumerate(obtener_almacen().ranking(limite=25), start=1):
+        print(f"{posicion:>3}. @{fila['username']:<25} {fila['overall_carnival_value'] or '-':<27} "
+              f"{fila['priority_level'] or '-':<22} {fila['account_type_primary'] or '-'}")
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BATCH JOBS - Offline batch submission for chat-completion requests
+==================================================================
+Writes chat-completion requests to a JSONL file, submits it through a
+pluggable provider (OpenAI Batch API), polls until the job finishes and
+reads the per-request results back by custom_id.
+
+Version: 1.0
+Author: Carnival Cruises TikTok Analyzer Team
+"""
+
+import os
+import json
+import time
+import yaml
+import requests
+from datetime import datetime
+
+# =============================================================================
+# 1. CONFIGURATION
+# =============================================================================
+
+DEFAULT_BATCH_DIR = "data/Output/batch_jobs"
+CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+DEFAULT_POLL_INTERVAL = 60
+DEFAULT_COMPLETION_WINDOW = "24h"
+
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# =============================================================================
+# 2. JSONL INPUT / OUTPUT
+# =============================================================================
+
+def write_batch_input(batch_requests, path):
+    """
+    Write the batch input file (one chat-completion request per line)
+
+    Args:
+        batch_requests (list): (custom_id, request_body) tuples
+        path (str): Destination JSONL path
+
+    Returns:
+        str: Path written
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        for custom_id, body in batch_requests:
+            line = {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": CHAT_COMPLETIONS_ENDPOINT,
+                "body": body
+            }
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+    os.replace(temp_path, path)
+    return path
+
+def read_batch_output(path):
+    """
+    Read a batch output file
+
+    Returns:
+        dict: custom_id -> message content (None for failed requests)
+    """
+    results = {}
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            custom_id = entry.get("custom_id")
+            response = entry.get("response") or {}
+            content = None
+
+            if not entry.get("error") and response.get("status_code") == 200:
+                try:
+                    content = response["body"]["choices"][0]["message"]["content"].strip()
+                except (KeyError, IndexError, TypeError, AttributeError):
+                    content = None
+
+            results[custom_id] = content
+
+    return results
+
+def save_job_manifest(manifest, batch_dir=DEFAULT_BATCH_DIR):
+    """Persist job metadata so an interrupted run can resume polling"""
+    os.makedirs(batch_dir, exist_ok=True)
+    path = os.path.join(batch_dir, f"{manifest['job_name']}_job.yml")
+    manifest['updated_at'] = datetime.now().isoformat()
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        yaml.dump(manifest, f, default_flow_style=False, allow_unicode=True, indent=2)
+    os.replace(temp_path, path)
+    return path
+
+def find_pending_job(provider_name, batch_dir=DEFAULT_BATCH_DIR):
+    """Return the most recent manifest for provider_name that was never ingested, or None"""
+    if not os.path.isdir(batch_dir):
+        return None
+
+    manifests = sorted(name for name in os.listdir(batch_dir) if name.endswith("_job.yml"))
+    for name in reversed(manifests):
+        with open(os.path.join(batch_dir, name), 'r', encoding='utf-8') as f:
+            manifest = yaml.safe_load(f) or {}
+        if manifest.get('provider') == provider_name and manifest.get('state') == 'submitted':
+            return manifest
+    return None
+
+# =============================================================================
+# 3. PROVIDERS
+# =============================================================================
+
+class BatchProvider:
+    """Interface for batch providers"""
+
+    name = "base"
+    # False for providers whose answers must not reach the shared response cache
+    cacheable = True
+
+    def submit(self, input_path):
+        """Submit an input JSONL file and return the job id"""
+        raise NotImplementedError
+
+    def get_status(self, job_id):
+        """Return a dict with at least 'status' (see TERMINAL_STATUSES)"""
+        raise NotImplementedError
+
+    def download_results(self, job_id, output_path):
+        """Write the job output JSONL to output_path and return it"""
+        raise NotImplementedError
+
+class OpenAIBatchProvider(BatchProvider):
+    """OpenAI Batch API (files upload + /v1/batches)"""
+
+    name = "openai"
+
+    def __init__(self, api_key, base_url="https://api.openai.com/v1",
+                 completion_window=DEFAULT_COMPLETION_WINDOW, timeout=120):
+        self.base_url = base_url.rstrip('/')
+        self.completion_window = completion_window
+        self.timeout = timeout
+        self.headers = {'Authorization': f'Bearer {api_key}'}
+
+    def submit(self, input_path):
+        with open(input_path, 'rb') as f:
+            upload = requests.post(
+                f"{self.base_url}/files",
+                headers=self.headers,
+                data={"purpose": "batch"},
+                files={"file": (os.path.basename(input_path), f)},
+                timeout=self.timeout
+            )
+        upload.raise_for_status()
+
+        batch = requests.post(
+            f"{self.base_url}/batches",
+            headers=self.headers,
+            json={
+                "input_file_id": upload.json()["id"],
+                "endpoint": CHAT_COMPLETIONS_ENDPOINT,
+                "completion_window": self.completion_window
+            },
+            timeout=self.timeout
+        )
+        batch.raise_for_status()
+        return batch.json()["id"]
+
+    def get_status(self, job_id):
+        response = requests.get(f"{self.base_url}/batches/{job_id}", headers=self.headers, timeout=self.timeout)
+        response.raise_for_status()
+        batch = response.json()
+        return {
+            "status": batch.get("status"),
+            "output_file_id": batch.get("output_file_id"),
+            "error_file_id": batch.get("error_file_id"),
+            "request_counts": batch.get("request_counts", {})
+        }
+
+    def download_results(self, job_id, output_path):
+        status = self.get_status(job_id)
+        lines = []
+
+        # Failed requests land in the error file; both share the output line format
+        for file_id in (status.get("output_file_id"), status.get("error_file_id")):
+            if not file_id:
+                continue
+            response = requests.get(f"{self.base_url}/files/{file_id}/content",
+                                    headers=self.headers, timeout=self.timeout)
+            response.raise_for_status()
+            lines.append(response.text.rstrip("\n"))
+
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(line for line in lines if line) + "\n")
+        return output_path
+
+# =============================================================================
+# 4. POLLING
+# =============================================================================
+
+def wait_for_batch(provider, job_id, poll_interval=DEFAULT_POLL_INTERVAL, timeout=None):
+    """
+    Poll a batch job until it reaches a terminal status
+
+    Returns:
+        dict: Last status reported by the provider (status 'timeout' if the
+        local wait expired; the job itself keeps running)
+    """
+    started = time.monotonic()
+
+    while True:
+        status = provider.get_status(job_id)
+        if status.get("status") in TERMINAL_STATUSES:
+            return status
+
+        if timeout is not None and time.monotonic() - started >= timeout:
+            return {"status": "timeout"}
+
+        counts = status.get("request_counts") or {}
+        progress = f" ({counts.get('completed', 0)}/{counts.get('total', '?')})" if counts else ""
+        print(f"   [WAIT] Batch {job_id}: {status.get('status')}{progress} - next check in {poll_interval}s")
+        time.sleep(poll_interval)
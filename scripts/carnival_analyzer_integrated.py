@@ -8,12 +8,21 @@ import os
 import yaml
 import json
 import time
+import asyncio
 import requests
 import traceback
 import urllib3
 import re
 from datetime import datetime
 from configparser import ConfigParser
+from analysis_store import obtener_almacen
+from pipeline_catalog import asegurar_catalogo, catalogo_completo
+from analysis_cache import calcular_hash_video, cargar_analisis_cacheado, guardar_analisis_cacheado
+from dify_async_client import (ClienteDifyAsync, MAX_CONCURRENTES_DEFAULT, PETICIONES_POR_MINUTO_DEFAULT,
+                               MODELO_DIFY, TEMPERATURA_DIFY)
+from llm_cache import LLMResponseCache, get_default_cache
+from streaming_json import quitar_comentarios_linea
+from prompt_budget import ajustar_datos_a_presupuesto, MAX_TOKENS_PROMPT_DEFAULT
 
 # Importaciones para análisis multimedia
 try:
@@ -23,6 +32,7 @@ try:
     from PIL import Image
     import numpy as np
     from moviepy.editor import VideoFileClip
+    from visual_features import muestrear_frames, extraer_features_visuales
     MULTIMEDIA_AVAILABLE = True
     print("[MOVIE] Módulos de análisis multimedia cargados exitosamente")
 except ImportError as e:
@@ -33,6 +43,12 @@ except ImportError as e:
 # Deshabilitar advertencias SSL
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# Versión del análisis multimedia (cambiarla invalida el cache de análisis)
+VERSION_ANALISIS_MULTIMEDIA = "2.0"
+
+# Versión del template de análisis (cambiarla invalida el cache de respuestas LLM)
+VERSION_TEMPLATE_PROMPT = "6.0"
+
 # =============================================================================
 # 1. CONFIGURACIÓN Y CARGA DE API KEYS
 # =============================================================================
@@ -55,7 +71,10 @@ def cargar_configuracion_dify():
         
         return {
             'api_key': api_key,
-            'api_url': config['company_api'].get('api_url', 'https://dify-api.factory.tools/service/api/v1/chat-messages')
+            'api_url': config['company_api'].get('api_url', 'https://dify-api.factory.tools/service/api/v1/chat-messages'),
+            'max_concurrent_requests': config['company_api'].getint('max_concurrent_requests', MAX_CONCURRENTES_DEFAULT),
+            'requests_per_minute': config['company_api'].getint('requests_per_minute', PETICIONES_POR_MINUTO_DEFAULT),
+            'max_prompt_tokens': config['company_api'].getint('max_prompt_tokens', MAX_TOKENS_PROMPT_DEFAULT)
         }
         
     except Exception as e:
@@ -67,62 +86,34 @@ def cargar_configuracion_dify():
 # =============================================================================
 
 def detectar_datos_disponibles():
-    """Detecta automáticamente archivos YAML generados por el pipeline"""
+    """Obtiene del catálogo del pipeline los archivos YAML de cada usuario"""
     
-    rutas_datos = {
-        'user_info': 'data/Output/user_info',
-        'videos_info': 'data/Output/videos_info', 
-        'video_details': 'data/Output/video_details',
-        'media_results': 'data/Output/media'
-    }
+    print(f"[SEARCH] Detectando datos disponibles del pipeline...")
     
-    usuarios_encontrados = {}
+    # Datos generados antes de que existiera el catálogo: se registran una sola vez
+    registrados = asegurar_catalogo()
+    if registrados:
+        print(f"   [REFRESH] Catálogo inicializado desde data/Output ({registrados} artefactos)")
     
-    print(f"[SEARCH] Detectando datos disponibles del pipeline...")
+    usuarios_encontrados = {}
     
-    # Buscar archivos de información de usuario
-    if os.path.exists(rutas_datos['user_info']):
-        for archivo in os.listdir(rutas_datos['user_info']):
-            if archivo.endswith('_user_info.yml'):
-                username = archivo.replace('_user_info.yml', '')
-                usuarios_encontrados[username] = {
-                    'user_info_file': os.path.join(rutas_datos['user_info'], archivo),
-                    'videos_info_file': None,
-                    'video_details_file': None,
-                    'media_results_files': []
-                }
-                print(f"   [USER] Usuario encontrado: @{username}")
-    
-    # Buscar archivos de videos para cada usuario
-    if os.path.exists(rutas_datos['videos_info']):
-        for archivo in os.listdir(rutas_datos['videos_info']):
-            if archivo.endswith('_videos.yml'):
-                username = archivo.replace('_videos.yml', '')
-                if username in usuarios_encontrados:
-                    usuarios_encontrados[username]['videos_info_file'] = os.path.join(rutas_datos['videos_info'], archivo)
-                    print(f"      [VIDEO] Videos info: [OK]")
-    
-    # Buscar archivos de detalles de videos
-    if os.path.exists(rutas_datos['video_details']):
-        for archivo in os.listdir(rutas_datos['video_details']):
-            if archivo.endswith('.yml'):
-                # Los detalles no están por usuario específico, los asignamos a todos
-                for username in usuarios_encontrados:
-                    usuarios_encontrados[username]['video_details_file'] = os.path.join(rutas_datos['video_details'], archivo)
-                print(f"      [SEARCH] Video details: [OK]")
-                break
-    
-    # Buscar resultados de media descargada
-    if os.path.exists(rutas_datos['media_results']):
-        for item in os.listdir(rutas_datos['media_results']):
-            item_path = os.path.join(rutas_datos['media_results'], item)
-            if os.path.isdir(item_path):
-                # Buscar archivo de resultados en esta carpeta de usuario
-                for archivo in os.listdir(item_path):
-                    if archivo == 'media_download_results.yml':
-                        if item in usuarios_encontrados:
-                            usuarios_encontrados[item]['media_results_files'].append(os.path.join(item_path, archivo))
-                            print(f"      [PHONE] Media results: [OK]")
+    for username, artefactos in sorted(catalogo_completo().items()):
+        if 'user_info' not in artefactos:
+            continue
+        
+        usuarios_encontrados[username] = {
+            'user_info_file': artefactos['user_info'],
+            'videos_info_file': artefactos.get('videos_info'),
+            'video_details_file': artefactos.get('video_details'),
+            'media_results_files': [artefactos['media_results']] if 'media_results' in artefactos else []
+        }
+        print(f"   [USER] Usuario encontrado: @{username}")
+        if 'videos_info' in artefactos:
+            print(f"      [VIDEO] Videos info: [OK]")
+        if 'video_details' in artefactos:
+            print(f"      [SEARCH] Video details: [OK]")
+        if 'media_results' in artefactos:
+            print(f"      [PHONE] Media results: [OK]")
     
     print(f"   [CHART] Total usuarios con datos: {len(usuarios_encontrados)}")
     return usuarios_encontrados
@@ -191,8 +182,8 @@ def cargar_datos_usuario(usuario_data):
 # 3. ANÁLISIS MULTIMEDIA COMPLETO
 # =============================================================================
 
-def extraer_screenshots_video(video_path, video_id, output_dir, num_frames=5):
-    """Extrae screenshots en momentos clave del video"""
+def extraer_screenshots_video(video_path, video_id, output_dir, num_frames=5, errores=None):
+    """Extrae screenshots en momentos clave del video (los fallos se anotan en errores)"""
     if not MULTIMEDIA_AVAILABLE:
         return []
         
@@ -202,6 +193,7 @@ def extraer_screenshots_video(video_path, video_id, output_dir, num_frames=5):
         cap = cv2.VideoCapture(video_path)
         
         if not cap.isOpened():
+            _anotar_error(errores, "screenshots: no se pudo abrir el video")
             return []
         
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
@@ -241,11 +233,17 @@ def extraer_screenshots_video(video_path, video_id, output_dir, num_frames=5):
         
     except Exception as e:
         print(f"        [ERROR] Error extrayendo screenshots: {e}")
+        _anotar_error(errores, f"screenshots: {e}")
     
     return screenshots
 
-def extraer_texto_ocr(screenshots):
-    """Extrae texto de screenshots usando OCR"""
+def _anotar_error(errores, mensaje):
+    """Registra un fallo del análisis multimedia (si el llamador pidió la lista)"""
+    if errores is not None:
+        errores.append(mensaje)
+
+def extraer_texto_ocr(screenshots, errores=None):
+    """Extrae texto de screenshots usando OCR (los fallos se anotan en errores)"""
     if not MULTIMEDIA_AVAILABLE:
         return []
         
@@ -283,14 +281,16 @@ def extraer_texto_ocr(screenshots):
                 
             except Exception as e:
                 print(f"        [WARNING]  Error OCR frame {screenshot.get('frame_number', '?')}: {e}")
+                _anotar_error(errores, f"ocr frame {screenshot.get('frame_number', '?')}: {e}")
     
     except Exception as e:
         print(f"        [ERROR] Error inicializando OCR: {e}")
+        _anotar_error(errores, f"ocr: {e}")
     
     return textos_extraidos
 
-def extraer_transcripcion_audio(video_path, video_id, temp_dir):
-    """Extrae y transcribe el audio del video"""
+def extraer_transcripcion_audio(video_path, video_id, temp_dir, errores=None):
+    """Extrae y transcribe el audio del video (los fallos se anotan en errores)"""
     if not MULTIMEDIA_AVAILABLE:
         return ""
         
@@ -315,16 +315,18 @@ def extraer_transcripcion_audio(video_path, video_id, temp_dir):
                 with sr.AudioFile(audio_path) as source:
                     audio_data = r.record(source)
                     
+                    # Solo "sin habla reconocible" es un resultado; RequestError (red,
+                    # cuota) y el resto de fallos llegan al except exterior y se anotan
                     try:
                         # Intentar transcripción en español primero
                         transcripcion = r.recognize_google(audio_data, language='es-ES')
                         print(f"        [EMOJI] Transcripción (ES): {transcripcion[:50]}...")
-                    except:
+                    except sr.UnknownValueError:
                         try:
-                            # Si falla, intentar en inglés
+                            # Si no se entiende, intentar en inglés
                             transcripcion = r.recognize_google(audio_data, language='en-US')
                             print(f"        [EMOJI] Transcripción (EN): {transcripcion[:50]}...")
-                        except:
+                        except sr.UnknownValueError:
                             transcripcion = "No se pudo transcribir el audio"
                             print(f"        [WARNING]  No se pudo transcribir audio")
                 
@@ -338,11 +340,13 @@ def extraer_transcripcion_audio(video_path, video_id, temp_dir):
     except Exception as e:
         transcripcion = f"Error en transcripción: {str(e)}"
         print(f"        [ERROR] Error transcripción: {e}")
+        _anotar_error(errores, f"transcripción: {e}")
     
     return transcripcion
 
-def analizar_elementos_visuales(video_path):
-    """Analiza elementos visuales del video"""
+def analizar_elementos_visuales(video_path, errores=None):
+    """Analiza elementos visuales del video sobre un stack reducido de frames muestreados
+    (los fallos se anotan en errores)"""
     if not MULTIMEDIA_AVAILABLE:
         return {}
         
@@ -354,43 +358,20 @@ def analizar_elementos_visuales(video_path):
     }
     
     try:
-        cap = cv2.VideoCapture(video_path)
+        frames, timestamps, metadatos = muestrear_frames(video_path)
         
-        if cap.isOpened():
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            
-            elementos["duration_seconds"] = total_frames / fps if fps > 0 else 0
-            elementos["resolution"] = f"{width}x{height}"
-            
-            # Analizar frame del medio
-            cap.set(cv2.CAP_PROP_POS_FRAMES, total_frames // 2)
-            ret, frame = cap.read()
-            
-            if ret:
-                # Análisis de brillo
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                brightness = np.mean(gray)
-                
-                if brightness < 50:
-                    elementos["brightness_analysis"] = "dark"
-                elif brightness > 200:
-                    elementos["brightness_analysis"] = "bright"
-                else:
-                    elementos["brightness_analysis"] = "normal"
-                
-                # Análisis de color dominante
-                b, g, r = cv2.split(frame)
-                avg_colors = [np.mean(b), np.mean(g), np.mean(r)]
-                dominant_channel = ["blue", "green", "red"][np.argmax(avg_colors)]
-                elementos["color_analysis"] = f"dominant_{dominant_channel}"
+        fps = metadatos["fps"]
+        elementos["duration_seconds"] = metadatos["total_frames"] / fps if fps > 0 else 0
+        elementos["resolution"] = f"{metadatos['width']}x{metadatos['height']}"
         
-        cap.release()
+        if frames is not None:
+            # Brillo, color, cambios de escena y densidad de texto en una pasada
+            elementos.update(extraer_features_visuales(frames))
+            elementos["frame_timestamps"] = [round(t, 2) for t in timestamps]
         
     except Exception as e:
         print(f"        [ERROR] Error análisis visual: {e}")
+        _anotar_error(errores, f"análisis visual: {e}")
     
     return elementos
 
@@ -442,24 +423,43 @@ def procesar_medios_descargados(username, media_results):
         print(f"        [MOVIE] Procesando video {i+1}: {video_id}")
         
         try:
-            # 1. Extraer screenshots
-            screenshots = extraer_screenshots_video(video_path, video_id, screenshots_dir)
+            # 0. Consultar cache por hash de contenido
+            video_hash = calcular_hash_video(video_path)
+            cacheado = cargar_analisis_cacheado(video_hash, VERSION_ANALISIS_MULTIMEDIA)
             
-            # 2. OCR en screenshots
-            if screenshots:
-                textos_ocr = extraer_texto_ocr(screenshots)
-                resultados_multimedia['textos_ocr'].extend(textos_ocr)
+            if cacheado:
+                print(f"        [CACHE] Análisis reutilizado ({video_hash[:12]})")
+                textos_ocr = cacheado.get('textos_ocr', [])
+                transcripcion = cacheado.get('transcripcion', "")
+                elementos_visuales = cacheado.get('analisis_visual', {})
+            else:
+                errores = []
+                
+                # 1. Extraer screenshots
+                screenshots = extraer_screenshots_video(video_path, video_id, screenshots_dir, errores=errores)
+                
+                # 2. OCR en screenshots
+                textos_ocr = extraer_texto_ocr(screenshots, errores=errores) if screenshots else []
+                
+                # 3. Transcripción de audio
+                transcripcion = extraer_transcripcion_audio(video_path, video_id, temp_dir, errores=errores)
+                
+                # 4. Análisis visual
+                elementos_visuales = analizar_elementos_visuales(video_path, errores=errores)
+                
+                # Solo se cachean los análisis completos: un fallo puntual no debe quedar fijado
+                if errores:
+                    print(f"        [WARNING]  Análisis no cacheado ({len(errores)} fallos): {errores[0]}")
+                else:
+                    guardar_analisis_cacheado(video_hash, VERSION_ANALISIS_MULTIMEDIA, video_id,
+                                              textos_ocr, transcripcion, elementos_visuales)
             
-            # 3. Transcripción de audio
-            transcripcion = extraer_transcripcion_audio(video_path, video_id, temp_dir)
+            resultados_multimedia['textos_ocr'].extend(textos_ocr)
             if transcripcion and transcripcion != "El video no contiene audio":
                 resultados_multimedia['transcripciones'].append({
                     'video_id': video_id,
                     'transcripcion': transcripcion
                 })
-            
-            # 4. Análisis visual
-            elementos_visuales = analizar_elementos_visuales(video_path)
             resultados_multimedia['analisis_visual'][video_id] = elementos_visuales
             
             resultados_multimedia['total_procesados'] += 1
@@ -480,10 +480,34 @@ def procesar_medios_descargados(username, media_results):
 # 4. PREPARACIÓN DEL PROMPT PARA DIFY
 # =============================================================================
 
+# Prompt de respaldo simplificado (mismos placeholders que analysis_prompt.txt,
+# así pasa por el mismo presupuesto de tokens)
+PROMPT_RESPALDO = """
+Analiza este perfil de TikTok para Carnival Cruises y responde en formato JSON:
+
+**DATOS DEL PERFIL:**
+- URL: {url}
+- Usuario: {username}
+- Nombre: {display_name}
+- Bio: {bio}
+- Seguidores: {follower_count}
+- Siguiendo: {following_count}
+- Likes: {likes_count}
+- Verificado: {is_verified}
+- Privado: {is_private}
+- Descripciones de videos: {video_descriptions}
+- Hashtags: {common_hashtags}
+- Transcripciones: {video_transcriptions}
+- Textos OCR: {video_ocr_texts}
+- Análisis visual: {enhanced_video_analysis}
+
+Responde SOLO con JSON válido siguiendo la estructura especificada en el prompt original.
+"""
+
 def cargar_prompt_template():
     """Carga el template del prompt desde analysis_prompt.txt"""
     
-    prompt_file = 'data/Input/analysis_prompt.txt'
+    prompt_file = 'data/Input/prompts/analysis_prompt.txt'
     
     try:
         with open(prompt_file, 'r', encoding='utf-8') as f:
@@ -494,15 +518,8 @@ def cargar_prompt_template():
         
     except Exception as e:
         print(f"   [ERROR] Error cargando prompt: {e}")
-        # Prompt de respaldo simplificado
-        return """
-        Analiza este perfil de TikTok para Carnival Cruises y responde en formato JSON:
-        
-        **DATOS DEL PERFIL:**
-        {datos_completos}
-        
-        Responde SOLO con JSON válido siguiendo la estructura especificada en el prompt original.
-        """
+        print(f"   [WARNING]  Usando prompt de respaldo simplificado")
+        return PROMPT_RESPALDO
 
 def preparar_datos_para_prompt(datos_consolidados, username):
     """Prepara y estructura los datos para el prompt de análisis"""
@@ -583,161 +600,86 @@ def preparar_datos_para_prompt(datos_consolidados, username):
         datos_prompt['video_ocr_texts'] = []
         datos_prompt['enhanced_video_analysis'] = {}
     
-    # Eliminar hashtags duplicados
-    datos_prompt['common_hashtags'] = list(set(datos_prompt['common_hashtags']))
+    # Eliminar hashtags duplicados en orden de aparición (un prompt estable mantiene válido el cache)
+    datos_prompt['common_hashtags'] = list(dict.fromkeys(datos_prompt['common_hashtags']))
     
     return datos_prompt
 
-def crear_prompt_final(prompt_template, datos_prompt):
-    """Crea el prompt final reemplazando los placeholders"""
+def crear_prompt_final(prompt_template, datos_prompt, max_tokens=None):
+    """Crea el prompt final reemplazando los placeholders (acotado a max_tokens si se indica)"""
     
     try:
+        if max_tokens:
+            datos_prompt, informe = ajustar_datos_a_presupuesto(prompt_template, datos_prompt, max_tokens)
+            if informe['secciones']:
+                recortes = ", ".join(
+                    f"{campo} {datos['original']}→{datos['final']}"
+                    for campo, datos in informe['secciones'].items()
+                    if datos['final'] < datos['original']
+                )
+                print(f"   [MEMO] Prompt ajustado de {informe['tokens_originales']} a "
+                      f"~{informe['tokens_finales']} tokens (máx. {max_tokens}): {recortes}")
+            if informe['tokens_base'] > max_tokens:
+                print(f"   [WARNING]  El template ocupa {informe['tokens_base']} tokens y supera el máximo "
+                      f"configurado ({max_tokens}); sube max_prompt_tokens")
+        
         # Reemplazar placeholders en el template
         prompt_final = prompt_template.format(**datos_prompt)
         return prompt_final
         
     except KeyError as e:
-        print(f"   [WARNING]  Placeholder faltante en template: {e}")
-        # Crear prompt simplificado como fallback
-        return f"""
-        Analiza este perfil de TikTok para Carnival Cruises:
-        
-        **URL:** {datos_prompt.get('url', 'N/A')}
-        **Usuario:** {datos_prompt.get('username', 'N/A')}
-        **Datos completos:** {datos_prompt}
-        
-        Responde SOLO con JSON válido siguiendo la estructura del prompt original.
-        """
+        if prompt_template is PROMPT_RESPALDO:
+            raise
+        print(f"   [WARNING]  Placeholder faltante en template: {e} - usando prompt de respaldo")
+        # El respaldo pasa por el mismo presupuesto en lugar de volcar todos los datos
+        return crear_prompt_final(PROMPT_RESPALDO, datos_prompt, max_tokens)
 
 # =============================================================================
 # 4. ANÁLISIS CON API DE DIFY
 # =============================================================================
 
-def analizar_con_dify(api_config, prompt_final, username):
-    """Envía el prompt al API de Dify y obtiene el análisis"""
+def buscar_respuesta_cacheada(prompt_final, username):
+    """Devuelve el análisis cacheado para un prompt idéntico, si existe"""
     
-    print(f"   🧠 Enviando análisis a Dify API para @{username}...")
-    print(f"      [EMOJI] Tamaño del prompt: {len(prompt_final)} caracteres")
+    clave = LLMResponseCache.make_key(MODELO_DIFY, prompt_final, TEMPERATURA_DIFY, VERSION_TEMPLATE_PROMPT)
+    cacheado = get_default_cache().get(clave)
     
-    headers = {
-        'Authorization': f'Bearer {api_config["api_key"]}',
-        'Content-Type': 'application/json'
-    }
+    if cacheado:
+        print(f"   [CACHE] Análisis reutilizado para @{username} (prompt sin cambios)")
     
-    payload = {
-        "model": "gpt-4",
-        "query": prompt_final,
-        "inputs": {},
-        "response_mode": "streaming",
-        "user": "carnival-cruise-analyzer-integrated",
-        "temperature": 0.1,
-        "frequency_penalty": 1
-    }
+    return cacheado
+
+def cachear_respuesta(prompt_final, resultado):
+    """Guarda el análisis en el cache LLM si se parseó correctamente"""
     
-    retry_count = 3
+    if not resultado or resultado.get('profile_analysis', {}).get('parsing_status') == 'failed':
+        return
     
-    while retry_count > 0:
-        try:
-            with requests.post(api_config['api_url'], json=payload, headers=headers, 
-                             verify=False, stream=True, timeout=180) as response:  # Más tiempo
-                
-                if response.status_code == 200:
-                    full_response = ""
-                    chunk_count = 0
-                    print(f"      [SATELLITE] Recibiendo respuesta", end="", flush=True)
-                    
-                    try:
-                        for line in response.iter_lines():
-                            if not line:
-                                continue
-                            
-                            chunk_count += 1
-                            if chunk_count % 10 == 0:  # Punto cada 10 chunks
-                                print(".", end="", flush=True)
-                            
-                            decoded_line = line.decode('utf-8')
-                            
-                            if decoded_line.startswith('data: '):
-                                data_str = decoded_line[6:]
-                                
-                                if data_str == "[DONE]":
-                                    print(" [DONE]")
-                                    break
-                                
-                                try:
-                                    data = json.loads(data_str)
-                                    
-                                    if "event" in data:
-                                        event_type = data.get("event")
-                                        
-                                        if event_type in ["message", "agent_message"]:
-                                            content = data.get("answer", "")
-                                            if content:
-                                                full_response += content
-                                        elif event_type == "message_end":
-                                            print(" [END]")
-                                            break
-                                        elif event_type == "error":
-                                            error_msg = data.get("message", "Error desconocido")
-                                            print(f" [ERROR: {error_msg}]")
-                                            return None
-                                
-                                except json.JSONDecodeError as e:
-                                    # Mostrar más info del error para debug
-                                    print(f"\n      [WARNING]  JSON decode error en chunk: {str(e)[:50]}")
-                                    print(f"      [PAGE] Chunk problemático: {data_str[:100]}...")
-                                    continue
-                        
-                        print(f"\n      [CHART] Respuesta recibida: {len(full_response)} caracteres, {chunk_count} chunks")
-                        
-                        if not full_response.strip():
-                            print(f"      [WARNING]  Respuesta vacía recibida")
-                            retry_count -= 1
-                            continue
-                        
-                        # Procesar la respuesta completa
-                        return procesar_respuesta_dify(full_response)
-                    
-                    except Exception as stream_error:
-                        print(f"\n      [ERROR] Error procesando stream: {stream_error}")
-                        retry_count -= 1
-                        continue
-                
-                elif response.status_code == 429:
-                    wait_time = int(response.headers.get("Retry-After", 15))
-                    print(f"      [WAIT] Rate limit - esperando {wait_time}s...")
-                    time.sleep(wait_time)
-                    retry_count -= 1
-                
-                elif response.status_code == 401:
-                    print(f"      [ERROR] Error de autorización - verifica API key")
-                    return None
-                
-                elif response.status_code == 400:
-                    print(f"      [ERROR] Error 400 - Request inválido")
-                    print(f"      [PAGE] Response: {response.text[:200]}")
-                    return None
-                
-                else:
-                    print(f"      [ERROR] Error HTTP {response.status_code}")
-                    print(f"      [PAGE] Response: {response.text[:200]}")
-                    retry_count -= 1
-        
-        except requests.exceptions.Timeout:
-            print(f"      ⏰ Timeout - reintentando...")
-            retry_count -= 1
-            time.sleep(5)
-        
-        except Exception as e:
-            print(f"      [ERROR] Error en petición: {e}")
-            retry_count -= 1
-            time.sleep(5)
+    clave = LLMResponseCache.make_key(MODELO_DIFY, prompt_final, TEMPERATURA_DIFY, VERSION_TEMPLATE_PROMPT)
+    get_default_cache().set(clave, resultado, model=MODELO_DIFY, template_version=VERSION_TEMPLATE_PROMPT)
+
+async def analizar_con_dify_async(cliente, prompt_final, username):
+    """Envía el prompt a Dify con un ClienteDifyAsync compartido y procesa el análisis"""
+    
+    cacheado = buscar_respuesta_cacheada(prompt_final, username)
+    if cacheado:
+        return cacheado
+    
+    respuesta = await cliente.obtener_respuesta(prompt_final, username)
     
-    print(f"      [BOOM] Falló después de todos los intentos")
-    return None
+    if respuesta is None:
+        return None
+    
+    resultado = procesar_respuesta_dify(respuesta['texto'], respuesta['json'])
+    cachear_respuesta(prompt_final, resultado)
+    return resultado
 
-def procesar_respuesta_dify(response_text):
-    """Procesa la respuesta de Dify y extrae el JSON"""
+def procesar_respuesta_dify(response_text, json_streaming=None):
+    """Procesa la respuesta de Dify y extrae el JSON (reutiliza el ya parseado en streaming)"""
+    
+    if isinstance(json_streaming, dict) and 'profile_analysis' in json_streaming:
+        print(f"      [OK] JSON validado durante el streaming ({len(response_text)} chars)")
+        return json_streaming
     
     try:
         print(f"      [SEARCH] Procesando respuesta completa ({len(response_text)} chars)")
@@ -797,7 +739,7 @@ def procesar_respuesta_dify(response_text):
                 
                 # Corregir problemas comunes de formato
                 cleaned = re.sub(r',(\s*[}\]])', r'\1', cleaned)  # Comas extra antes de } o ]
-                cleaned = re.sub(r'//.*?\n', '\n', cleaned)  # Comentarios de línea
+                cleaned = quitar_comentarios_linea(cleaned)  # Comentarios de línea (no las URLs)
                 cleaned = re.sub(r'/\*.*?\*/', '', cleaned, flags=re.DOTALL)  # Comentarios de bloque
                 
                 # Corregir caracteres de control problemáticos
@@ -865,7 +807,7 @@ def procesar_respuesta_dify(response_text):
 # =============================================================================
 
 def guardar_resultado_analisis(username, datos_consolidados, analisis_dify):
-    """Guarda el resultado final del análisis en YAML"""
+    """Guarda el resultado final del análisis en YAML y en el almacén SQLite consultable"""
     
     # Crear directorio de resultados
     resultados_dir = "data/Output/carnival_analysis"
@@ -904,14 +846,124 @@ def guardar_resultado_analisis(username, datos_consolidados, analisis_dify):
             yaml.dump(resultado_completo, f, default_flow_style=False, allow_unicode=True, indent=2)
         
         print(f"   [SAVE] Resultado guardado: {archivo_resultado}")
-        return archivo_resultado
         
     except Exception as e:
         print(f"   [ERROR] Error guardando resultado: {e}")
         return None
+    
+    # Columnas de puntuación + contexto comprimido para rankings sin recargar los YAML
+    try:
+        result_id = obtener_almacen().guardar(username, datos_consolidados, analisis_dify, archivo_resultado)
+        print(f"   [SAVE] Resultado indexado en el almacén de análisis (id {result_id})")
+    except Exception as e:
+        print(f"   [WARNING]  No se pudo indexar el resultado: {e}")
+    
+    return archivo_resultado
+
+# =============================================================================
+# 6. PROCESAMIENTO CONCURRENTE DE USUARIOS
+# =============================================================================
+
+def preparar_prompt_usuario(username, usuario_data, prompt_template, max_tokens_prompt=None):
+    """Carga los datos de un usuario y construye su prompt final"""
+    
+    print(f"\n[USER] PROCESANDO: @{username}")
+    print("-" * 50)
+    
+    # Cargar datos consolidados
+    datos_consolidados = cargar_datos_usuario(usuario_data)
+    
+    if not datos_consolidados:
+        print(f"   [ERROR] No se pudieron cargar datos para @{username}")
+        return None, None
+    
+    # Mostrar completitud de datos
+    completitud = datos_consolidados['data_completeness']
+    print(f"   [CHART] Completitud de datos:")
+    print(f"      [USER] User info: {'[OK]' if completitud['has_user_info'] else '[ERROR]'}")
+    print(f"      [VIDEO] Videos info: {'[OK]' if completitud['has_videos_info'] else '[ERROR]'}")
+    print(f"      [SEARCH] Video details: {'[OK]' if completitud['has_video_details'] else '[ERROR]'}")
+    print(f"      [PHONE] Media results: {'[OK]' if completitud['has_media_results'] else '[ERROR]'}")
+    
+    # Preparar datos para prompt
+    datos_prompt = preparar_datos_para_prompt(datos_consolidados, username)
+    prompt_final = crear_prompt_final(prompt_template, datos_prompt, max_tokens_prompt)
+    
+    return datos_consolidados, prompt_final
+
+async def analizar_y_guardar_usuario(cliente, username, datos_consolidados, prompt_final):
+    """Analiza un usuario con Dify y guarda el resultado"""
+    
+    analisis_result = await analizar_con_dify_async(cliente, prompt_final, username)
+    
+    if not analisis_result:
+        print(f"   [ERROR] [@{username}] Error en análisis con Dify")
+        return None
+    
+    # Guardar resultado (YAML + SQLite) en un hilo para no bloquear los análisis en vuelo
+    archivo_guardado = await asyncio.to_thread(
+        guardar_resultado_analisis, username, datos_consolidados, analisis_result
+    )
+    
+    if not archivo_guardado:
+        print(f"   [ERROR] [@{username}] Error guardando resultado")
+        return None
+    
+    # Mostrar resumen del análisis
+    profile_analysis = analisis_result.get('profile_analysis', {})
+    account_type = profile_analysis.get('account_type_primary', 'Unknown')
+    cruise_potential = analisis_result.get('marketing_priority_assessment', {}).get('overall_carnival_value', 'Unknown')
+    
+    print(f"   [TAG]  [@{username}] Tipo de cuenta: {account_type}")
+    print(f"   [TARGET] [@{username}] Potencial Carnival: {cruise_potential}")
+    print(f"   [OK] [@{username}] Análisis completado exitosamente")
+    
+    return {
+        'username': username,
+        'archivo': archivo_guardado,
+        'analisis': analisis_result
+    }
+
+async def analizar_usuarios_concurrente(api_config, usuarios_datos, prompt_template):
+    """
+    Prepara los prompts de forma secuencial y lanza cada análisis en cuanto
+    su prompt está listo, de modo que la latencia del LLM se solapa entre usuarios
+    """
+    
+    cliente = ClienteDifyAsync(
+        api_config,
+        max_concurrentes=api_config['max_concurrent_requests'],
+        peticiones_por_minuto=api_config['requests_per_minute']
+    )
+    tareas = []
+    
+    for username, usuario_data in usuarios_datos.items():
+        # La preparación (I/O y multimedia) corre en un hilo para no bloquear los análisis en vuelo
+        datos_consolidados, prompt_final = await asyncio.to_thread(
+            preparar_prompt_usuario, username, usuario_data, prompt_template,
+            api_config.get('max_prompt_tokens', MAX_TOKENS_PROMPT_DEFAULT)
+        )
+        
+        if prompt_final is None:
+            continue
+        
+        tareas.append((username, asyncio.create_task(
+            analizar_y_guardar_usuario(cliente, username, datos_consolidados, prompt_final)
+        )))
+    
+    # Una excepción inesperada de un usuario no cancela ni descarta los demás
+    resultados = await asyncio.gather(*[tarea for _, tarea in tareas], return_exceptions=True)
+    
+    completados = []
+    for (username, _), resultado in zip(tareas, resultados):
+        if isinstance(resultado, Exception):
+            print(f"   [ERROR] [@{username}] Error inesperado en el análisis: {resultado}")
+        elif resultado:
+            completados.append(resultado)
+    return completados
 
 # =============================================================================
-# 6. FUNCIÓN PRINCIPAL
+# 7. FUNCIÓN PRINCIPAL
 # =============================================================================
 
 def main():
@@ -945,59 +997,11 @@ def main():
         print(f"\n[CLIPBOARD] PASO 3: Preparación del prompt")
         prompt_template = cargar_prompt_template()
         
-        # 4. Procesar cada usuario
+        # 4. Procesar usuarios (análisis con Dify concurrente)
         print(f"\n[CLIPBOARD] PASO 4: Análisis de usuarios")
-        resultados_totales = []
-        
-        for username, usuario_data in usuarios_datos.items():
-            print(f"\n[USER] PROCESANDO: @{username}")
-            print("-" * 50)
-            
-            # Cargar datos consolidados
-            datos_consolidados = cargar_datos_usuario(usuario_data)
-            
-            if not datos_consolidados:
-                print(f"   [ERROR] No se pudieron cargar datos para @{username}")
-                continue
-            
-            # Mostrar completitud de datos
-            completitud = datos_consolidados['data_completeness']
-            print(f"   [CHART] Completitud de datos:")
-            print(f"      [USER] User info: {'[OK]' if completitud['has_user_info'] else '[ERROR]'}")
-            print(f"      [VIDEO] Videos info: {'[OK]' if completitud['has_videos_info'] else '[ERROR]'}")
-            print(f"      [SEARCH] Video details: {'[OK]' if completitud['has_video_details'] else '[ERROR]'}")
-            print(f"      [PHONE] Media results: {'[OK]' if completitud['has_media_results'] else '[ERROR]'}")
-            
-            # Preparar datos para prompt
-            datos_prompt = preparar_datos_para_prompt(datos_consolidados, username)
-            prompt_final = crear_prompt_final(prompt_template, datos_prompt)
-            
-            # Analizar con Dify
-            analisis_result = analizar_con_dify(api_config, prompt_final, username)
-            
-            if analisis_result:
-                # Guardar resultado
-                archivo_guardado = guardar_resultado_analisis(username, datos_consolidados, analisis_result)
-                
-                if archivo_guardado:
-                    resultados_totales.append({
-                        'username': username,
-                        'archivo': archivo_guardado,
-                        'analisis': analisis_result
-                    })
-                    
-                    # Mostrar resumen del análisis
-                    profile_analysis = analisis_result.get('profile_analysis', {})
-                    account_type = profile_analysis.get('account_type_primary', 'Unknown')
-                    cruise_potential = analisis_result.get('marketing_priority_assessment', {}).get('overall_carnival_value', 'Unknown')
-                    
-                    print(f"   [TAG]  Tipo de cuenta: {account_type}")
-                    print(f"   [TARGET] Potencial Carnival: {cruise_potential}")
-                    print(f"   [OK] Análisis completado exitosamente")
-                else:
-                    print(f"   [ERROR] Error guardando resultado")
-            else:
-                print(f"   [ERROR] Error en análisis con Dify")
+        print(f"   [ROCKET] Concurrencia: {api_config['max_concurrent_requests']} análisis en vuelo, "
+              f"{api_config['requests_per_minute']} peticiones/min")
+        resultados_totales = asyncio.run(analizar_usuarios_concurrente(api_config, usuarios_datos, prompt_template))
         
         # 5. Resumen final
         print(f"\n{'='*65}")
@@ -1021,7 +1025,7 @@ def main():
         traceback.print_exc()
 
 # =============================================================================
-# 7. PUNTO DE ENTRADA
+# 8. PUNTO DE ENTRADA
 # =============================================================================
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+# =============================================================================
+# CARNIVAL CRUISES - NORMALIZACIÓN VECTORIZADA DE CONTADORES
+# Convierte columnas de contadores abreviados ("1.2M", "45,3 mil", "12.345",
+# "No disponible") a Int64 en una sola pasada de pandas, conservando el
+# texto original en una columna <columna>_raw
+# =============================================================================
+
+import numpy as np
+import pandas as pd
+
+# =============================================================================
+# 1. CONFIGURACIÓN
+# =============================================================================
+
+COLUMNAS_CONTEO = ['followers_count', 'following_count', 'likes_count']
+SUFIJO_CRUDO = '_raw'
+
+# Sufijos en inglés y en español (TikTok abrevia según el idioma de la sesión)
+MULTIPLICADORES = {
+    'K': 1e3, 'MIL': 1e3,
+    'M': 1e6, 'MM': 1e6, 'MILL': 1e6, 'MILLON': 1e6, 'MILLONES': 1e6, 'MILLÓN': 1e6,
+    'B': 1e9, 'BN': 1e9
+}
+
+# Número (dígitos con separadores . , o espacio) + sufijo opcional
+_PATRON = r'^([0-9][0-9.,\s  ]*?)\s*(' + '|'.join(
+    sorted(MULTIPLICADORES, key=len, reverse=True)) + r')?\.?$'
+# Grupos de miles: 1.234 / 1,234,567 / 1 234 567
+_PATRON_MILES = r'^[0-9]{1,3}(?:[.,\s  ][0-9]{3})+$'
+
+# =============================================================================
+# 2. NORMALIZACIÓN
+# =============================================================================
+
+def normalizar_conteos(serie):
+    """
+    Convierte una serie de contadores a Int64 (nulo si no es un número)
+
+    Con sufijo (K/M/B, mil/M) la coma o el punto es el separador decimal
+    ("1,2M" == "1.2M"); sin sufijo, los grupos de tres dígitos separados por
+    punto, coma o espacio son miles ("12.345" == "12,345" == 12345).
+
+    Los textos se factorizan antes: el trabajo de cadenas se hace una vez
+    por valor distinto ("1.2M" se repite mucho) y se reparte con un take.
+
+    Args:
+        serie (pd.Series): Textos o números tal como los dejó el scraper
+
+    Returns:
+        pd.Series: Int64 con el mismo índice
+    """
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return serie.round().astype('Int64')
+
+    codigos, unicos = pd.factorize(serie.astype('string'), use_na_sentinel=True)
+    valores_unicos = _parsear_unicos(pd.Series(unicos, dtype=object).astype(str))
+
+    # Código -1 (nulo) -> NaN; el resto, el valor de su texto único
+    resultado = np.append(valores_unicos, np.nan)[codigos]
+    return pd.Series(resultado, index=serie.index).astype('Int64')
+
+def _parsear_unicos(texto):
+    """Valores (float, NaN si no es número) de una serie de textos distintos"""
+    texto = texto.str.strip().str.upper()
+
+    # Camino rápido: enteros sin formato (los contadores exactos de la hidratación)
+    solo_digitos = texto.str.isdecimal()
+    if solo_digitos.all():
+        return pd.to_numeric(texto).astype('float64').to_numpy()
+    valores = np.full(len(texto), np.nan)
+    valores[solo_digitos.to_numpy()] = pd.to_numeric(texto[solo_digitos]).astype('float64')
+    resto = ~solo_digitos.to_numpy()
+    valores[resto] = _parsear_formateados(texto[resto])
+    return valores
+
+def _parsear_formateados(texto):
+    """Textos con separadores, sufijos o sin número"""
+    partes = texto.str.extract(_PATRON)
+    numero, sufijo = partes[0].str.strip(), partes[1]
+
+    # Sin sufijo y con grupos de miles: se quitan todos los separadores
+    es_miles = sufijo.isna() & numero.str.fullmatch(_PATRON_MILES).fillna(False)
+    numero = numero.where(
+        ~es_miles,
+        numero.str.replace(r'[.,\s  ]', '', regex=True)
+    )
+
+    # Resto: un único separador decimal (coma o punto) y espacios fuera
+    numero = numero.str.replace(r'[\s  ]', '', regex=True).str.replace(',', '.', regex=False)
+    valores = pd.to_numeric(numero, errors='coerce')
+
+    multiplicador = sufijo.map(MULTIPLICADORES).astype('float64').fillna(1.0)
+    return np.round(valores.astype('float64') * multiplicador).to_numpy()
+
+def normalizar_columnas_conteo(df, columnas=COLUMNAS_CONTEO, sufijo_crudo=SUFIJO_CRUDO):
+    """
+    Normaliza las columnas de contadores de un DataFrame
+
+    Cada columna pasa a Int64 y su texto original queda en <columna>_raw.
+    Las columnas que no existan se ignoran.
+
+    Returns:
+        pd.DataFrame: Copia del DataFrame con las columnas normalizadas
+    """
+    df = df.copy()
+    for columna in columnas:
+        if columna not in df.columns:
+            continue
+        df[columna + sufijo_crudo] = df[columna].astype('string')
+        df[columna] = normalizar_conteos(df[columna])
+    return df
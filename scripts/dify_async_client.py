@@ -0,0 +1,215 @@
+# =============================================================================
+# CARNIVAL CRUISES - CLIENTE ASÍNCRONO DE DIFY
+# Varios análisis en vuelo con límite de concurrencia y de peticiones por
+# minuto; el stream SSE se procesa evento a evento
+# =============================================================================
+
+import json
+import time
+import asyncio
+import requests
+from rate_limiter import RateLimiter, backoff_delay
+from streaming_json import ParserJSONIncremental, RespuestaMalformada
+
+# =============================================================================
+# 1. CONFIGURACIÓN
+# =============================================================================
+
+MAX_CONCURRENTES_DEFAULT = 3
+PETICIONES_POR_MINUTO_DEFAULT = 20
+REINTENTOS_DEFAULT = 3
+TIMEOUT_DEFAULT = 180
+
+MODELO_DIFY = "gpt-4"
+TEMPERATURA_DIFY = 0.1
+
+# =============================================================================
+# 2. PAYLOAD Y PARSEO SSE
+# =============================================================================
+
+def construir_payload_dify(prompt_final):
+    """Construye el payload de chat-messages en modo streaming"""
+    return {
+        "model": MODELO_DIFY,
+        "query": prompt_final,
+        "inputs": {},
+        "response_mode": "streaming",
+        "user": "carnival-cruise-analyzer-integrated",
+        "temperature": TEMPERATURA_DIFY,
+        "frequency_penalty": 1
+    }
+
+def iterar_eventos_sse(lineas):
+    """
+    Genera los eventos JSON de un stream SSE a medida que llegan
+
+    Args:
+        lineas (iterable): Líneas del stream (bytes o str), p. ej. response.iter_lines()
+
+    Yields:
+        dict: Evento decodificado
+    """
+    for linea in lineas:
+        if not linea:
+            continue
+        if isinstance(linea, bytes):
+            linea = linea.decode('utf-8', errors='replace')
+        if not linea.startswith('data:'):
+            continue
+
+        data_str = linea[5:].strip()
+        if data_str == "[DONE]":
+            return
+
+        try:
+            yield json.loads(data_str)
+        except json.JSONDecodeError as e:
+            print(f"\n      [WARNING]  JSON decode error en chunk: {str(e)[:50]}")
+            print(f"      [PAGE] Chunk problemático: {data_str[:100]}...")
+
+def leer_respuesta_streaming(lineas, parser=None):
+    """
+    Consume el stream de Dify acumulando los fragmentos de respuesta
+
+    Con un ParserJSONIncremental la estructura se valida a medida que llega:
+    el stream se deja de leer en cuanto el objeto JSON se cierra y una
+    respuesta malformada lanza RespuestaMalformada sin esperar al final.
+
+    Returns:
+        tuple: (texto completo, mensaje de error o None)
+    """
+    fragmentos = []
+
+    for evento in iterar_eventos_sse(lineas):
+        tipo = evento.get("event")
+
+        if tipo in ("message", "agent_message"):
+            contenido = evento.get("answer", "")
+            if contenido:
+                fragmentos.append(contenido)
+                if parser is not None:
+                    parser.alimentar(contenido)
+                    if parser.completo:
+                        break
+        elif tipo == "message_end":
+            break
+        elif tipo == "error":
+            return None, evento.get("message", "Error desconocido")
+
+    return "".join(fragmentos), None
+
+def crear_parser_respuesta(username):
+    """Parser incremental que informa de cada campo de primer nivel al completarse"""
+    inicio = time.monotonic()
+
+    def al_completar_campo(clave, valor):
+        print(f"      [OK] [@{username}] Campo '{clave}' recibido ({time.monotonic() - inicio:.1f}s)")
+
+    return ParserJSONIncremental(al_completar_campo)
+
+# =============================================================================
+# 3. CLIENTE ASÍNCRONO
+# =============================================================================
+
+class ClienteDifyAsync:
+    """
+    Cliente de Dify que mantiene varios análisis en vuelo
+
+    Cada petición streaming corre en un hilo (requests) mientras el event loop
+    coordina la concurrencia, el rate limit y los reintentos.
+    """
+
+    def __init__(self, api_config, max_concurrentes=MAX_CONCURRENTES_DEFAULT,
+                 peticiones_por_minuto=PETICIONES_POR_MINUTO_DEFAULT,
+                 reintentos=REINTENTOS_DEFAULT, timeout=TIMEOUT_DEFAULT):
+        self.api_config = api_config
+        self.semaforo = asyncio.Semaphore(max_concurrentes)
+        self.limitador = RateLimiter(requests_per_minute=peticiones_por_minuto)
+        self.reintentos = reintentos
+        self.timeout = timeout
+        self.headers = {
+            'Authorization': f'Bearer {api_config["api_key"]}',
+            'Content-Type': 'application/json'
+        }
+
+    def _peticion_streaming(self, payload, username):
+        """Ejecuta una petición streaming completa (se llama desde un hilo)"""
+        with requests.post(self.api_config['api_url'], json=payload, headers=self.headers,
+                           verify=False, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 200:
+                parser = crear_parser_respuesta(username)
+                texto, error = leer_respuesta_streaming(response.iter_lines(), parser)
+                return {'status': 200, 'texto': texto, 'error': error, 'json': parser.resultado}
+
+            return {
+                'status': response.status_code,
+                'retry_after': response.headers.get("Retry-After"),
+                'detalle': response.text[:200]
+            }
+
+    async def obtener_respuesta(self, prompt_final, username):
+        """
+        Envía el prompt y devuelve el texto completo de la respuesta
+
+        Args:
+            prompt_final (str): Prompt ya construido
+            username (str): Usuario analizado (solo para logging)
+
+        Returns:
+            dict: 'texto' de la respuesta y 'json' ya parseado en streaming
+            (None si no se pudo), o None si falla
+        """
+        payload = construir_payload_dify(prompt_final)
+
+        async with self.semaforo:
+            print(f"   🧠 [@{username}] Enviando análisis a Dify ({len(prompt_final)} caracteres)")
+
+            for intento in range(self.reintentos):
+                await self.limitador.acquire_async()
+
+                try:
+                    resultado = await asyncio.to_thread(self._peticion_streaming, payload, username)
+                except RespuestaMalformada as e:
+                    print(f"      [WARNING]  [@{username}] Respuesta malformada, stream abortado: {e}")
+                    await asyncio.sleep(backoff_delay(intento))
+                    continue
+                except requests.exceptions.Timeout:
+                    print(f"      ⏰ [@{username}] Timeout - reintentando...")
+                    await asyncio.sleep(backoff_delay(intento))
+                    continue
+                except Exception as e:
+                    print(f"      [ERROR] [@{username}] Error en petición: {e}")
+                    await asyncio.sleep(backoff_delay(intento))
+                    continue
+
+                status = resultado['status']
+
+                if status == 200:
+                    if resultado['error']:
+                        print(f"      [ERROR] [@{username}] Error de Dify: {resultado['error']}")
+                        return None
+                    if not resultado['texto'].strip():
+                        print(f"      [WARNING]  [@{username}] Respuesta vacía recibida")
+                        await asyncio.sleep(backoff_delay(intento))
+                        continue
+                    print(f"      [CHART] [@{username}] Respuesta recibida: {len(resultado['texto'])} caracteres")
+                    return {'texto': resultado['texto'], 'json': resultado['json']}
+
+                if status == 429:
+                    espera = backoff_delay(intento, resultado['retry_after'], base=15)
+                    print(f"      [WAIT] [@{username}] Rate limit - esperando {espera:.0f}s...")
+                    await asyncio.sleep(espera)
+                elif status == 401:
+                    print(f"      [ERROR] Error de autorización - verifica API key")
+                    return None
+                elif status == 400:
+                    print(f"      [ERROR] [@{username}] Error 400 - Request inválido")
+                    print(f"      [PAGE] Response: {resultado['detalle']}")
+                    return None
+                else:
+                    print(f"      [ERROR] [@{username}] Error HTTP {status}")
+                    print(f"      [PAGE] Response: {resultado['detalle']}")
+                    await asyncio.sleep(backoff_delay(intento))
+
+        print(f"      [BOOM] [@{username}] Falló después de todos los intentos")
+        return None
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM RESPONSE CACHE - Shared prompt-level cache for Dify and ChatGPT calls
+========================================================================
+Responses are keyed by a hash of (model, prompt, temperature, template
+version) and stored in SQLite with a TTL and a size-bounded LRU eviction,
+so reruns over unchanged profiles skip the API entirely.
+
+Version: 1.0
+Author: Carnival Cruises TikTok Analyzer Team
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import contextmanager
+
+# =============================================================================
+# 1. CONFIGURATION
+# =============================================================================
+
+DEFAULT_DB_PATH = "data/Output/llm_cache/llm_responses.db"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600  # One week
+DEFAULT_MAX_ENTRIES = 5000
+
+# =============================================================================
+# 2. CACHE
+# =============================================================================
+
+class LLMResponseCache:
+    """SQLite-backed response cache with TTL and LRU eviction (thread-safe)"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    cache_key TEXT PRIMARY KEY,
+                    model TEXT,
+                    template_version TEXT,
+                    response_json TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_last_access ON llm_responses(last_access)")
+
+    @contextmanager
+    def _connect(self):
+        """Short-lived connection that commits on success and always closes"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(model, prompt, temperature, template_version):
+        """Stable hash of everything that determines the response"""
+        material = json.dumps([model, prompt, float(temperature), str(template_version)],
+                              ensure_ascii=False)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached response for key, or None if missing or expired"""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT response_json, created_at FROM llm_responses WHERE cache_key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            if now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (key,))
+                return None
+
+            conn.execute("UPDATE llm_responses SET last_access = ? WHERE cache_key = ?", (now, key))
+            return json.loads(row[0])
+
+    def set(self, key, response, model=None, template_version=None):
+        """Store a JSON-serialisable response and evict expired/least-recently-used entries"""
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO llm_responses
+                   (cache_key, model, template_version, response_json, created_at, last_access)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (key, model, template_version, json.dumps(response, ensure_ascii=False), now, now)
+            )
+            conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                """DELETE FROM llm_responses WHERE cache_key IN (
+                       SELECT cache_key FROM llm_responses
+                       ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,)
+            )
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_cache():
+    """Process-wide cache shared by the analyzer and the categorizer"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMResponseCache()
+        return _default_cache
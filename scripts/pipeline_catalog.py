@@ -0,0 +1,178 @@
+# =============================================================================
+# CARNIVAL CRUISES - CATÁLOGO DEL PIPELINE
+# Índice SQLite usuario → artefactos (user_info, videos_info, video_details,
+# media_results) que mantienen los propios scripts al escribir sus salidas
+# =============================================================================
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# =============================================================================
+# 1. CONFIGURACIÓN
+# =============================================================================
+
+CATALOGO_PATH = "data/Output/pipeline_catalog.db"
+OUTPUT_BASE_DIR = "data/Output"
+
+TIPOS_ARTEFACTO = ('user_info', 'videos_info', 'video_details', 'media_results')
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS artefactos (
+    username TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    ruta TEXT NOT NULL,
+    actualizado TEXT NOT NULL,
+    tamano INTEGER,
+    PRIMARY KEY (username, tipo)
+);
+CREATE INDEX IF NOT EXISTS idx_artefactos_tipo ON artefactos(tipo, username);
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT
+);
+"""
+
+_lock = threading.Lock()
+_inicializados = set()
+
+@contextmanager
+def _conectar(catalogo_path=CATALOGO_PATH):
+    """Conexión corta que confirma al salir sin error y siempre se cierra"""
+    if catalogo_path not in _inicializados:
+        os.makedirs(os.path.dirname(catalogo_path), exist_ok=True)
+
+    conn = sqlite3.connect(catalogo_path, timeout=30)
+    try:
+        with conn:
+            if catalogo_path not in _inicializados:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(ESQUEMA)
+                _inicializados.add(catalogo_path)
+            yield conn
+    finally:
+        conn.close()
+
+# =============================================================================
+# 2. REGISTRO (lo llaman los escritores de cada etapa)
+# =============================================================================
+
+def registrar_artefacto(username, tipo, ruta, catalogo_path=CATALOGO_PATH, reemplazar=True):
+    """
+    Registra (o actualiza) el artefacto de un usuario
+
+    Nunca interrumpe al escritor: un fallo del catálogo solo se avisa.
+    """
+    if tipo not in TIPOS_ARTEFACTO:
+        raise ValueError(f"Tipo de artefacto desconocido: {tipo}")
+
+    try:
+        tamano = os.path.getsize(ruta) if os.path.exists(ruta) else None
+        with _lock, _conectar(catalogo_path) as conn:
+            conn.execute(
+                f"""INSERT OR {'REPLACE' if reemplazar else 'IGNORE'} INTO artefactos
+                    (username, tipo, ruta, actualizado, tamano) VALUES (?, ?, ?, ?, ?)""",
+                (username, tipo, ruta, datetime.now().isoformat(), tamano)
+            )
+    except Exception as e:
+        print(f"   [WARNING]  No se pudo registrar {tipo} de @{username} en el catálogo: {e}")
+
+# =============================================================================
+# 3. CONSULTAS
+# =============================================================================
+
+def artefactos_usuario(username, catalogo_path=CATALOGO_PATH):
+    """
+    Artefactos registrados para un usuario
+
+    Returns:
+        dict: tipo -> {'ruta', 'actualizado'}
+    """
+    with _conectar(catalogo_path) as conn:
+        filas = conn.execute(
+            "SELECT tipo, ruta, actualizado FROM artefactos WHERE username = ?", (username,)
+        ).fetchall()
+    return {tipo: {'ruta': ruta, 'actualizado': actualizado} for tipo, ruta, actualizado in filas}
+
+def usuarios_con(tipo, catalogo_path=CATALOGO_PATH):
+    """Usuarios que tienen un artefacto del tipo indicado, con su ruta"""
+    with _conectar(catalogo_path) as conn:
+        filas = conn.execute(
+            "SELECT username, ruta FROM artefactos WHERE tipo = ? ORDER BY username", (tipo,)
+        ).fetchall()
+    return dict(filas)
+
+def catalogo_completo(catalogo_path=CATALOGO_PATH):
+    """
+    Todos los usuarios catalogados
+
+    Returns:
+        dict: username -> {tipo: ruta}
+    """
+    usuarios = {}
+    with _conectar(catalogo_path) as conn:
+        for username, tipo, ruta in conn.execute("SELECT username, tipo, ruta FROM artefactos"):
+            usuarios.setdefault(username, {})[tipo] = ruta
+    return usuarios
+
+# =============================================================================
+# 4. ARRANQUE DESDE SALIDAS EXISTENTES
+# =============================================================================
+
+def reconstruir_catalogo(base_dir=OUTPUT_BASE_DIR, catalogo_path=CATALOGO_PATH):
+    """
+    Registra las salidas que ya existen en disco (migración única para datos
+    generados antes de que los escritores mantuvieran el catálogo)
+
+    El antiguo video_details_batch.yml compartido no se asigna porque no
+    indica a qué usuario pertenece. Lo ya registrado por los escritores no
+    se sobrescribe.
+
+    Returns:
+        int: Artefactos registrados
+    """
+    registrados = 0
+    fuentes = [
+        ('user_info', os.path.join(base_dir, 'user_info'), '_user_info.yml'),
+        ('videos_info', os.path.join(base_dir, 'videos_info'), '_videos.yml'),
+        ('video_details', os.path.join(base_dir, 'video_details'), '_video_details.yml')
+    ]
+
+    for tipo, directorio, sufijo in fuentes:
+        if not os.path.isdir(directorio):
+            continue
+        for archivo in os.listdir(directorio):
+            if archivo.endswith(sufijo):
+                registrar_artefacto(archivo[:-len(sufijo)], tipo, os.path.join(directorio, archivo),
+                                    catalogo_path, reemplazar=False)
+                registrados += 1
+
+    media_dir = os.path.join(base_dir, 'media')
+    if os.path.isdir(media_dir):
+        for username in os.listdir(media_dir):
+            ruta = os.path.join(media_dir, username, 'media_download_results.yml')
+            if os.path.isfile(ruta):
+                registrar_artefacto(username, 'media_results', ruta, catalogo_path, reemplazar=False)
+                registrados += 1
+
+    return registrados
+
+def asegurar_catalogo(base_dir=OUTPUT_BASE_DIR, catalogo_path=CATALOGO_PATH):
+    """
+    Ejecuta reconstruir_catalogo una única vez por catálogo
+
+    Returns:
+        int: Artefactos registrados en la migración (0 si ya estaba hecha)
+    """
+    with _conectar(catalogo_path) as conn:
+        if conn.execute("SELECT 1 FROM meta WHERE clave = 'migrado'").fetchone():
+            return 0
+
+    registrados = reconstruir_catalogo(base_dir, catalogo_path)
+
+    with _lock, _conectar(catalogo_path) as conn:
+        conn.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('migrado', ?)",
+                     (datetime.now().isoformat(),))
+    return registrados
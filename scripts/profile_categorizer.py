@@ -15,10 +15,51 @@ import csv
 import json
 import yaml
 import pandas as pd
+import time
 import requests
 import traceback
 from datetime import datetime
 from configparser import ConfigParser
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from llm_cache import LLMResponseCache, get_default_cache
+from pipeline_catalog import artefactos_usuario
+from rate_limiter import RateLimiter, backoff_delay, estimate_tokens
+from batch_jobs import (
+    DEFAULT_BATCH_DIR, DEFAULT_POLL_INTERVAL, OpenAIBatchProvider,
+    write_batch_input, read_batch_output, save_job_manifest, find_pending_job, wait_for_batch
+)
+
+# Bump when the categorization template changes (invalidates cached responses)
+PROMPT_TEMPLATE_VERSION = "1.0"
+
+SYSTEM_MESSAGE = "You are an expert social media analyst. Respond only with valid JSON as requested."
+CHATGPT_TEMPERATURE = 0.3
+MAX_COMPLETION_TOKENS = 500
+
+# Concurrency and rate-limit defaults (overridable in the [openai] config section)
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_TOKENS_PER_MINUTE = 40000
+DEFAULT_MAX_RETRIES = 5
+
+# Batched mode: profiles per request (1 disables batching)
+DEFAULT_BATCH_SIZE = 1
+BATCH_TOKENS_PER_PROFILE = 150
+BATCH_MAX_COMPLETION_TOKENS = 4000
+
+# Offline mode: 'sync' (chat completions) or 'offline' (batch job submission)
+DEFAULT_MODE = 'sync'
+DEFAULT_BATCH_PROVIDER = 'openai'
+DEFAULT_BATCH_TIMEOUT_HOURS = 24
+
+CATEGORIZATION_FIELDS = [
+    'profile_category',
+    'category_reasoning',
+    'account_nature',
+    'content_focus',
+    'engagement_level',
+    'authenticity_assessment'
+]
 
 # =============================================================================
 # 1. CONFIGURATION AND API SETUP
@@ -40,10 +81,20 @@ def load_openai_config():
         masked_key = f"{api_key[:7]}...{api_key[-7:]}" if len(api_key) > 14 else "***masked***"
         print(f"   [OK] OpenAI API Key loaded: {masked_key}")
         
+        openai_section = config['openai']
         return {
             'api_key': api_key,
             'api_url': 'https://api.openai.com/v1/chat/completions',
-            'model': 'gpt-4'
+            'model': 'gpt-4',
+            'max_workers': openai_section.getint('max_workers', DEFAULT_MAX_WORKERS),
+            'requests_per_minute': openai_section.getint('requests_per_minute', DEFAULT_REQUESTS_PER_MINUTE),
+            'tokens_per_minute': openai_section.getint('tokens_per_minute', DEFAULT_TOKENS_PER_MINUTE),
+            'max_retries': openai_section.getint('max_retries', DEFAULT_MAX_RETRIES),
+            'batch_size': openai_section.getint('batch_size', DEFAULT_BATCH_SIZE),
+            'mode': openai_section.get('mode', DEFAULT_MODE),
+            'batch_provider': openai_section.get('batch_provider', DEFAULT_BATCH_PROVIDER),
+            'batch_poll_interval': openai_section.getint('batch_poll_interval', DEFAULT_POLL_INTERVAL),
+            'batch_timeout_hours': openai_section.getfloat('batch_timeout_hours', DEFAULT_BATCH_TIMEOUT_HOURS)
         }
         
     except Exception as e:
@@ -101,8 +152,11 @@ def load_user_data(username):
     }
     
     try:
+        # Indexed lookup in the pipeline catalog; conventional paths for uncatalogued users
+        artifacts = artefactos_usuario(username)
+        
         # 1. Load user basic info
-        user_info_file = f"data/Output/user_info/{username}_user_info.yml"
+        user_info_file = artifacts.get('user_info', {}).get('ruta', f"data/Output/user_info/{username}_user_info.yml")
         if os.path.exists(user_info_file):
             print(f"      [PAGE] Loading user info...")
             with open(user_info_file, 'r', encoding='utf-8') as f:
@@ -114,7 +168,7 @@ def load_user_data(username):
                 user_data['data_available']['user_info'] = True
         
         # 2. Load videos info
-        videos_info_file = f"data/Output/videos_info/{username}_videos.yml"
+        videos_info_file = artifacts.get('videos_info', {}).get('ruta', f"data/Output/videos_info/{username}_videos.yml")
         if os.path.exists(videos_info_file):
             print(f"      [VIDEO] Loading videos info...")
             with open(videos_info_file, 'r', encoding='utf-8') as f:
@@ -246,82 +300,598 @@ def save_prompt_to_file(prompt, username):
 # 4. CHATGPT API INTEGRATION
 # =============================================================================
 
-def categorize_with_chatgpt(api_config, prompt, username):
-    """Send prompt to ChatGPT API and get categorization"""
+def build_chat_messages(prompt):
+    """System + user messages for a categorization prompt"""
+    return [
+        {
+            "role": "system",
+            "content": SYSTEM_MESSAGE
+        },
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
+
+def build_chat_payload(api_config, messages, max_tokens=MAX_COMPLETION_TOKENS):
+    """Chat-completion request body (shared by the sync and offline modes)"""
+    return {
+        "model": api_config["model"],
+        "messages": messages,
+        "temperature": CHATGPT_TEMPERATURE,
+        "max_tokens": max_tokens
+    }
+
+def categorization_cache_key(api_config, prompt):
+    """Cache key for a single-profile categorization prompt"""
+    return LLMResponseCache.make_key(
+        api_config["model"], f"{SYSTEM_MESSAGE}\n\n{prompt}", CHATGPT_TEMPERATURE, PROMPT_TEMPLATE_VERSION
+    )
+
+def parse_categorization_content(content, username):
+    """
+    Parse the JSON categorization returned by the model
     
-    print(f"      [ROBOT] Sending to ChatGPT API...")
+    Returns:
+        tuple: (categorization dict, parsed_ok) - a parse_error placeholder when the JSON is invalid
+    """
+    try:
+        # Clean the response (remove potential markdown formatting)
+        if content.startswith('```json'):
+            content = content.replace('```json', '').replace('```', '').strip()
+        elif content.startswith('```'):
+            content = content.replace('```', '').strip()
+        
+        result_json = json.loads(content)
+        print(f"         [TARGET] @{username} category: {result_json.get('profile_category', 'Unknown')}")
+        return result_json, True
+        
+    except json.JSONDecodeError as e:
+        print(f"         [ERROR] JSON parse error: {e}")
+        print(f"         [PAGE] Raw response: {content[:200]}...")
+        return {
+            "profile_category": "parse_error",
+            "category_reasoning": "Failed to parse API response",
+            "account_nature": "unknown",
+            "content_focus": "unknown",
+            "engagement_level": "unknown",
+            "authenticity_assessment": "unknown",
+            "raw_response": content
+        }, False
+
+def post_chat_completion(api_config, messages, username, limiter=None, max_tokens=MAX_COMPLETION_TOKENS):
+    """
+    Send a chat-completion request with rate limiting and retries
+    
+    Retries 429, 5xx and network errors with exponential backoff, honouring
+    the Retry-After header when the API sends one.
     
+    Returns:
+        str: Message content, or None if every attempt failed
+    """
     headers = {
         'Authorization': f'Bearer {api_config["api_key"]}',
         'Content-Type': 'application/json'
     }
     
-    payload = {
-        "model": api_config["model"],
-        "messages": [
-            {
-                "role": "system",
-                "content": "You are an expert social media analyst. Respond only with valid JSON as requested."
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
-        "temperature": 0.3,
-        "max_tokens": 500
-    }
+    payload = build_chat_payload(api_config, messages, max_tokens)
     
-    try:
-        response = requests.post(
-            api_config['api_url'],
-            headers=headers,
-            json=payload,
-            timeout=60
-        )
+    max_retries = api_config.get('max_retries', DEFAULT_MAX_RETRIES)
+    estimated_tokens = sum(estimate_tokens(m['content']) for m in messages) + max_tokens
+    
+    for attempt in range(max_retries + 1):
+        if limiter:
+            limiter.acquire(estimated_tokens)
+        
+        try:
+            response = requests.post(
+                api_config['api_url'],
+                headers=headers,
+                json=payload,
+                timeout=60
+            )
+        except requests.exceptions.RequestException as e:
+            if attempt < max_retries:
+                delay = backoff_delay(attempt)
+                print(f"         [WAIT] @{username}: request error ({e}) - retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            print(f"         [ERROR] @{username}: request error: {e}")
+            return None
         
         if response.status_code == 200:
             result = response.json()
-            content = result['choices'][0]['message']['content'].strip()
+            return result['choices'][0]['message']['content'].strip()
+        
+        if response.status_code == 429 or response.status_code >= 500:
+            if attempt < max_retries:
+                delay = backoff_delay(attempt, response.headers.get('Retry-After'))
+                print(f"         [WAIT] @{username}: API {response.status_code} - retrying in {delay:.1f}s "
+                      f"(attempt {attempt + 1}/{max_retries})")
+                time.sleep(delay)
+                continue
+        
+        print(f"         [ERROR] @{username}: API error {response.status_code}: {response.text[:200]}")
+        return None
+    
+    return None
+
+def categorize_with_chatgpt(api_config, prompt, username, limiter=None):
+    """Send prompt to ChatGPT API and get categorization"""
+    
+    # Identical prompt + model + template version -> reuse the previous response
+    cache = get_default_cache()
+    cache_key = categorization_cache_key(api_config, prompt)
+    cached = cache.get(cache_key)
+    if cached:
+        print(f"      [CACHE] Reusing cached categorization for @{username}")
+        return cached
+    
+    print(f"      [ROBOT] Sending @{username} to ChatGPT API...")
+    
+    messages = build_chat_messages(prompt)
+    
+    try:
+        content = post_chat_completion(api_config, messages, username, limiter)
+        
+        if content is None:
+            return None
+        
+        print(f"         [OK] Response received for @{username} ({len(content)} chars)")
+        
+        result_json, parsed_ok = parse_categorization_content(content, username)
+        if parsed_ok:
+            cache.set(cache_key, result_json, model=api_config["model"], template_version=PROMPT_TEMPLATE_VERSION)
+        return result_json
             
-            print(f"         [OK] Response received ({len(content)} chars)")
+    except Exception as e:
+        print(f"         [ERROR] Request error: {e}")
+        return None
+
+# =============================================================================
+# 4B. CONCURRENT CATEGORIZATION ENGINE
+# =============================================================================
+
+def build_result_row(username, url, user_data, categorization, error=None):
+    """Build the CSV row for a categorized (or failed) user; user_data is None if it never loaded"""
+    
+    if user_data is None:
+        is_public_account = 'unknown'
+    else:
+        is_public_account = 'public' if not user_data.get('is_private', False) else 'private'
+    
+    if categorization:
+        return {
+            'platform': 'tiktok',
+            'username': username,
+            'url': url,
+            'is_public_account': is_public_account,
+            'category': categorization.get('profile_category', 'unknown'),
+            'category_reasoning': categorization.get('category_reasoning', 'N/A'),
+            'account_nature': categorization.get('account_nature', 'unknown'),
+            'content_focus': categorization.get('content_focus', 'unknown'),
+            'engagement_level': categorization.get('engagement_level', 'unknown'),
+            'authenticity_assessment': categorization.get('authenticity_assessment', 'unknown'),
+            'analysis_date': datetime.now().isoformat()
+        }
+    
+    return {
+        'platform': 'tiktok',
+        'username': username,
+        'url': url,
+        'is_public_account': is_public_account,
+        'category': 'categorization_failed',
+        'category_reasoning': f'Unexpected error: {error}' if error else 'ChatGPT API call failed',
+        'account_nature': 'unknown',
+        'content_focus': 'unknown',
+        'engagement_level': 'unknown',
+        'authenticity_assessment': 'unknown',
+        'analysis_date': datetime.now().isoformat()
+    }
+
+def build_no_data_row(username, url):
+    """Build the CSV row for a user without pipeline data"""
+    return {
+        'platform': 'tiktok',
+        'username': username,
+        'url': url,
+        'is_public_account': 'unknown',
+        'category': 'no_data_available',
+        'category_reasoning': 'User data not found in pipeline output',
+        'account_nature': 'unknown',
+        'content_focus': 'unknown',
+        'engagement_level': 'unknown',
+        'authenticity_assessment': 'unknown',
+        'analysis_date': datetime.now().isoformat()
+    }
+
+def categorize_user(api_config, user_info, prompt_template, limiter=None):
+    """Load, prompt and categorize a single user; always returns a CSV row"""
+    
+    username = user_info['username']
+    url = user_info['url']
+    
+    # Load user data
+    user_data = load_user_data(username)
+    
+    # Show data availability
+    user_available = user_data['data_available']['user_info']
+    videos_available = user_data['data_available']['videos_info']
+    print(f"      [CHART] @{username} data availability: User info: {'[OK]' if user_available else '[ERROR]'}, Videos: {'[OK]' if videos_available else '[ERROR]'}")
+    
+    if not user_available:
+        print(f"      [WARNING]  No user data available for @{username} - skipping categorization")
+        # Add basic result for missing data
+        return build_no_data_row(username, url)
+    
+    # Prepare prompt data
+    prompt_data = prepare_user_data_for_prompt(user_data)
+    final_prompt = create_final_prompt(prompt_template, prompt_data)
+    
+    # Save prompt to file
+    save_prompt_to_file(final_prompt, username)
+    
+    # Get categorization from ChatGPT
+    categorization = categorize_with_chatgpt(api_config, final_prompt, username, limiter)
+    
+    if categorization:
+        print(f"      [OK] Categorization completed for @{username}")
+    else:
+        print(f"      [ERROR] Failed to get categorization for @{username}")
+    
+    return build_result_row(username, url, user_data, categorization)
+
+def categorize_users_concurrently(api_config, users, prompt_template):
+    """
+    Categorize users with bounded parallelism under a shared rate limiter
+    
+    Results keep the order of the input list.
+    """
+    limiter = RateLimiter(
+        requests_per_minute=api_config.get('requests_per_minute', DEFAULT_REQUESTS_PER_MINUTE),
+        tokens_per_minute=api_config.get('tokens_per_minute', DEFAULT_TOKENS_PER_MINUTE)
+    )
+    max_workers = max(1, api_config.get('max_workers', DEFAULT_MAX_WORKERS))
+    results = [None] * len(users)
+    
+    print(f"   [ROCKET] Workers: {max_workers} | "
+          f"Budget: {limiter.requests_per_minute} req/min, {limiter.tokens_per_minute} tokens/min")
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(categorize_user, api_config, user_info, prompt_template, limiter): index
+            for index, user_info in enumerate(users)
+        }
+        
+        for completed, future in enumerate(as_completed(futures), 1):
+            index = futures[future]
+            user_info = users[index]
             
-            # Try to parse JSON response
             try:
-                # Clean the response (remove potential markdown formatting)
-                if content.startswith('```json'):
-                    content = content.replace('```json', '').replace('```', '').strip()
-                elif content.startswith('```'):
-                    content = content.replace('```', '').strip()
-                
-                result_json = json.loads(content)
-                print(f"         [TARGET] Category: {result_json.get('profile_category', 'Unknown')}")
-                return result_json
-                
-            except json.JSONDecodeError as e:
-                print(f"         [ERROR] JSON parse error: {e}")
-                print(f"         [PAGE] Raw response: {content[:200]}...")
-                return {
-                    "profile_category": "parse_error",
-                    "category_reasoning": "Failed to parse API response",
-                    "account_nature": "unknown",
-                    "content_focus": "unknown",
-                    "engagement_level": "unknown",
-                    "authenticity_assessment": "unknown",
-                    "raw_response": content
-                }
-        
-        elif response.status_code == 429:
-            print(f"         [WAIT] Rate limit hit - waiting...")
-            return None
+                results[index] = future.result()
+            except Exception as e:
+                print(f"      [ERROR] Unexpected error categorizing @{user_info['username']}: {e}")
+                results[index] = build_result_row(user_info['username'], user_info['url'], None, None, error=e)
+            
+            print(f"[USER] {completed}/{len(users)} done: @{user_info['username']} -> {results[index]['category']}")
+    
+    return results
+
+# =============================================================================
+# 4C. BATCHED CATEGORIZATION
+# =============================================================================
+
+def create_batch_categorization_prompt_template():
+    """Create the multi-profile categorization prompt (instructions sent once per batch)"""
+    
+    prompt_template = """You are an expert social media analyst specializing in TikTok profile categorization.
+Analyze each TikTok profile below independently and categorize it based on its content, behavior patterns and characteristics.
+
+**PROFILES ({profile_count}):**
+Each line: @username | display name | bio | followers | following | likes | videos | verified | private | recent video titles
+{profiles_block}
+
+**INSTRUCTIONS:**
+1. Analyze every profile on its own; do not mix information between profiles
+2. Create a specific, descriptive category for each account (no generic categories)
+3. Consider: content themes, engagement patterns, posting behavior, professional vs personal nature
+
+**RESPONSE FORMAT:**
+Respond with ONLY a JSON array containing exactly one object per profile, in this format:
+[
+    {{
+        "username": "username_without_at",
+        "profile_category": "your_specific_category_here",
+        "category_reasoning": "brief explanation of why this category fits",
+        "account_nature": "personal/business/creator/influencer/brand/organization",
+        "content_focus": "brief description of main content themes",
+        "engagement_level": "high/medium/low",
+        "authenticity_assessment": "authentic/commercial/mixed"
+    }}
+]
+
+**IMPORTANT:** Respond ONLY with the valid JSON array. No additional text outside the JSON."""
+
+    return prompt_template
+
+def summarize_profile_compact(user_data):
+    """One-line profile summary for batched prompts"""
+    
+    profile_info = user_data.get('profile_info', {})
+    profile_stats = user_data.get('profile_stats', {})
+    
+    bio = (profile_info.get('signature') or 'No bio').replace('\n', ' ')[:160]
+    titles = [
+        (video.get('title') or '').replace('\n', ' ')[:60]
+        for video in user_data.get('videos_data', [])[:3]
+        if video.get('title')
+    ]
+    
+    fields = [
+        f"@{user_data.get('username', 'N/A')}",
+        profile_info.get('nickname') or 'N/A',
+        bio,
+        format_count(profile_stats.get('follower_count', 0)),
+        format_count(profile_stats.get('following_count', 0)),
+        format_count(profile_stats.get('heart_count', 0)),
+        format_count(profile_stats.get('video_count', 0)),
+        'verified' if user_data.get('is_verified', False) else 'not verified',
+        'private' if user_data.get('is_private', False) else 'public',
+        ' / '.join(titles) if titles else 'no video data'
+    ]
+    return ' | '.join(str(field).replace('|', '/') for field in fields)
+
+def parse_batch_response(content, expected_usernames):
+    """
+    Parse and validate a batched response
+    
+    Returns:
+        dict: username -> categorization for every valid, expected entry
+    """
+    content = content.strip()
+    if content.startswith('```'):
+        content = content.replace('```json', '').replace('```', '').strip()
+    
+    try:
+        parsed = json.loads(content)
+    except json.JSONDecodeError as e:
+        print(f"         [ERROR] Batch JSON parse error: {e}")
+        return {}
+    
+    if isinstance(parsed, dict):
+        parsed = parsed.get('results', parsed.get('profiles', []))
+    if not isinstance(parsed, list):
+        return {}
+    
+    expected = {username.lower(): username for username in expected_usernames}
+    valid = {}
+    
+    for item in parsed:
+        if not isinstance(item, dict):
+            continue
+        username = expected.get(str(item.get('username', '')).lstrip('@').lower())
+        if username is None or username in valid:
+            continue
+        if not all(isinstance(item.get(field), str) and item.get(field) for field in CATEGORIZATION_FIELDS):
+            continue
+        valid[username] = {field: item[field] for field in CATEGORIZATION_FIELDS}
+    
+    return valid
+
+def batch_cache_key(api_config, summary):
+    """Per-profile cache key for batched mode (independent of batch composition)"""
+    return LLMResponseCache.make_key(
+        api_config["model"], summary, CHATGPT_TEMPERATURE, f"batch-{PROMPT_TEMPLATE_VERSION}"
+    )
+
+def categorize_batch_with_chatgpt(api_config, batch, limiter=None):
+    """
+    Categorize several profiles in one request, splitting on partial failures
+    
+    Args:
+        batch (list): (username, compact_summary) tuples
+    
+    Returns:
+        dict: username -> categorization (missing usernames failed even alone)
+    """
+    usernames = [username for username, _ in batch]
+    label = f"{usernames[0]} (+{len(batch) - 1} in batch)"
+    
+    prompt = create_batch_categorization_prompt_template().format(
+        profile_count=len(batch),
+        profiles_block='\n'.join(summary for _, summary in batch)
+    )
+    messages = [
+        {"role": "system", "content": SYSTEM_MESSAGE},
+        {"role": "user", "content": prompt}
+    ]
+    max_tokens = min(BATCH_MAX_COMPLETION_TOKENS, BATCH_TOKENS_PER_PROFILE * len(batch) + 100)
+    
+    print(f"      [ROBOT] Sending batch of {len(batch)} for @{label} to ChatGPT API...")
+    content = post_chat_completion(api_config, messages, label, limiter, max_tokens=max_tokens)
+    results = parse_batch_response(content, usernames) if content else {}
+    
+    missing = [(username, summary) for username, summary in batch if username not in results]
+    print(f"         [OK] @{label}: {len(results)}/{len(batch)} valid categorizations")
+    
+    if missing and len(batch) > 1:
+        # Retry only the missing profiles, halving the batch each time
+        middle = (len(missing) + 1) // 2
+        for half in (missing[:middle], missing[middle:]):
+            if half:
+                results.update(categorize_batch_with_chatgpt(api_config, half, limiter))
+    
+    return results
+
+def categorize_users_batched(api_config, users, batch_size):
+    """
+    Categorize users packing several compact profiles per request
+    
+    Cached profiles are answered without a request; the rest are grouped into
+    batches that run on the same bounded pool and rate limiter as the
+    per-profile mode.
+    """
+    limiter = RateLimiter(
+        requests_per_minute=api_config.get('requests_per_minute', DEFAULT_REQUESTS_PER_MINUTE),
+        tokens_per_minute=api_config.get('tokens_per_minute', DEFAULT_TOKENS_PER_MINUTE)
+    )
+    cache = get_default_cache()
+    
+    results = [None] * len(users)
+    user_data_by_index = {}
+    summaries = {}
+    categorizations = {}
+    pending = []
+    
+    for index, user_info in enumerate(users):
+        username = user_info['username']
+        user_data = load_user_data(username)
+        
+        if not user_data['data_available']['user_info']:
+            results[index] = build_no_data_row(username, user_info['url'])
+            continue
+        
+        user_data_by_index[index] = user_data
+        summaries[username] = summarize_profile_compact(user_data)
+        
+        cached = cache.get(batch_cache_key(api_config, summaries[username]))
+        if cached:
+            categorizations[username] = cached
+        else:
+            pending.append((username, summaries[username]))
+    
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    print(f"   [ROCKET] Batched mode: {len(pending)} profiles in {len(batches)} requests "
+          f"({len(categorizations)} from cache)")
+    
+    max_workers = max(1, api_config.get('max_workers', DEFAULT_MAX_WORKERS))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(categorize_batch_with_chatgpt, api_config, batch, limiter) for batch in batches]
+        
+        for future in as_completed(futures):
+            try:
+                batch_results = future.result()
+            except Exception as e:
+                print(f"      [ERROR] Unexpected batch error: {e}")
+                continue
             
+            for username, categorization in batch_results.items():
+                categorizations[username] = categorization
+                cache.set(batch_cache_key(api_config, summaries[username]), categorization,
+                          model=api_config["model"], template_version=f"batch-{PROMPT_TEMPLATE_VERSION}")
+    
+    for index, user_data in user_data_by_index.items():
+        user_info = users[index]
+        results[index] = build_result_row(
+            user_info['username'], user_info['url'], user_data, categorizations.get(user_info['username'])
+        )
+    
+    return results
+
+# =============================================================================
+# 4D. OFFLINE BATCH JOBS
+# =============================================================================
+
+def create_batch_provider(api_config):
+    """Instantiate the batch provider selected in the [openai] config section"""
+    provider_name = api_config.get('batch_provider', DEFAULT_BATCH_PROVIDER)
+    if provider_name != 'openai':
+        raise ValueError(f"Unknown batch_provider '{provider_name}' (supported: openai)")
+    return OpenAIBatchProvider(api_config['api_key'])
+
+def categorize_users_offline(api_config, users, prompt_template, provider=None, batch_dir=DEFAULT_BATCH_DIR):
+    """
+    Categorize users through an offline batch job
+    
+    Cached profiles are answered directly; the rest are written to a request
+    JSONL, submitted, polled until the job finishes and ingested into the
+    same rows as the synchronous mode. An unfinished job from a previous run
+    is resumed instead of submitted again.
+    """
+    provider = provider or create_batch_provider(api_config)
+    cache = get_default_cache()
+    
+    results = [None] * len(users)
+    pending = {}  # custom_id -> (index, user_data, prompt)
+    
+    for index, user_info in enumerate(users):
+        username = user_info['username']
+        user_data = load_user_data(username)
+        
+        if not user_data['data_available']['user_info']:
+            results[index] = build_no_data_row(username, user_info['url'])
+            continue
+        
+        prompt = create_final_prompt(prompt_template, prepare_user_data_for_prompt(user_data))
+        cached = cache.get(categorization_cache_key(api_config, prompt))
+        if cached:
+            results[index] = build_result_row(username, user_info['url'], user_data, cached)
+            continue
+        
+        pending[f"{index}-{username}"] = (index, user_data, prompt)
+    
+    print(f"   [ROCKET] Offline mode ({provider.name}): {len(pending)} requests, "
+          f"{sum(1 for r in results if r is not None)} resolved from cache or without data")
+    
+    if pending:
+        manifest = find_pending_job(provider.name, batch_dir)
+        if manifest and set(manifest.get('custom_ids', [])) == set(pending):
+            print(f"   [REFRESH] Resuming batch job {manifest['job_id']}")
         else:
-            print(f"         [ERROR] API error {response.status_code}: {response.text[:200]}")
-            return None
+            job_name = f"categorization_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            input_path = os.path.join(batch_dir, f"{job_name}_requests.jsonl")
+            write_batch_input(
+                [
+                    (custom_id, build_chat_payload(api_config, build_chat_messages(prompt)))
+                    for custom_id, (_, _, prompt) in pending.items()
+                ],
+                input_path
+            )
+            manifest = {
+                'job_name': job_name,
+                'provider': provider.name,
+                'job_id': provider.submit(input_path),
+                'input_path': input_path,
+                'custom_ids': list(pending),
+                'state': 'submitted',
+                'submitted_at': datetime.now().isoformat()
+            }
+            save_job_manifest(manifest, batch_dir)
+            print(f"   [OK] Batch job submitted: {manifest['job_id']} ({input_path})")
+        
+        status = wait_for_batch(
+            provider, manifest['job_id'],
+            poll_interval=api_config.get('batch_poll_interval', DEFAULT_POLL_INTERVAL),
+            timeout=api_config.get('batch_timeout_hours', DEFAULT_BATCH_TIMEOUT_HOURS) * 3600
+        )
+        print(f"   [CHART] Batch job {manifest['job_id']} finished with status: {status['status']}")
+        
+        contents = {}
+        if status['status'] in ('completed', 'expired', 'cancelled'):
+            # Expired/cancelled jobs still return the requests that did complete
+            output_path = os.path.join(batch_dir, f"{manifest['job_name']}_output.jsonl")
+            contents = read_batch_output(provider.download_results(manifest['job_id'], output_path))
+            manifest['state'] = 'ingested'
+            manifest['output_path'] = output_path
+        elif status['status'] == 'failed':
+            manifest['state'] = 'failed'
+        save_job_manifest(manifest, batch_dir)
+        
+        for custom_id, (index, user_data, prompt) in pending.items():
+            username = users[index]['username']
+            categorization = None
+            content = contents.get(custom_id)
             
-    except Exception as e:
-        print(f"         [ERROR] Request error: {e}")
-        return None
+            if content:
+                categorization, parsed_ok = parse_categorization_content(content, username)
+                # Stand-in answers must never leak into the shared response cache
+                if parsed_ok and provider.cacheable:
+                    cache.set(categorization_cache_key(api_config, prompt), categorization,
+                              model=api_config["model"], template_version=PROMPT_TEMPLATE_VERSION)
+            
+            results[index] = build_result_row(username, users[index]['url'], user_data, categorization)
+    
+    return results
 
 # =============================================================================
 # 5. CSV OUTPUT
@@ -397,87 +967,14 @@ def main():
         print(f"\n[CLIPBOARD] STEP 3: Creating categorization prompt template")
         prompt_template = create_categorization_prompt_template()
         
-        # 4. Process each user
+        # 4. Process users concurrently (one profile per request, batched, or offline job)
         print(f"\n[CLIPBOARD] STEP 4: Processing users")
-        results = []
-        
-        for i, user_info in enumerate(users, 1):
-            username = user_info['username']
-            url = user_info['url']
-            
-            print(f"\n[USER] PROCESSING {i}/{len(users)}: @{username}")
-            print("-" * 40)
-            
-            # Load user data
-            user_data = load_user_data(username)
-            
-            # Show data availability
-            user_available = user_data['data_available']['user_info']
-            videos_available = user_data['data_available']['videos_info']
-            print(f"      [CHART] Data availability: User info: {'[OK]' if user_available else '[ERROR]'}, Videos: {'[OK]' if videos_available else '[ERROR]'}")
-            
-            if not user_available:
-                print(f"      [WARNING]  No user data available - skipping categorization")
-                # Add basic result for missing data
-                results.append({
-                    'platform': 'tiktok',
-                    'username': username,
-                    'url': url,
-                    'is_public_account': 'unknown',
-                    'category': 'no_data_available',
-                    'category_reasoning': 'User data not found in pipeline output',
-                    'account_nature': 'unknown',
-                    'content_focus': 'unknown',
-                    'engagement_level': 'unknown',
-                    'authenticity_assessment': 'unknown',
-                    'analysis_date': datetime.now().isoformat()
-                })
-                continue
-            
-            # Prepare prompt data
-            prompt_data = prepare_user_data_for_prompt(user_data)
-            final_prompt = create_final_prompt(prompt_template, prompt_data)
-            
-            # Save prompt to file
-            save_prompt_to_file(final_prompt, username)
-            
-            # Get categorization from ChatGPT
-            categorization = categorize_with_chatgpt(api_config, final_prompt, username)
-            
-            if categorization:
-                # Prepare CSV result
-                result = {
-                    'platform': 'tiktok',
-                    'username': username,
-                    'url': url,
-                    'is_public_account': 'public' if not user_data.get('is_private', False) else 'private',
-                    'category': categorization.get('profile_category', 'unknown'),
-                    'category_reasoning': categorization.get('category_reasoning', 'N/A'),
-                    'account_nature': categorization.get('account_nature', 'unknown'),
-                    'content_focus': categorization.get('content_focus', 'unknown'),
-                    'engagement_level': categorization.get('engagement_level', 'unknown'),
-                    'authenticity_assessment': categorization.get('authenticity_assessment', 'unknown'),
-                    'analysis_date': datetime.now().isoformat()
-                }
-                
-                results.append(result)
-                print(f"      [OK] Categorization completed")
-            else:
-                print(f"      [ERROR] Failed to get categorization")
-                # Add failed result
-                results.append({
-                    'platform': 'tiktok',
-                    'username': username,
-                    'url': url,
-                    'is_public_account': 'public' if not user_data.get('is_private', False) else 'private',
-                    'category': 'categorization_failed',
-                    'category_reasoning': 'ChatGPT API call failed',
-                    'account_nature': 'unknown',
-                    'content_focus': 'unknown',
-                    'engagement_level': 'unknown',
-                    'authenticity_assessment': 'unknown',
-                    'analysis_date': datetime.now().isoformat()
-                })
+        if api_config.get('mode', DEFAULT_MODE) == 'offline':
+            results = categorize_users_offline(api_config, users, prompt_template)
+        elif api_config.get('batch_size', DEFAULT_BATCH_SIZE) > 1:
+            results = categorize_users_batched(api_config, users, api_config['batch_size'])
+        else:
+            results = categorize_users_concurrently(api_config, users, prompt_template)
         
         # 5. Save results to CSV
         print(f"\n[CLIPBOARD] STEP 5: Saving results")
@@ -0,0 +1,199 @@
+# =============================================================================
+# CARNIVAL CRUISES - PRESUPUESTO DE TOKENS DEL PROMPT
+# Ajusta las secciones variables del prompt de análisis (bio, videos, OCR,
+# transcripciones, análisis visual) a un máximo de tokens por prioridad
+# =============================================================================
+
+from rate_limiter import estimate_tokens
+
+# tiktoken es opcional: sin él se usa la estimación de ~4 caracteres por token
+try:
+    import tiktoken
+    _CODIFICADOR = tiktoken.get_encoding("cl100k_base")
+    TIKTOKEN_AVAILABLE = True
+except Exception:
+    _CODIFICADOR = None
+    TIKTOKEN_AVAILABLE = False
+
+# =============================================================================
+# 1. CONFIGURACIÓN
+# =============================================================================
+
+MAX_TOKENS_PROMPT_DEFAULT = 16000
+MAX_TOKENS_POR_ELEMENTO = 400   # Tope por transcripción/texto OCR individual
+MARCA_TRUNCADO = " [...]"
+
+# Peso de cada sección al repartir el presupuesto (mayor peso = más prioridad);
+# lo que una sección no usa se reparte entre las demás
+PESOS_SECCIONES = {
+    'bio': 5,
+    'video_descriptions': 25,
+    'video_transcriptions': 30,
+    'video_ocr_texts': 15,
+    'common_hashtags': 5,
+    'enhanced_video_analysis': 20
+}
+
+# Campos del análisis visual que son series por frame (lo primero que se descarta)
+CAMPOS_VISUALES_PESADOS = (
+    'brightness_per_frame', 'brightness_histogram', 'color_histogram',
+    'scene_change_scores', 'text_region_density_per_frame', 'frame_timestamps'
+)
+
+# =============================================================================
+# 2. MEDICIÓN Y TRUNCADO
+# =============================================================================
+
+def contar_tokens(texto):
+    """Tokens de un texto (exactos con tiktoken, estimados sin él)"""
+    texto = str(texto)
+    if _CODIFICADOR is not None:
+        return len(_CODIFICADOR.encode(texto, disallowed_special=()))
+    return estimate_tokens(texto)
+
+def truncar_a_tokens(texto, max_tokens):
+    """Recorta un texto para que no supere max_tokens"""
+    texto = str(texto)
+    if max_tokens <= 0:
+        return ""
+    if contar_tokens(texto) <= max_tokens:
+        return texto
+
+    if _CODIFICADOR is not None:
+        tokens = _CODIFICADOR.encode(texto, disallowed_special=())
+        return _CODIFICADOR.decode(tokens[:max_tokens]) + MARCA_TRUNCADO
+    return texto[:max_tokens * 4] + MARCA_TRUNCADO
+
+def _ajustar_lista(elementos, presupuesto):
+    """Conserva los elementos en orden (cada uno acotado) mientras quepan"""
+    resultado = []
+    usados = 2  # Corchetes de la representación de la lista
+
+    for i, elemento in enumerate(elementos):
+        restante = presupuesto - usados - 2
+        if restante <= 0:
+            break
+
+        # Margen para comillas, escapes y la marca de truncado
+        texto = truncar_a_tokens(elemento, min(MAX_TOKENS_POR_ELEMENTO, restante - 8))
+        coste = contar_tokens(repr(texto)) + 1
+        if usados + coste > presupuesto:
+            break
+
+        resultado.append(texto)
+        usados += coste
+
+    omitidos = len(elementos) - len(resultado)
+    if omitidos > 0:
+        resultado.append(f"({omitidos} más omitidos por límite de tokens)")
+    return resultado
+
+def _ajustar_analisis_visual(analisis, presupuesto):
+    """Reduce el análisis multimedia: primero series por frame, después videos"""
+    if contar_tokens(analisis) <= presupuesto:
+        return analisis
+
+    compacto = dict(analisis)
+    visual = {
+        video_id: {k: v for k, v in datos.items() if k not in CAMPOS_VISUALES_PESADOS}
+        for video_id, datos in (analisis.get('visual_analysis') or {}).items()
+    }
+    compacto['visual_analysis'] = visual
+
+    video_ids = list(visual)
+    while video_ids and contar_tokens(compacto) > presupuesto:
+        video_ids.pop()
+        compacto['visual_analysis'] = {video_id: visual[video_id] for video_id in video_ids}
+
+    if len(video_ids) < len(visual):
+        compacto['visual_videos_omitted'] = len(visual) - len(video_ids)
+
+    return compacto
+
+def _ajustar_seccion(valor, presupuesto):
+    """Ajusta una sección según su tipo"""
+    if isinstance(valor, list):
+        return _ajustar_lista(valor, presupuesto)
+    if isinstance(valor, dict):
+        return _ajustar_analisis_visual(valor, presupuesto)
+    return truncar_a_tokens(valor, presupuesto)
+
+# =============================================================================
+# 3. REPARTO DEL PRESUPUESTO
+# =============================================================================
+
+def _repartir_presupuesto(necesidades, disponible):
+    """
+    Reparte los tokens disponibles en proporción a los pesos; las secciones
+    que necesitan menos que su cuota reciben lo justo y el sobrante se
+    redistribuye entre el resto
+    """
+    asignacion = {}
+    pendientes = {campo: necesidad for campo, necesidad in necesidades.items()}
+    restante = max(0, disponible)
+
+    while pendientes:
+        peso_total = sum(PESOS_SECCIONES[campo] for campo in pendientes)
+        cuotas = {campo: restante * PESOS_SECCIONES[campo] / peso_total for campo in pendientes}
+        caben = [campo for campo, necesidad in pendientes.items() if necesidad <= cuotas[campo]]
+
+        if not caben:
+            for campo in pendientes:
+                asignacion[campo] = int(cuotas[campo])
+            break
+
+        for campo in caben:
+            asignacion[campo] = pendientes.pop(campo)
+            restante -= asignacion[campo]
+
+    return asignacion
+
+def ajustar_datos_a_presupuesto(prompt_template, datos_prompt, max_tokens=MAX_TOKENS_PROMPT_DEFAULT):
+    """
+    Ajusta las secciones variables de datos_prompt para que el prompt final
+    no supere max_tokens
+
+    Args:
+        prompt_template (str): Template con placeholders
+        datos_prompt (dict): Datos preparados para el prompt
+        max_tokens (int): Presupuesto total del prompt
+
+    Returns:
+        tuple: (datos ajustados, informe con tokens por sección)
+    """
+    secciones = [campo for campo in PESOS_SECCIONES if campo in datos_prompt]
+
+    # Coste fijo: template + campos escalares con las secciones variables vacías
+    datos_vacios = dict(datos_prompt)
+    for campo in secciones:
+        datos_vacios[campo] = type(datos_prompt[campo])() if isinstance(datos_prompt[campo], (list, dict)) else ""
+    tokens_base = contar_tokens(prompt_template.format(**datos_vacios))
+
+    necesidades = {campo: contar_tokens(datos_prompt[campo]) for campo in secciones}
+    tokens_originales = tokens_base + sum(necesidades.values())
+
+    informe = {
+        'max_tokens': max_tokens,
+        'tokens_base': tokens_base,
+        'tokens_originales': tokens_originales,
+        'contador': 'tiktoken' if TIKTOKEN_AVAILABLE else 'estimacion',
+        'secciones': {}
+    }
+
+    if tokens_originales <= max_tokens:
+        informe['tokens_finales'] = tokens_originales
+        return datos_prompt, informe
+
+    asignacion = _repartir_presupuesto(necesidades, max_tokens - tokens_base)
+    datos_ajustados = dict(datos_prompt)
+
+    for campo in secciones:
+        if necesidades[campo] > asignacion[campo]:
+            datos_ajustados[campo] = _ajustar_seccion(datos_prompt[campo], asignacion[campo])
+        informe['secciones'][campo] = {
+            'original': necesidades[campo],
+            'final': contar_tokens(datos_ajustados[campo])
+        }
+
+    informe['tokens_finales'] = tokens_base + sum(s['final'] for s in informe['secciones'].values())
+    return datos_ajustados, informe
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+RATE LIMITER - Shared request/token budgeting for LLM APIs
+==========================================================
+Sliding-window limiter for requests-per-minute and tokens-per-minute,
+usable from threads (acquire) and asyncio code (acquire_async), plus
+exponential backoff helpers that honour Retry-After headers.
+
+Version: 1.0
+Author: Carnival Cruises TikTok Analyzer Team
+"""
+
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# =============================================================================
+# 1. SLIDING-WINDOW LIMITER
+# =============================================================================
+
+class RateLimiter:
+    """Thread-safe sliding-window limiter for requests and tokens per period"""
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, period=60.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.period = period
+        self._events = deque()  # (timestamp, tokens)
+        self._tokens_in_window = 0
+        self._lock = threading.Lock()
+
+    def _purge(self, now):
+        """Drop events older than the window"""
+        while self._events and now - self._events[0][0] >= self.period:
+            _, tokens = self._events.popleft()
+            self._tokens_in_window -= tokens
+
+    def try_acquire(self, tokens=0):
+        """
+        Reserve capacity if available
+
+        Returns:
+            float: 0 if the reservation was made, otherwise seconds to wait
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._purge(now)
+
+            over_requests = (
+                self.requests_per_minute is not None
+                and len(self._events) >= self.requests_per_minute
+            )
+            # A single request larger than the whole budget is let through on an empty window
+            over_tokens = (
+                self.tokens_per_minute is not None
+                and self._events
+                and self._tokens_in_window + tokens > self.tokens_per_minute
+            )
+
+            if not over_requests and not over_tokens:
+                self._events.append((now, tokens))
+                self._tokens_in_window += tokens
+                return 0.0
+
+            return max(0.05, self._events[0][0] + self.period - now)
+
+    def acquire(self, tokens=0):
+        """Block the calling thread until capacity is available"""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=0):
+        """Wait (without blocking the event loop) until capacity is available"""
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0:
+                return
+            await asyncio.sleep(wait)
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token) for budgeting"""
+    return len(text) // 4 + 1
+
+# =============================================================================
+# 2. BACKOFF HELPERS
+# =============================================================================
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds, or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt, retry_after=None, base=2.0, cap=60.0):
+    """
+    Exponential backoff with full jitter; Retry-After takes precedence
+
+    Args:
+        attempt (int): Zero-based retry attempt
+        retry_after (str or float): Retry-After header value, if any
+        base (float): Base delay in seconds
+        cap (float): Maximum delay in seconds
+
+    Returns:
+        float: Seconds to wait before the next attempt
+    """
+    server_delay = parse_retry_after(retry_after)
+    if server_delay is not None:
+        return min(cap, server_delay) + random.uniform(0, 0.5)
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
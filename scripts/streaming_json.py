@@ -0,0 +1,313 @@
+# =============================================================================
+# CARNIVAL CRUISES - PARSER JSON INCREMENTAL
+# Valida la estructura del JSON de Dify mientras llegan los fragmentos del
+# stream, expone cada campo de primer nivel en cuanto se completa y permite
+# abortar pronto las respuestas malformadas
+# =============================================================================
+
+import re
+import json
+
+# =============================================================================
+# 1. CONFIGURACIÓN
+# =============================================================================
+
+MAX_PROSA_INICIAL = 4000   # Caracteres sin '{' antes de dar la respuesta por inválida
+MAX_RESINCRONIZACIONES = 5 # Arranques en falso tolerados antes del primer campo
+MAX_PROFUNDIDAD = 64
+
+PATRON_LITERAL = re.compile(r'^(true|false|null|-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?)$')
+CARACTERES_LITERAL = set('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789+-.')
+
+# Cadenas (se conservan) o comentarios // hasta fin de línea (se eliminan)
+PATRON_COMENTARIO_LINEA = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|//[^\n]*')
+
+# Distingue "no se pudo cargar" de un null válido
+FALLO_CARGA = object()
+
+class RespuestaMalformada(Exception):
+    """La respuesta en streaming no es un JSON recuperable"""
+
+# =============================================================================
+# 2. CARGA TOLERANTE DE FRAGMENTOS
+# =============================================================================
+
+def quitar_comentarios_linea(texto):
+    """Elimina los comentarios // fuera de las cadenas (las URLs se conservan)"""
+    return PATRON_COMENTARIO_LINEA.sub(lambda m: m.group(1) or '', texto)
+
+def cargar_json_tolerante(texto, por_defecto=None):
+    """json.loads con las mismas correcciones que procesar_respuesta_dify; por_defecto si falla"""
+    try:
+        return json.loads(texto)
+    except json.JSONDecodeError:
+        pass
+
+    limpio = quitar_comentarios_linea(texto)
+    limpio = re.sub(r',(\s*[}\]])', r'\1', limpio)
+    limpio = re.sub(r'/\*.*?\*/', '', limpio, flags=re.DOTALL)
+    limpio = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', limpio)
+    limpio = re.sub(r"'([^']+)':", r'"\1":', limpio)
+    limpio = re.sub(r":\s*'([^']*)'", r': "\1"', limpio)
+
+    try:
+        return json.loads(limpio)
+    except json.JSONDecodeError:
+        return por_defecto
+
+# =============================================================================
+# 3. PARSER INCREMENTAL
+# =============================================================================
+
+class ParserJSONIncremental:
+    """
+    Máquina de estados que consume el texto por fragmentos
+
+    Tolera lo mismo que la limpieza posterior (comas finales, comentarios,
+    comillas simples, prosa o bloques ``` antes del JSON). Cuando un campo
+    de primer nivel termina se carga y se notifica con al_completar_campo.
+
+    Atributos públicos:
+        campos (dict): Campos de primer nivel ya completos
+        completo (bool): El objeto raíz se cerró
+        resultado (dict): Objeto raíz cargado (None hasta que se cierra)
+        error (str): Motivo del fallo estructural, si lo hubo
+    """
+
+    def __init__(self, al_completar_campo=None):
+        self.al_completar_campo = al_completar_campo
+        self.campos = {}
+        self.completo = False
+        self.resultado = None
+        self.error = None
+
+        self._partes = []
+        self._posicion = 0
+        self._resincronizaciones = 0
+        self._reiniciar_estructura()
+
+    def _reiniciar_estructura(self):
+        """Vuelve al estado de búsqueda del objeto raíz"""
+        self._pila = []
+        self._esperando = 'inicio'
+        self._cadena = None          # Comilla de apertura si estamos dentro de un string
+        self._escape = False
+        self._literal = []
+        self._comentario = None      # None, 'inicio', 'linea', 'bloque', 'bloque_fin'
+        self._es_clave = False
+        self._clave_actual = []
+        self._clave_raiz = None
+        self._inicio_raiz = None
+        self._inicio_valor = None
+        self._prosa = 0
+
+    @property
+    def texto(self):
+        return "".join(self._partes)
+
+    # -------------------------------------------------------------------------
+    # Entrada
+    # -------------------------------------------------------------------------
+
+    def alimentar(self, fragmento):
+        """
+        Procesa un fragmento del stream
+
+        Raises:
+            RespuestaMalformada: Si la estructura ya no es recuperable
+        """
+        if self.completo or not fragmento:
+            return
+        self._partes.append(fragmento)
+
+        for caracter in fragmento:
+            self._procesar(caracter)
+            self._posicion += 1
+            if self.completo:
+                return
+            if self.error:
+                raise RespuestaMalformada(self.error)
+
+    def _fallar(self, motivo):
+        """Error estructural: resincroniza mientras no haya campos, si no aborta"""
+        if not self.campos and self._resincronizaciones < MAX_RESINCRONIZACIONES:
+            self._resincronizaciones += 1
+            self._reiniciar_estructura()
+            return
+        self.error = f"{motivo} (posición {self._posicion})"
+
+    # -------------------------------------------------------------------------
+    # Máquina de estados
+    # -------------------------------------------------------------------------
+
+    def _procesar(self, c):
+        if self._esperando == 'inicio':
+            if c == '{':
+                self._abrir_contenedor(c)
+                self._inicio_raiz = self._posicion
+            else:
+                self._prosa += 1
+                if self._prosa > MAX_PROSA_INICIAL:
+                    self.error = f"sin objeto JSON tras {MAX_PROSA_INICIAL} caracteres"
+            return
+
+        if self._cadena is not None:
+            self._procesar_cadena(c)
+            return
+
+        if self._comentario is not None:
+            self._procesar_comentario(c)
+            return
+
+        if self._literal:
+            if c in CARACTERES_LITERAL:
+                self._literal.append(c)
+                return
+            if not self._cerrar_literal():
+                return
+
+        if c in ' \t\r\n':
+            return
+        if c == '/':
+            self._comentario = 'inicio'
+            return
+
+        if self._esperando == 'valor':
+            self._procesar_valor(c)
+        elif self._esperando == 'clave':
+            if c in '"\'':
+                self._abrir_cadena(c, es_clave=True)
+            elif c == '}':
+                self._cerrar_contenedor(c)
+            else:
+                self._fallar(f"se esperaba una clave y llegó {c!r}")
+        elif self._esperando == 'dos_puntos':
+            if c == ':':
+                self._esperando = 'valor'
+                if len(self._pila) == 1:
+                    self._inicio_valor = self._posicion + 1
+            else:
+                self._fallar(f"se esperaba ':' y llegó {c!r}")
+        elif self._esperando == 'coma_o_cierre':
+            if c == ',':
+                self._esperando = 'clave' if self._pila[-1] == '{' else 'valor'
+            elif c in '}]':
+                self._cerrar_contenedor(c)
+            else:
+                self._fallar(f"se esperaba ',' o cierre y llegó {c!r}")
+
+    def _procesar_valor(self, c):
+        if c in '{[':
+            self._abrir_contenedor(c)
+        elif c in '"\'':
+            self._abrir_cadena(c, es_clave=False)
+        elif c == ']' and self._pila[-1] == '[':
+            # Array vacío o coma final
+            self._cerrar_contenedor(c)
+        elif c in CARACTERES_LITERAL:
+            self._literal.append(c)
+        else:
+            self._fallar(f"valor inesperado {c!r}")
+
+    def _procesar_cadena(self, c):
+        if self._escape:
+            self._escape = False
+        elif c == '\\':
+            self._escape = True
+        elif c == self._cadena:
+            self._cadena = None
+            if self._es_clave:
+                if len(self._pila) == 1:
+                    self._clave_raiz = "".join(self._clave_actual)
+                self._esperando = 'dos_puntos'
+            else:
+                self._valor_terminado()
+            return
+
+        if self._es_clave and len(self._pila) == 1:
+            self._clave_actual.append(c)
+
+    def _procesar_comentario(self, c):
+        if self._comentario == 'inicio':
+            if c == '/':
+                self._comentario = 'linea'
+            elif c == '*':
+                self._comentario = 'bloque'
+            else:
+                self._comentario = None
+                self._fallar("'/' fuera de un comentario")
+        elif self._comentario == 'linea':
+            if c == '\n':
+                self._comentario = None
+        elif self._comentario == 'bloque':
+            if c == '*':
+                self._comentario = 'bloque_fin'
+        elif self._comentario == 'bloque_fin':
+            self._comentario = None if c == '/' else ('bloque_fin' if c == '*' else 'bloque')
+
+    def _abrir_cadena(self, comilla, es_clave):
+        self._cadena = comilla
+        self._es_clave = es_clave
+        if es_clave:
+            self._clave_actual = []
+
+    def _abrir_contenedor(self, c):
+        if len(self._pila) >= MAX_PROFUNDIDAD:
+            self._fallar("profundidad máxima superada")
+            return
+        self._pila.append(c)
+        self._esperando = 'clave' if c == '{' else 'valor'
+
+    def _cerrar_contenedor(self, c):
+        apertura = self._pila.pop()
+        if (apertura, c) not in (('{', '}'), ('[', ']')):
+            self._fallar(f"cierre {c!r} no coincide con {apertura!r}")
+            return
+
+        if not self._pila:
+            self._cerrar_raiz()
+        else:
+            self._valor_terminado()
+
+    def _cerrar_literal(self):
+        literal = "".join(self._literal)
+        self._literal = []
+        if not PATRON_LITERAL.match(literal):
+            self._fallar(f"literal inválido {literal[:20]!r}")
+            return False
+        self._valor_terminado(fin=self._posicion)
+        return True
+
+    # -------------------------------------------------------------------------
+    # Campos completos
+    # -------------------------------------------------------------------------
+
+    def _valor_terminado(self, fin=None):
+        """Un valor terminó; si es de primer nivel se carga y se notifica"""
+        self._esperando = 'coma_o_cierre'
+
+        if len(self._pila) != 1 or self._inicio_valor is None or self._clave_raiz is None:
+            return
+
+        fin = self._posicion + 1 if fin is None else fin
+        fragmento = self.texto[self._inicio_valor:fin].strip()
+        clave = self._clave_raiz
+        self._inicio_valor = None
+        self._clave_raiz = None
+
+        valor = cargar_json_tolerante(fragmento, por_defecto=FALLO_CARGA)
+        if valor is FALLO_CARGA and fragmento.startswith("'"):
+            valor = fragmento.strip("'")
+        if valor is FALLO_CARGA:
+            return
+
+        self.campos[clave] = valor
+        if self.al_completar_campo:
+            self.al_completar_campo(clave, valor)
+
+    def _cerrar_raiz(self):
+        self.completo = True
+        self.resultado = cargar_json_tolerante(self.texto[self._inicio_raiz:self._posicion + 1])
+        if self.resultado is None and self.campos:
+            # Objeto reconstruido a partir de los campos ya cargados
+            self.resultado = dict(self.campos)
@@ -14,6 +14,16 @@ import pandas as pd
 from datetime import datetime
 from configparser import ConfigParser
 import traceback
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pipeline_catalog import registrar_artefacto
+from rate_limiter import RateLimiter
+from video_details_store import ruta_detalles_usuario, videos_con_detalle, fusionar_detalles_usuario
+from count_normalizer import normalizar_columnas_conteo, COLUMNAS_CONTEO
+
+# Detalles de videos: hilos por usuario y límite global compartido entre usuarios
+MAX_HILOS_DETALLES_DEFAULT = 4
+PETICIONES_DETALLE_POR_MINUTO_DEFAULT = 60
 
 # =============================================================================
 # 1. CONFIGURACIÓN Y CARGA DE API KEYS
@@ -46,6 +56,9 @@ def cargar_configuracion():
             'video_detail_rapidapi_key': config['video_detail_api']['rapidapi_key'],
             'video_detail_rapidapi_host': config['video_detail_api']['rapidapi_host'],
             'video_detail_endpoint': config['video_detail_api']['endpoint'],
+            'video_detail_max_workers': config['video_detail_api'].getint('max_workers', MAX_HILOS_DETALLES_DEFAULT),
+            'video_detail_requests_per_minute': config['video_detail_api'].getint(
+                'requests_per_minute', PETICIONES_DETALLE_POR_MINUTO_DEFAULT),
             # Configuración general
             'output_base_dir': config['general_config']['output_base_dir'],
             'max_retries': int(config['general_config']['max_retries']),
@@ -316,6 +329,8 @@ def guardar_resultados_usuario(datos_procesados, username, subdirs):
         with open(user_info_file, 'w', encoding='utf-8') as f:
             yaml.dump(datos_procesados, f, default_flow_style=False, allow_unicode=True, indent=2)
         
+        registrar_artefacto(username, 'user_info', user_info_file)
+        
         print(f"      [PAGE] Info guardada: {os.path.basename(user_info_file)}")
         print(f"   [OK] Archivo YAML guardado exitosamente (sobreescrito)")
         return user_info_file
@@ -926,6 +941,8 @@ def guardar_resultados_videos(datos_videos_procesados, username, subdirs):
         with open(videos_info_file, 'w', encoding='utf-8') as f:
             yaml.dump(datos_videos_procesados, f, default_flow_style=False, allow_unicode=True, indent=2)
         
+        registrar_artefacto(username, 'videos_info', videos_info_file)
+        
         print(f"      [PAGE] Videos guardados: {os.path.basename(videos_info_file)}")
         print(f"   [OK] Archivo YAML de videos guardado exitosamente (sobreescrito)")
         return videos_info_file
@@ -980,71 +997,67 @@ def obtener_detalle_video(video_id, config):
         print(f"  [ERROR] Error inesperado para video {video_id}: {e}")
         return None
 
-def obtener_detalles_videos_batch(video_ids, config, directorio_sesion):
+_limitador_detalles = None
+_limitador_detalles_lock = threading.Lock()
+
+def obtener_limitador_detalles(config):
+    """Rate limiter de la API de detalles, compartido por todos los usuarios en curso"""
+    global _limitador_detalles
+    with _limitador_detalles_lock:
+        if _limitador_detalles is None:
+            _limitador_detalles = RateLimiter(requests_per_minute=config.get(
+                'video_detail_requests_per_minute', PETICIONES_DETALLE_POR_MINUTO_DEFAULT))
+        return _limitador_detalles
+
+def obtener_detalles_videos_batch(video_ids, config, directorio_sesion, username):
     """
-    Obtiene detalles de múltiples videos y guarda los resultados
+    Obtiene detalles de múltiples videos de un usuario y los fusiona en su archivo
+    
+    Los videos que ya tienen un detalle correcto no se vuelven a pedir; el
+    resto se piden en paralelo bajo el límite de peticiones compartido.
+    
+    Args:
+        video_ids (list): IDs de los videos
+        config (dict): Configuración de la API
+        directorio_sesion (str): Directorio base de salida
+        username (str): Usuario al que pertenecen los videos
+        
+    Returns:
+        dict: Contenido del archivo de detalles del usuario o None si falla
     """
     try:
-        print(f"\n[MOVIE] === OBTENIENDO DETALLES DE {len(video_ids)} VIDEOS ===")
+        print(f"\n[MOVIE] === OBTENIENDO DETALLES DE {len(video_ids)} VIDEOS (@{username}) ===")
         
-        detalles_videos = []
+        archivo_detalles = ruta_detalles_usuario(directorio_sesion, username)
+        existentes = videos_con_detalle(archivo_detalles)
+        pendientes = [video_id for video_id in video_ids if str(video_id) not in existentes]
         
-        for idx, video_id in enumerate(video_ids, 1):
-            print(f"\n[VIDEO] Procesando video {idx}/{len(video_ids)}: {video_id}")
-            
-            detalle = obtener_detalle_video(video_id, config)
-            
-            if detalle:
-                video_detail_info = {
-                    'video_index': idx,
-                    'video_id': video_id,
-                    'extraction_timestamp': datetime.now().isoformat(),
-                    'api_response': detalle,
-                    'status': 'success'
-                }
-            else:
-                video_detail_info = {
-                    'video_index': idx,
-                    'video_id': video_id,
-                    'extraction_timestamp': datetime.now().isoformat(),
-                    'api_response': None,
-                    'status': 'failed'
-                }
-            
-            detalles_videos.append(video_detail_info)
-            
-            # Pausa entre requests para evitar rate limiting
-            time.sleep(1)
+        if len(pendientes) < len(video_ids):
+            print(f"   [CACHE] @{username}: {len(video_ids) - len(pendientes)} videos ya tienen detalles (reutilizados)")
         
-        # Crear directorio para detalles de videos (directamente en Output)
-        directorio_detalles = os.path.join(directorio_sesion, "video_details")
-        os.makedirs(directorio_detalles, exist_ok=True)
+        limitador = obtener_limitador_detalles(config)
         
-        # Guardar resultados (nombre fijo, formato YAML)
-        archivo_detalles = os.path.join(
-            directorio_detalles, 
-            f"video_details_batch.yml"
-        )
+        def obtener_con_limite(video_id):
+            limitador.acquire()
+            detalle = obtener_detalle_video(video_id, config)
+            return {
+                'video_id': video_id,
+                'extraction_timestamp': datetime.now().isoformat(),
+                'api_response': detalle,
+                'status': 'success' if detalle else 'failed'
+            }
         
-        resultado_final = {
-            'extraction_metadata': {
-                'extraction_date': datetime.now().isoformat(),
-                'extraction_method': 'TikTok Detail API (RapidAPI)',
-                'total_videos_requested': len(video_ids),
-                'successful_extractions': len([v for v in detalles_videos if v['status'] == 'success']),
-                'failed_extractions': len([v for v in detalles_videos if v['status'] == 'failed']),
-                'api_version': 'tiktok-api23'
-            },
-            'video_details': detalles_videos
-        }
+        max_hilos = max(1, config.get('video_detail_max_workers', MAX_HILOS_DETALLES_DEFAULT))
+        with ThreadPoolExecutor(max_workers=max_hilos) as ejecutor:
+            detalles_videos = list(ejecutor.map(obtener_con_limite, pendientes))
         
-        with open(archivo_detalles, 'w', encoding='utf-8') as f:
-            yaml.dump(resultado_final, f, default_flow_style=False, allow_unicode=True, indent=2)
+        resultado_final = fusionar_detalles_usuario(archivo_detalles, username, detalles_videos)
+        registrar_artefacto(username, 'video_details', archivo_detalles)
         
         exitosos = len([v for v in detalles_videos if v['status'] == 'success'])
         fallidos = len([v for v in detalles_videos if v['status'] == 'failed'])
         
-        print(f"\n[OK] === PROCESO DE DETALLES COMPLETADO ===")
+        print(f"\n[OK] === PROCESO DE DETALLES COMPLETADO (@{username}) ===")
         print(f"[CHART] Videos exitosos: {exitosos}")
         print(f"[ERROR] Videos fallidos: {fallidos}")
         print(f"[SAVE] Archivo guardado: {archivo_detalles}")
@@ -1080,71 +1093,56 @@ def procesar_videos_existentes_con_detalle(username=None, limite_videos=3):
         else:
             print(f"   [TARGET] Analizando usuario: @{username}")
         
-        # 3. Buscar archivo de videos existente
-        # Buscar en el directorio de salida (estructura directa)
+        # 3. Buscar datos previos del usuario (estructura directa en Output)
         base_dir = config['output_base_dir']
+        subdirs = {
+            'user_info': os.path.join(base_dir, "user_info"),
+            'videos_info': os.path.join(base_dir, "videos_info")
+        }
         
-        # Directorios directamente en Output
-        user_info_dir = os.path.join(base_dir, "user_info")
-        videos_info_dir = os.path.join(base_dir, "videos_info")
-        
-        if not os.path.exists(user_info_dir) or not os.path.exists(videos_info_dir):
-            print(f"   [ERROR] No se encontraron datos previos para @{username}")
-            return None
-        
-        # Buscar archivo de detalles de videos (estructura directa)
-        video_details_dir = os.path.join(base_dir, "video_details")
-        
-        if os.path.exists(video_details_dir):
-            print(f"   [SEARCH] Estructura optimizada detectada - usando detalles existentes")
-            detail_files = [f for f in os.listdir(video_details_dir) if f.endswith('.json')]
-            if detail_files:
-                detail_file = sorted(detail_files)[-1]
-                detail_file_path = os.path.join(video_details_dir, detail_file)
-                print(f"   [FOLDER] Archivo de detalles encontrado: {detail_file}")
-                
-                with open(detail_file_path, 'r', encoding='utf-8') as f:
-                    existing_details = json.load(f)
-                
-                existing_video_ids = [detail['video_id'] for detail in existing_details.get('video_details', [])]
-                if existing_video_ids:
-                    print(f"   [OK] {len(existing_video_ids)} videos ya tienen detalles")
-                    return existing_details
-        
-        # Si no hay detalles existentes, obtener nuevos IDs del usuario
-        print(f"   [SHARE] Obteniendo nuevos IDs de videos para análisis...")
-        
-        # Obtener IDs directamente de la API (sin guardar archivo básico)
-        # Necesitamos el user_id, no el username para esta API
-        user_id = "7140234356736525355"  # User ID de shalom_mainnnnn 
-        raw_video_data = obtener_videos_usuario_scraper_api(user_id, username, config, count=15)
-        
-        if not raw_video_data:
-            print(f"   [ERROR] No se pudieron obtener videos del usuario")
-            return None
-        
-        # Procesar solo para extraer IDs
-        datos_videos_temp = procesar_datos_videos_scraper_api(raw_video_data, username)
+        # 4. IDs de videos: del archivo de videos si existe, si no de la API con el user_id del usuario
+        videos_info_file = os.path.join(subdirs['videos_info'], f"{username}_videos.yml")
         
-        if not datos_videos_temp or 'videos_list' not in datos_videos_temp:
-            print(f"   [ERROR] No se pudieron procesar los datos de videos")
-            return None
+        if os.path.exists(videos_info_file):
+            print(f"   [FOLDER] Usando videos existentes: {os.path.basename(videos_info_file)}")
+            with open(videos_info_file, 'r', encoding='utf-8') as f:
+                videos_list = (yaml.safe_load(f) or {}).get('videos_list', [])
+        else:
+            print(f"   [SHARE] Obteniendo nuevos IDs de videos para análisis...")
+            user_id = leer_user_id_desde_archivo(username, subdirs)
+            
+            if not user_id:
+                print(f"   [ERROR] No se encontraron datos previos para @{username}")
+                return None
+            
+            raw_video_data = obtener_videos_usuario_scraper_api(user_id, username, config, count=15)
+            
+            if not raw_video_data:
+                print(f"   [ERROR] No se pudieron obtener videos del usuario")
+                return None
+            
+            # Procesar solo para extraer IDs
+            datos_videos_temp = procesar_datos_videos_scraper_api(raw_video_data, username)
+            
+            if not datos_videos_temp or 'videos_list' not in datos_videos_temp:
+                print(f"   [ERROR] No se pudieron procesar los datos de videos")
+                return None
+            
+            videos_list = datos_videos_temp['videos_list']
         
-        # Extraer IDs limitados
-        videos_list = datos_videos_temp['videos_list']
-        videos_a_procesar = videos_list[:limite_videos]
+        # 5. Extraer IDs limitados
+        videos_a_procesar = [video for video in videos_list if video.get('video_id')][:limite_videos]
         video_ids = [video['video_id'] for video in videos_a_procesar]
         
         print(f"   [VIDEO] Videos encontrados: {len(videos_list)}")
         print(f"   [TARGET] Videos a procesar: {len(video_ids)}")
         
-        for i, video_id in enumerate(video_ids, 1):
-            video_info = videos_a_procesar[i-1]
+        for i, video_info in enumerate(videos_a_procesar, 1):
             titulo = video_info.get('title', 'Sin título')
-            print(f"      {i}. {video_id} - {titulo[:50]}...")
+            print(f"      {i}. {video_info['video_id']} - {titulo[:50]}...")
         
         # 6. Obtener detalles usando la nueva API
-        resultado_detalles = obtener_detalles_videos_batch(video_ids, config, base_dir)
+        resultado_detalles = obtener_detalles_videos_batch(video_ids, config, base_dir, username)
         
         if resultado_detalles:
             print(f"\n[PARTY] PROCESO COMPLETADO EXITOSAMENTE")
@@ -1162,7 +1160,8 @@ def procesar_videos_existentes_con_detalle(username=None, limite_videos=3):
 # 6.5. FUNCIÓN PARA LEER USUARIOS DESDE EXCEL
 # =============================================================================
 
-def cargar_usuarios_desde_csv(archivo_csv="data/generated_input/stats_progressive.csv", limite=10, solo_publicas=True):
+def cargar_usuarios_desde_csv(archivo_csv="data/generated_input/stats_progressive.csv", limite=10, solo_publicas=True,
+                              min_seguidores=None, ordenar_por_seguidores=False):
     """
     Carga la lista de usuarios desde el archivo CSV generado por el scraper
     
@@ -1170,15 +1169,20 @@ def cargar_usuarios_desde_csv(archivo_csv="data/generated_input/stats_progressiv
         archivo_csv (str): Ruta al archivo CSV
         limite (int): Número máximo de usuarios a procesar (None para todos)
         solo_publicas (bool): Si True, solo procesa cuentas públicas (is_private = False)
+        min_seguidores (int): Si se indica, descarta cuentas con menos seguidores (o sin contador)
+        ordenar_por_seguidores (bool): Si True, procesa primero las cuentas con más alcance
         
     Returns:
-        list: Lista de diccionarios con username y URL
+        list: Lista de diccionarios con username, URL y contadores enteros
+        (None si no se pudo leer el número; el texto original va en *_raw)
     """
     try:
         print(f"[CHART] Cargando usuarios desde: {archivo_csv}")
         
-        # Leer archivo CSV
-        df = pd.read_csv(archivo_csv)
+        # Leer archivo CSV (contadores como texto: "1.2M", "45,3 mil", "No disponible"...)
+        # y normalizarlos a Int64 en una pasada, conservando el texto en <columna>_raw
+        df = pd.read_csv(archivo_csv, dtype={columna: str for columna in COLUMNAS_CONTEO})
+        df = normalizar_columnas_conteo(df)
         
         print(f"   [CLIPBOARD] Total usuarios en archivo: {len(df)}")
         
@@ -1195,6 +1199,13 @@ def cargar_usuarios_desde_csv(archivo_csv="data/generated_input/stats_progressiv
             print(f"   [USERS] Cuentas válidas (públicas + privadas): {len(df_filtrado)}")
             print(f"   [ERROR] Cuentas con error filtradas: {len(df[df['username'] == 'error'])}")
         
+        # Filtro y orden por alcance sobre las columnas numéricas
+        if min_seguidores is not None:
+            df_filtrado = df_filtrado[df_filtrado['followers_count'].fillna(-1) >= min_seguidores]
+            print(f"   [FILTER] Cuentas con al menos {min_seguidores} seguidores: {len(df_filtrado)}")
+        if ordenar_por_seguidores:
+            df_filtrado = df_filtrado.sort_values('followers_count', ascending=False, na_position='last')
+        
         # Aplicar límite si se especifica
         if limite is not None:
             df_limited = df_filtrado.head(limite)
@@ -1209,9 +1220,8 @@ def cargar_usuarios_desde_csv(archivo_csv="data/generated_input/stats_progressiv
             usuario = {
                 'username': str(row['username']).replace('@', ''),
                 'url': str(row['URL']),
-                'followers_count': str(row['followers_count']),
-                'following_count': str(row['following_count']),
-                'likes_count': str(row['likes_count']),
+                **{columna: None if pd.isna(row[columna]) else int(row[columna]) for columna in COLUMNAS_CONTEO},
+                **{f"{columna}_raw": str(row[f"{columna}_raw"]) for columna in COLUMNAS_CONTEO},
                 'bio': str(row['bio']),
                 'is_verified': bool(row['is_verified']),
                 'is_private': bool(row['is_private'])
@@ -1221,7 +1231,7 @@ def cargar_usuarios_desde_csv(archivo_csv="data/generated_input/stats_progressiv
             # Mostrar info de cuenta
             status_icon = "🔓" if not usuario['is_private'] else "🔒"
             verified_icon = "✅" if usuario['is_verified'] else ""
-            print(f"      {len(usuarios)}. {status_icon}{verified_icon} @{usuario['username']} - {usuario['followers_count']} followers")
+            print(f"      {len(usuarios)}. {status_icon}{verified_icon} @{usuario['username']} - {usuario['followers_count_raw']} followers")
         
         return usuarios
         
@@ -1234,13 +1244,16 @@ def cargar_usuarios_desde_csv(archivo_csv="data/generated_input/stats_progressiv
 # 7. FUNCIÓN PRINCIPAL
 # =============================================================================
 
-def analizar_usuario_tiktok(username=None):
+def analizar_usuario_tiktok(username=None, ejecutor_detalles=None):
     """
     Función principal que orquesta todo el proceso de análisis
     
     Args:
         username (str, optional): Nombre de usuario a analizar. 
                                 Si no se especifica, usa el de prueba.
+        ejecutor_detalles (ThreadPoolExecutor, optional): Si se indica, los detalles
+                                de videos se piden en segundo plano y el resultado
+                                incluye el future en 'details_future'
     """
     print("TIKTOK API ANALYZER V2.3 - INTEGRACIÓN CON SCRAPER")
     print("=" * 65)
@@ -1287,8 +1300,21 @@ def analizar_usuario_tiktok(username=None):
         
         archivo_videos = None
         archivo_videos_detalle = None
+        futuro_detalles = None
         video_ids = []
         
+        def pedir_detalles(ids):
+            """Pide los detalles en línea o en segundo plano; devuelve la ruta del archivo"""
+            nonlocal futuro_detalles
+            if ejecutor_detalles is not None:
+                futuro_detalles = ejecutor_detalles.submit(obtener_detalles_videos_batch, ids, config, session_dir, username)
+                print(f"[OK] Detalles de {len(ids)} videos encolados en segundo plano")
+                return ruta_detalles_usuario(session_dir, username)
+            if obtener_detalles_videos_batch(ids, config, session_dir, username):
+                print(f"[OK] Detalles específicos guardados exitosamente")
+                return ruta_detalles_usuario(session_dir, username)
+            return None
+        
         if user_id:
             print(f"\n[MOVIE] Obteniendo información de videos usando user_id: {user_id}")
             
@@ -1308,10 +1334,7 @@ def analizar_usuario_tiktok(username=None):
                     
                     if video_ids:
                         print(f"\n[SEARCH] Obteniendo detalles específicos de {len(video_ids)} videos...")
-                        resultado_detalles = obtener_detalles_videos_batch(video_ids, config, session_dir)
-                        if resultado_detalles:
-                            archivo_videos_detalle = "video_details_batch.json"
-                            print(f"[OK] Detalles específicos guardados exitosamente")
+                        archivo_videos_detalle = pedir_detalles(video_ids)
                     else:
                         print("   [WARNING]  No se encontraron video IDs válidos para análisis detallado")
                 else:
@@ -1332,9 +1355,7 @@ def analizar_usuario_tiktok(username=None):
                             if datos_videos.get('videos_list'):
                                 video_ids = [video['video_id'] for video in datos_videos['videos_list'][:3] if video.get('video_id')]
                                 if video_ids:
-                                    resultado_detalles = obtener_detalles_videos_batch(video_ids, config, session_dir)
-                                    if resultado_detalles:
-                                        archivo_videos_detalle = "video_details_batch.json"
+                                    archivo_videos_detalle = pedir_detalles(video_ids)
         else:
             print("   [WARNING]  No se pudo obtener user_id del archivo JSON, saltando videos")
         
@@ -1367,7 +1388,8 @@ def analizar_usuario_tiktok(username=None):
         resultado_completo = {
             "user_data": datos_procesados,
             "video_ids_analyzed": video_ids,
-            "files_created": archivos_creados
+            "files_created": archivos_creados,
+            "details_future": futuro_detalles
         }
         
         return resultado_completo
@@ -1394,9 +1416,12 @@ def analizar_usuarios_desde_csv():
             print("[ERROR] No se pudieron cargar usuarios públicos desde CSV")
             return False
         
-        # 3. Procesar cada usuario
+        # 3. Procesar cada usuario; los detalles de videos se piden en segundo plano
+        #    mientras avanza el siguiente usuario (archivo propio por usuario)
         usuarios_exitosos = 0
         usuarios_fallidos = 0
+        futuros_detalles = {}
+        ejecutor_detalles = ThreadPoolExecutor(max_workers=max(1, config['video_detail_max_workers']))
         
         for i, usuario_info in enumerate(usuarios, 1):
             username = usuario_info['username']
@@ -1406,9 +1431,11 @@ def analizar_usuarios_desde_csv():
             print(f"{'='*70}")
             
             try:
-                resultado = analizar_usuario_tiktok(username)
+                resultado = analizar_usuario_tiktok(username, ejecutor_detalles)
                 
                 if resultado:
+                    if resultado.get('details_future'):
+                        futuros_detalles[username] = resultado['details_future']
                     usuarios_exitosos += 1
                     print(f"[OK] Usuario @{username} procesado exitosamente")
                 else:
@@ -1425,13 +1452,21 @@ def analizar_usuarios_desde_csv():
                 print(f"[BOOM] Error crítico procesando @{username}: {e}")
                 continue
         
-        # 4. Resumen final
+        # 4. Esperar los detalles de videos pendientes
+        if futuros_detalles:
+            print(f"\n[WAIT] Esperando detalles de videos de {len(futuros_detalles)} usuarios...")
+        detalles_fallidos = [username for username, futuro in futuros_detalles.items() if not futuro.result()]
+        ejecutor_detalles.shutdown(wait=True)
+        
+        # 5. Resumen final
         print(f"\n{'='*70}")
         print(f"[CHART] RESUMEN DEL ANÁLISIS MASIVO (CUENTAS PÚBLICAS)")
         print(f"{'='*70}")
         print(f"[USERS] Usuarios públicos procesados: {len(usuarios)}")
         print(f"[OK] Exitosos: {usuarios_exitosos}")
         print(f"[ERROR] Fallidos: {usuarios_fallidos}")
+        if detalles_fallidos:
+            print(f"[WARNING]  Detalles de videos fallidos: {', '.join('@' + u for u in detalles_fallidos)}")
         print(f"[CHART] Tasa de éxito: {(usuarios_exitosos/len(usuarios)*100):.1f}%")
         
         return usuarios_exitosos > 0
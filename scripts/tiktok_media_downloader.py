@@ -15,6 +15,7 @@ import urllib.parse
 from tqdm import tqdm
 from PIL import Image
 import traceback
+from pipeline_catalog import asegurar_catalogo, registrar_artefacto, usuarios_con
 
 # =============================================================================
 # 1. CONFIGURACIÓN Y RUTAS
@@ -26,7 +27,16 @@ OUTPUT_BASE_DIR = "data/Output"
 VIDEOS_INFO_DIR = "data/Output/videos_info"
 
 def detectar_archivos_videos_disponibles():
-    """Detecta automáticamente archivos de videos YAML disponibles"""
+    """Detecta los archivos de videos YAML disponibles (catálogo del pipeline o, si está vacío, el directorio)"""
+    
+    asegurar_catalogo()
+    catalogados = usuarios_con('videos_info')
+    if catalogados:
+        return [
+            {'username': username, 'archivo': os.path.basename(ruta), 'path': ruta}
+            for username, ruta in catalogados.items()
+            if os.path.exists(ruta)
+        ]
     
     if not os.path.exists(VIDEOS_INFO_DIR):
         print(f"[ERROR] Directorio no encontrado: {VIDEOS_INFO_DIR}")
@@ -314,8 +324,8 @@ def procesar_videos_tiktok(videos_yaml_path, subdirs):
 # 5. GUARDADO DE RESULTADOS
 # =============================================================================
 
-def guardar_resultados_descarga(resultados, output_dir):
-    """Guarda los resultados de descarga en un archivo YAML"""
+def guardar_resultados_descarga(resultados, output_dir, username=None):
+    """Guarda los resultados de descarga en un archivo YAML (y lo registra en el catálogo)"""
     
     if not resultados:
         print("   [WARNING]  No hay resultados para guardar")
@@ -328,6 +338,9 @@ def guardar_resultados_descarga(resultados, output_dir):
         with open(resultados_file, 'w', encoding='utf-8') as f:
             yaml.dump(resultados, f, default_flow_style=False, allow_unicode=True, indent=2)
         
+        if username:
+            registrar_artefacto(username, 'media_results', resultados_file)
+        
         print(f"\n[SAVE] RESULTADOS GUARDADOS EN: {resultados_file}")
         
         # Generar resumen
@@ -404,7 +417,7 @@ def main():
             # Guardar resultados en la carpeta del usuario
             if resultados:
                 user_output_dir = os.path.join(OUTPUT_BASE_DIR, "media", username)
-                guardar_resultados_descarga(resultados, user_output_dir)
+                guardar_resultados_descarga(resultados, user_output_dir, username)
                 print(f"\n[PARTY] DESCARGA COMPLETADA PARA @{username}")
                 print(f"[FOLDER] Medios guardados en: {user_media_folder}")
                 total_usuarios_procesados += 1
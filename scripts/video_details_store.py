@@ -0,0 +1,109 @@
+# =============================================================================
+# CARNIVAL CRUISES - ALMACÉN DE DETALLES DE VIDEOS
+# Un archivo YAML por usuario indexado por video_id; cada escritura fusiona
+# con lo ya guardado para que varios usuarios puedan procesarse a la vez
+# =============================================================================
+
+import os
+import threading
+import yaml
+from datetime import datetime
+
+# =============================================================================
+# 1. RUTAS Y BLOQUEOS
+# =============================================================================
+
+SUFIJO_DETALLES = "_video_details.yml"
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+def ruta_detalles_usuario(directorio_base, username):
+    """Archivo de detalles de un usuario: video_details/{username}_video_details.yml"""
+    return os.path.join(directorio_base, "video_details", f"{username}{SUFIJO_DETALLES}")
+
+def _lock_para(ruta):
+    """Lock por archivo para serializar las fusiones dentro del proceso"""
+    with _locks_guard:
+        return _locks.setdefault(os.path.abspath(ruta), threading.Lock())
+
+# =============================================================================
+# 2. LECTURA
+# =============================================================================
+
+def cargar_detalles_usuario(ruta):
+    """
+    Detalles ya guardados de un usuario
+
+    Returns:
+        dict: video_id -> entrada de detalle (vacío si no hay archivo)
+    """
+    if not os.path.exists(ruta):
+        return {}
+
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            datos = yaml.safe_load(f) or {}
+    except Exception as e:
+        print(f"   [WARNING]  Archivo de detalles ilegible ({os.path.basename(ruta)}): {e}")
+        return {}
+
+    return {
+        str(detalle['video_id']): detalle
+        for detalle in datos.get('video_details', [])
+        if detalle.get('video_id')
+    }
+
+def videos_con_detalle(ruta):
+    """IDs de video que ya tienen un detalle correcto (no hace falta volver a pedirlos)"""
+    return {
+        video_id for video_id, detalle in cargar_detalles_usuario(ruta).items()
+        if detalle.get('status') == 'success'
+    }
+
+# =============================================================================
+# 3. ESCRITURA CON FUSIÓN
+# =============================================================================
+
+def fusionar_detalles_usuario(ruta, username, nuevos_detalles):
+    """
+    Fusiona nuevos detalles con los guardados y reescribe el archivo de forma atómica
+
+    Un detalle fallido nunca reemplaza a uno correcto del mismo video.
+
+    Returns:
+        dict: Contenido final del archivo (extraction_metadata + video_details)
+    """
+    with _lock_para(ruta):
+        detalles = cargar_detalles_usuario(ruta)
+
+        for detalle in nuevos_detalles:
+            video_id = str(detalle['video_id'])
+            previo = detalles.get(video_id)
+            if detalle.get('status') == 'success' or previo is None or previo.get('status') != 'success':
+                detalles[video_id] = detalle
+
+        lista = list(detalles.values())
+        for indice, detalle in enumerate(lista, 1):
+            detalle['video_index'] = indice
+
+        resultado_final = {
+            'extraction_metadata': {
+                'username': username,
+                'extraction_date': datetime.now().isoformat(),
+                'extraction_method': 'TikTok Detail API (RapidAPI)',
+                'total_videos': len(lista),
+                'successful_extractions': len([d for d in lista if d.get('status') == 'success']),
+                'failed_extractions': len([d for d in lista if d.get('status') == 'failed']),
+                'api_version': 'tiktok-api23'
+            },
+            'video_details': lista
+        }
+
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        ruta_temporal = f"{ruta}.tmp"
+        with open(ruta_temporal, 'w', encoding='utf-8') as f:
+            yaml.dump(resultado_final, f, default_flow_style=False, allow_unicode=True, indent=2)
+        os.replace(ruta_temporal, ruta)
+
+        return resultado_final
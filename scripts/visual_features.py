@@ -0,0 +1,167 @@
+# =============================================================================
+# CARNIVAL CRUISES - FEATURES VISUALES VECTORIZADAS
+# Brillo, color, cambios de escena y densidad de texto sobre un stack de
+# frames reducidos (N, H, W, 3) en una sola pasada NumPy
+# =============================================================================
+
+import cv2
+import numpy as np
+
+# =============================================================================
+# 1. CONFIGURACIÓN
+# =============================================================================
+
+NUM_FRAMES_MUESTRA = 8        # Frames muestreados uniformemente por video
+ANCHO_REDUCIDO = 160          # Ancho de trabajo (se conserva la proporción)
+BINS_HISTOGRAMA = 16          # Bins por canal para histogramas
+UMBRAL_CAMBIO_ESCENA = 0.35   # Distancia de histograma que cuenta como corte
+UMBRAL_BORDE_TEXTO = 40       # Gradiente horizontal mínimo (0-255) para borde
+BLOQUE_TEXTO = 8              # Tamaño de bloque para densidad de texto
+UMBRAL_BLOQUE_TEXTO = 0.15    # Fracción de bordes para marcar un bloque como texto
+
+# Pesos BGR para luminancia (ITU-R BT.601), mismo criterio que cv2.COLOR_BGR2GRAY
+PESOS_LUMINANCIA = np.array([0.114, 0.587, 0.299], dtype=np.float32)
+CANALES_BGR = ["blue", "green", "red"]
+
+# =============================================================================
+# 2. MUESTREO DE FRAMES
+# =============================================================================
+
+def muestrear_frames(video_path, num_frames=NUM_FRAMES_MUESTRA, ancho=ANCHO_REDUCIDO):
+    """
+    Lee frames uniformemente distribuidos y los reduce a un stack NumPy
+
+    Args:
+        video_path (str): Ruta del video
+        num_frames (int): Número de frames a muestrear
+        ancho (int): Ancho objetivo de cada frame reducido
+
+    Returns:
+        tuple: (stack uint8 de forma (N, H, W, 3) o None, timestamps, metadatos)
+    """
+    metadatos = {"total_frames": 0, "fps": 0.0, "width": 0, "height": 0}
+    cap = cv2.VideoCapture(video_path)
+
+    try:
+        if not cap.isOpened():
+            return None, [], metadatos
+
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        metadatos.update({"total_frames": total_frames, "fps": fps, "width": width, "height": height})
+
+        if total_frames <= 0 or width <= 0 or height <= 0:
+            return None, [], metadatos
+
+        alto = max(1, int(round(height * ancho / width)))
+        # Evitar los extremos (fundidos de entrada/salida)
+        posiciones = np.linspace(0.05, 0.95, num_frames) * (total_frames - 1)
+        posiciones = np.unique(posiciones.astype(int))
+
+        stack = np.empty((len(posiciones), alto, ancho, 3), dtype=np.uint8)
+        timestamps = []
+        leidos = 0
+
+        for pos in posiciones:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(pos))
+            ret, frame = cap.read()
+            if not ret:
+                continue
+            stack[leidos] = cv2.resize(frame, (ancho, alto), interpolation=cv2.INTER_AREA)
+            timestamps.append(float(pos / fps) if fps > 0 else float(leidos))
+            leidos += 1
+
+        if leidos == 0:
+            return None, [], metadatos
+
+        return stack[:leidos], timestamps, metadatos
+
+    finally:
+        cap.release()
+
+# =============================================================================
+# 3. EXTRACCIÓN VECTORIZADA
+# =============================================================================
+
+def _histogramas_por_frame(valores, bins):
+    """Histograma normalizado por frame para un array (N, ...) con valores 0-255"""
+    n = valores.shape[0]
+    indices = (valores.reshape(n, -1).astype(np.int32) * bins) >> 8
+    indices += (np.arange(n, dtype=np.int32) * bins)[:, None]
+    conteos = np.bincount(indices.ravel(), minlength=n * bins).reshape(n, bins)
+    return conteos / conteos.sum(axis=1, keepdims=True)
+
+def extraer_features_visuales(frames, bins=BINS_HISTOGRAMA):
+    """
+    Calcula todas las features visuales de un stack de frames en una pasada
+
+    Args:
+        frames (np.ndarray): Stack uint8 BGR de forma (N, H, W, 3)
+        bins (int): Número de bins por histograma
+
+    Returns:
+        dict: Features por frame y resumen agregado (serializable a YAML)
+    """
+    n, alto, ancho, _ = frames.shape
+
+    # Luminancia de todo el stack de una vez: (N, H, W)
+    gris = frames.astype(np.float32) @ PESOS_LUMINANCIA
+    brillo_por_frame = gris.mean(axis=(1, 2))
+
+    # Histogramas: brillo (N, bins) y color (N, 3, bins) con un único bincount cada uno
+    hist_brillo = _histogramas_por_frame(gris.astype(np.uint8), bins)
+    canales = np.moveaxis(frames, -1, 1).reshape(n * 3, alto, ancho)
+    hist_color = _histogramas_por_frame(canales, bins).reshape(n, 3, bins)
+
+    # Medias por canal (N, 3) y canal dominante global
+    medias_canal = frames.mean(axis=(1, 2))
+    canal_dominante = CANALES_BGR[int(np.argmax(medias_canal.mean(axis=0)))]
+
+    # Cambios de escena: distancia L1 entre histogramas de color consecutivos, en [0, 1]
+    if n > 1:
+        puntajes_escena = np.abs(np.diff(hist_color, axis=0)).sum(axis=(1, 2)) / 6.0
+    else:
+        puntajes_escena = np.zeros(0, dtype=np.float64)
+
+    # Densidad de texto: bloques con alta proporción de bordes horizontales
+    bordes = np.abs(np.diff(gris, axis=2)) > UMBRAL_BORDE_TEXTO
+    alto_b = (alto // BLOQUE_TEXTO) * BLOQUE_TEXTO
+    ancho_b = ((ancho - 1) // BLOQUE_TEXTO) * BLOQUE_TEXTO
+    if alto_b and ancho_b:
+        bloques = bordes[:, :alto_b, :ancho_b].reshape(
+            n, alto_b // BLOQUE_TEXTO, BLOQUE_TEXTO, ancho_b // BLOQUE_TEXTO, BLOQUE_TEXTO
+        ).mean(axis=(2, 4))
+        densidad_texto = (bloques > UMBRAL_BLOQUE_TEXTO).mean(axis=(1, 2))
+    else:
+        densidad_texto = np.zeros(n, dtype=np.float64)
+
+    brillo_medio = float(brillo_por_frame.mean())
+    if brillo_medio < 50:
+        clasificacion_brillo = "dark"
+    elif brillo_medio > 200:
+        clasificacion_brillo = "bright"
+    else:
+        clasificacion_brillo = "normal"
+
+    return {
+        "frames_analyzed": int(n),
+        "brightness_analysis": clasificacion_brillo,
+        "color_analysis": f"dominant_{canal_dominante}",
+        "brightness_mean": round(brillo_medio, 2),
+        "brightness_per_frame": [round(float(v), 2) for v in brillo_por_frame],
+        "brightness_histogram": [round(float(v), 4) for v in hist_brillo.mean(axis=0)],
+        "color_histogram": {
+            canal: [round(float(v), 4) for v in hist_color[:, i].mean(axis=0)]
+            for i, canal in enumerate(CANALES_BGR)
+        },
+        "channel_means": {
+            canal: round(float(medias_canal[:, i].mean()), 2)
+            for i, canal in enumerate(CANALES_BGR)
+        },
+        "scene_change_scores": [round(float(v), 4) for v in puntajes_escena],
+        "scene_changes": int((puntajes_escena > UMBRAL_CAMBIO_ESCENA).sum()),
+        "text_region_density_per_frame": [round(float(v), 4) for v in densidad_texto],
+        "text_region_density": round(float(densidad_texto.mean()), 4)
+    }
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GESTOR DE SESIONES - SCRAPERS PLAYWRIGHT
+Pool rotatorio de storage states (cookies + localStorage) guardados entre
+ejecuciones. Cada contexto arranca con una sesión caliente y con el mismo
+fingerprint con el que se creó; al arrancar se validan y las sesiones que
+reciben un challenge se retiran
+"""
+
+import os
+import json
+import glob
+import time
+import threading
+from datetime import datetime
+
+from challenge_detection import detectar_desafio
+
+# =============================================================================
+# 1. CONFIGURACIÓN
+# =============================================================================
+
+DIRECTORIO_SESIONES = "data/sessions"
+TAMANO_POOL_DEFAULT = 8
+EDAD_MAXIMA_DIAS = 7
+SESION_LEGACY = "data/session_cache.json"   # Cache única del scraper Zversion
+
+# Cookies que TikTok entrega a un visitante ya "conocido"
+COOKIES_SESION = ('ttwid', 'msToken', 'tt_chain_token', 'tt_csrf_token')
+URL_VALIDACION = "https://www.tiktok.com/@tiktok"   # Un perfil: el detector distingue perfil de muro de login
+VIGENCIA_VALIDACION_S = 3600   # No se revalida en navegador una sesión validada hace menos
+BLOQUEO_CADUCADO_S = 2 * 3600  # Un .lock más antiguo es de un proceso que murió sin liberarlo
+
+# =============================================================================
+# 2. GESTOR
+# =============================================================================
+
+class GestorSesiones:
+    """
+    Sesiones guardadas como archivos session_NN.json
+
+    Cada archivo contiene el storage state de Playwright (cookies, origins)
+    y una clave _meta con el fingerprint, usos y fechas. Es seguro entre
+    hilos y entre procesos (sharded_scraper comparte el directorio): una
+    sesión se reserva creando en exclusiva session_NN.json.lock, que se
+    borra al guardarla, liberarla o retirarla; los .lock abandonados por un
+    proceso caído caducan a las BLOQUEO_CADUCADO_S.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_SESIONES, tamano_pool=TAMANO_POOL_DEFAULT):
+        self.directorio = directorio
+        self.tamano_pool = max(1, int(tamano_pool))
+        self._lock = threading.Lock()
+        self._en_uso = set()
+        self.retiradas = 0
+        os.makedirs(directorio, exist_ok=True)
+
+    # -------------------------------------------------------------------------
+    # Archivos
+    # -------------------------------------------------------------------------
+
+    def _rutas(self):
+        return sorted(glob.glob(os.path.join(self.directorio, "session_*.json")))
+
+    def _leer(self, ruta):
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _escribir(self, ruta, datos):
+        # Temporal por proceso: dos procesos nunca comparten el archivo intermedio
+        ruta_temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(ruta_temporal, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False)
+        os.replace(ruta_temporal, ruta)
+
+    def _eliminar(self, ruta):
+        """Borra un archivo; False si otro proceso ya lo había borrado"""
+        try:
+            os.remove(ruta)
+            return True
+        except FileNotFoundError:
+            return False
+
+    # -------------------------------------------------------------------------
+    # Reservas entre procesos
+    # -------------------------------------------------------------------------
+
+    def _bloquear(self, ruta):
+        """Reserva una sesión (o un hueco del pool) para este proceso; False si ya es de otro"""
+        ruta_bloqueo = f"{ruta}.lock"
+        for _ in range(2):
+            try:
+                descriptor = os.open(ruta_bloqueo, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    caducado = time.time() - os.path.getmtime(ruta_bloqueo) > BLOQUEO_CADUCADO_S
+                except FileNotFoundError:
+                    continue   # Se liberó entre medias: se reintenta
+                if not caducado:
+                    return False
+                self._eliminar(ruta_bloqueo)
+                continue
+            with os.fdopen(descriptor, 'w') as f:
+                f.write(str(os.getpid()))
+            self._en_uso.add(ruta)
+            return True
+        return False
+
+    def _desbloquear(self, ruta):
+        self._en_uso.discard(ruta)
+        self._eliminar(f"{ruta}.lock")
+
+    def _reservar_hueco(self):
+        """Reserva la primera ruta session_NN.json libre (sin archivo ni reserva)"""
+        indice = 0
+        while True:
+            ruta = os.path.join(self.directorio, f"session_{indice:02d}.json")
+            if not os.path.exists(ruta) and self._bloquear(ruta):
+                if not os.path.exists(ruta):
+                    return ruta
+                self._desbloquear(ruta)   # Otro proceso lo ocupó entre medias
+            indice += 1
+
+    # -------------------------------------------------------------------------
+    # Rotación
+    # -------------------------------------------------------------------------
+
+    def siguiente(self):
+        """
+        Sesión para un contexto nuevo: la menos usada recientemente de las que
+        no están reservadas (por este u otro proceso)
+
+        Returns:
+            tuple: (ruta, storage_state, fingerprint) o (None, None, None) si
+            toca arrancar en frío (pool sin completar o todas ocupadas)
+        """
+        with self._lock:
+            candidatas = []
+            for ruta in self._rutas():
+                if ruta in self._en_uso:
+                    continue
+                datos = self._leer(ruta)
+                if datos:
+                    candidatas.append((datos.get('_meta', {}).get('ultimo_uso', 0), ruta))
+
+            for _, ruta in sorted(candidatas):
+                if not self._bloquear(ruta):
+                    continue
+                # Releída tras reservarla: otro proceso pudo retirarla o guardarla entre medias
+                datos = self._leer(ruta)
+                if not datos:
+                    self._desbloquear(ruta)
+                    continue
+                estado = {'cookies': datos.get('cookies', []), 'origins': datos.get('origins', [])}
+                return ruta, estado, datos.get('_meta', {}).get('fingerprint')
+
+            return None, None, None
+
+    async def guardar(self, context, ruta=None, fingerprint=None):
+        """
+        Guarda el storage state de un contexto (en su sesión o en un hueco nuevo del pool)
+
+        Returns:
+            str: Ruta guardada (None si el pool está lleno y el contexto arrancó en frío)
+        """
+        estado = await context.storage_state()
+
+        with self._lock:
+            if ruta is None:
+                if len(self._rutas()) >= self.tamano_pool:
+                    return None
+                ruta = self._reservar_hueco()
+
+            previo = (self._leer(ruta) or {}).get('_meta', {})
+            estado['_meta'] = {
+                'fingerprint': fingerprint or previo.get('fingerprint'),
+                'creada': previo.get('creada', time.time()),
+                'ultimo_uso': time.time(),
+                'usos': previo.get('usos', 0) + 1,
+                'validada': time.time(),   # Se usó sin challenge: cuenta como validación
+                'actualizada': datetime.now().isoformat()
+            }
+            try:
+                self._escribir(ruta, estado)
+            finally:
+                self._desbloquear(ruta)
+            return ruta
+
+    def liberar(self, ruta):
+        """Devuelve una sesión al pool sin guardar cambios"""
+        if not ruta:
+            return
+        with self._lock:
+            self._desbloquear(ruta)
+
+    def retirar(self, ruta, motivo="challenge"):
+        """Elimina una sesión quemada para que no se vuelva a usar"""
+        if not ruta:
+            return
+        with self._lock:
+            if self._eliminar(ruta):
+                self.retiradas += 1
+                print(f"[WARNING]  Sesión retirada ({motivo}): {os.path.basename(ruta)}")
+            self._desbloquear(ruta)
+
+    # -------------------------------------------------------------------------
+    # Validación al arrancar
+    # -------------------------------------------------------------------------
+
+    def importar_legacy(self, ruta_legacy=SESION_LEGACY):
+        """Incorpora la antigua data/session_cache.json como una sesión más del pool"""
+        if not os.path.exists(ruta_legacy) or len(self._rutas()) >= self.tamano_pool:
+            return False
+
+        # El renombrado la reclama: si varios procesos arrancan a la vez, solo uno la importa
+        ruta_importada = f"{ruta_legacy}.imported"
+        try:
+            os.replace(ruta_legacy, ruta_importada)
+        except FileNotFoundError:
+            return False
+
+        datos = self._leer(ruta_importada)
+        if not datos:
+            return False
+        datos['_meta'] = {'creada': os.path.getmtime(ruta_importada), 'ultimo_uso': 0, 'usos': 0}
+        with self._lock:
+            ruta = self._reservar_hueco()
+            try:
+                self._escribir(ruta, datos)
+            finally:
+                self._desbloquear(ruta)
+        print(f"[OK] Sesión heredada importada desde {ruta_legacy}")
+        return True
+
+    def validar(self, edad_maxima_dias=EDAD_MAXIMA_DIAS):
+        """
+        Validación sin red: retira sesiones ilegibles, caducadas o sin cookies de TikTok vigentes
+        (las reservadas por otro proceso están en uso y cuentan como válidas)
+
+        Returns:
+            int: Sesiones válidas que quedan
+        """
+        ahora = time.time()
+        validas = 0
+
+        for ruta in self._rutas():
+            with self._lock:
+                if not self._bloquear(ruta):
+                    validas += 1
+                    continue
+
+            datos = self._leer(ruta)
+            if not datos:
+                self.retirar(ruta, "archivo ilegible")
+                continue
+
+            meta = datos.get('_meta', {})
+            if ahora - meta.get('creada', ahora) > edad_maxima_dias * 86400:
+                self.retirar(ruta, f"más de {edad_maxima_dias} días")
+                continue
+
+            vigentes = [
+                c for c in datos.get('cookies', [])
+                if c.get('name') in COOKIES_SESION and (c.get('expires', -1) in (-1, None) or c['expires'] > ahora)
+            ]
+            if not vigentes:
+                self.retirar(ruta, "sin cookies de sesión vigentes")
+                continue
+
+            self.liberar(ruta)
+            validas += 1
+
+        return validas
+
+    async def validar_en_navegador(self, browser, url=URL_VALIDACION, timeout_ms=15000):
+        """
+        Abre cada sesión en un contexto temporal y retira las que reciben un challenge
+
+        Las validadas hace menos de VIGENCIA_VALIDACION_S se dan por buenas
+        (varios procesos de sharded_scraper comparten el directorio), igual
+        que las reservadas en ese momento por otro proceso.
+
+        Returns:
+            int: Sesiones que pasaron la validación
+        """
+        validas = 0
+        for ruta in self._rutas():
+            with self._lock:
+                if not self._bloquear(ruta):
+                    validas += 1
+                    continue
+
+            datos = self._leer(ruta)
+            if not datos:
+                self.liberar(ruta)
+                continue
+            if time.time() - datos.get('_meta', {}).get('validada', 0) < VIGENCIA_VALIDACION_S:
+                self.liberar(ruta)
+                validas += 1
+                continue
+
+            retirada = False
+            try:
+                fingerprint = datos.get('_meta', {}).get('fingerprint') or {}
+                context = await browser.new_context(
+                    storage_state={'cookies': datos.get('cookies', []), 'origins': datos.get('origins', [])},
+                    **fingerprint
+                )
+                try:
+                    page = await context.new_page()
+                    await page.goto(url, wait_until="domcontentloaded", timeout=timeout_ms)
+                    desafio = await detectar_desafio(page)
+                    if desafio:
+                        self.retirar(ruta, f"{desafio['tipo']} en la validación")
+                        retirada = True
+                    else:
+                        datos.setdefault('_meta', {})['validada'] = time.time()
+                        with self._lock:
+                            self._escribir(ruta, datos)
+                        validas += 1
+                finally:
+                    await context.close()
+            except Exception as e:
+                print(f"[WARNING]  No se pudo validar {os.path.basename(ruta)}: {e}")
+            finally:
+                if not retirada:
+                    self.liberar(ruta)
+
+        return validas
+
+    def resumen(self):
+        return {
+            'sesiones': len(self._rutas()),
+            'tamano_pool': self.tamano_pool,
+            'en_uso': len(self._en_uso),
+            'retiradas': self.retiradas
+        }
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SCRAPING EN PARALELO POR PROCESOS - LANZADOR DE SHARDS
+Reparte usernames.xlsx entre N procesos; cada uno ejecuta main_simple con
+su propio navegador y pool de contextos sobre su shard (con checkpoint
+propio), y al terminar los resultados se fusionan en stats_progressive.csv
+"""
+
+import os
+import csv
+import glob
+import asyncio
+import argparse
+import multiprocessing
+from datetime import datetime
+
+from scrape_checkpoint import CheckpointScraping, ruta_checkpoint
+from browser_pool import NUM_CONTEXTOS_DEFAULT, PAGINAS_POR_CONTEXTO_DEFAULT
+from simple_tiktok_scraper_optimized import main_simple, cargar_usuarios_desde_excel
+
+# =============================================================================
+# 1. CONFIGURACIÓN
+# =============================================================================
+
+ARCHIVO_EXCEL = "data/Input/usernames.xlsx"
+ARCHIVO_CSV_PROGRESIVO = "data/generated_input/stats_progressive.csv"
+DIRECTORIO_SHARDS = "data/generated_input/shards"
+
+def procesos_por_defecto():
+    """Un proceso por cada dos núcleos (cada Chromium usa varios), entre 1 y 4"""
+    return max(1, min(4, (os.cpu_count() or 2) // 2))
+
+def ruta_shard(indice, directorio=DIRECTORIO_SHARDS):
+    return os.path.join(directorio, f"stats_shard_{indice:02d}.csv")
+
+# =============================================================================
+# 2. REPARTO
+# =============================================================================
+
+def repartir_usuarios(usuarios, num_shards):
+    """
+    Reparto intercalado (usuario i -> shard i % N) para que cada shard
+    tenga una mezcla parecida de perfiles
+
+    Returns:
+        list: Una lista de usuarios por shard (sin shards vacíos)
+    """
+    shards = [usuarios[i::num_shards] for i in range(num_shards)]
+    return [shard for shard in shards if shard]
+
+def _ejecutar_shard(indice, usuarios, archivo_csv, num_contextos, paginas_por_contexto):
+    """Punto de entrada de cada proceso: main_simple sobre su shard"""
+    print(f"[ROCKET] Shard {indice}: {len(usuarios)} usuarios (pid {os.getpid()})")
+    asyncio.run(main_simple(
+        reanudar=True,
+        usuarios=usuarios,
+        archivo_csv_incremental=archivo_csv,
+        archivo_csv_final=None,
+        num_contextos=num_contextos,
+        paginas_por_contexto=paginas_por_contexto
+    ))
+
+# =============================================================================
+# 3. FUSIÓN
+# =============================================================================
+
+def _leer_filas(archivo_csv):
+    if not os.path.exists(archivo_csv):
+        return [], None
+    with open(archivo_csv, 'r', newline='', encoding='utf-8') as f:
+        lector = csv.DictReader(f)
+        # Una fila truncada por un corte deja columnas a None
+        return [fila for fila in lector if None not in fila.values()], lector.fieldnames
+
+def fusionar_shards(archivo_destino=ARCHIVO_CSV_PROGRESIVO, directorio=DIRECTORIO_SHARDS, limpiar=True):
+    """
+    Fusiona los CSV de los shards en el CSV progresivo y en su checkpoint
+
+    Por URL se queda la última fila (los shards pisan a lo ya fusionado) y
+    su estado pasa al checkpoint principal, de modo que main_simple y el
+    siguiente lanzamiento la den por hecha. La escritura es atómica.
+
+    Returns:
+        int: Filas aportadas por los shards
+    """
+    archivos = sorted(glob.glob(os.path.join(directorio, "stats_shard_*.csv")))
+    if not archivos:
+        return 0
+
+    filas, columnas = _leer_filas(archivo_destino)
+    por_url = {fila['URL']: fila for fila in filas}
+    checkpoint = CheckpointScraping(ruta_checkpoint(archivo_destino))
+    aportadas = 0
+
+    for archivo in archivos:
+        filas_shard, columnas_shard = _leer_filas(archivo)
+        columnas = columnas or columnas_shard
+        estados = CheckpointScraping(ruta_checkpoint(archivo)).estados
+
+        for fila in filas_shard:
+            por_url[fila['URL']] = fila
+            aportadas += 1
+        for url, registro in estados.items():
+            checkpoint.registrar(url, registro['username'], registro['status'])
+
+    if columnas:
+        os.makedirs(os.path.dirname(archivo_destino), exist_ok=True)
+        ruta_temporal = f"{archivo_destino}.tmp"
+        with open(ruta_temporal, 'w', newline='', encoding='utf-8') as f:
+            escritor = csv.DictWriter(f, fieldnames=columnas)
+            escritor.writeheader()
+            escritor.writerows(por_url.values())
+        os.replace(ruta_temporal, archivo_destino)
+
+    if limpiar:
+        for archivo in archivos:
+            for ruta in (archivo, ruta_checkpoint(archivo)):
+                if os.path.exists(ruta):
+                    os.remove(ruta)
+
+    return aportadas
+
+# =============================================================================
+# 4. LANZADOR
+# =============================================================================
+
+def lanzar_shards(usuarios, num_procesos, num_contextos=NUM_CONTEXTOS_DEFAULT,
+                  paginas_por_contexto=PAGINAS_POR_CONTEXTO_DEFAULT, archivo_destino=ARCHIVO_CSV_PROGRESIVO):
+    """
+    Ejecuta los shards en procesos separados y fusiona sus resultados
+
+    Returns:
+        dict: Resumen de la ejecución
+    """
+    # Recuperar lo que dejara un lanzamiento anterior interrumpido
+    recuperadas = fusionar_shards(archivo_destino)
+    if recuperadas:
+        print(f"[REFRESH] {recuperadas} filas recuperadas de shards anteriores")
+
+    checkpoint = CheckpointScraping(ruta_checkpoint(archivo_destino))
+    pendientes = checkpoint.pendientes(usuarios)
+    print(f"[INFO] {len(usuarios) - len(pendientes)} perfiles ya completados, {len(pendientes)} pendientes")
+    if not pendientes:
+        return {'procesos': 0, 'pendientes': 0, 'fusionadas': 0}
+
+    shards = repartir_usuarios(pendientes, num_procesos)
+    os.makedirs(DIRECTORIO_SHARDS, exist_ok=True)
+
+    # spawn: cada proceso arranca limpio (sin heredar el bucle asyncio ni Playwright)
+    ctx = multiprocessing.get_context('spawn')
+    procesos = []
+    for indice, shard in enumerate(shards):
+        proceso = ctx.Process(
+            target=_ejecutar_shard,
+            args=(indice, shard, ruta_shard(indice), num_contextos, paginas_por_contexto),
+            name=f"shard-{indice}"
+        )
+        proceso.start()
+        procesos.append(proceso)
+
+    print(f"[ROCKET] {len(procesos)} procesos lanzados "
+          f"({num_contextos} contextos × {paginas_por_contexto} páginas cada uno)")
+
+    for proceso in procesos:
+        proceso.join()
+        if proceso.exitcode != 0:
+            print(f"[WARNING]  {proceso.name} terminó con código {proceso.exitcode}")
+
+    fusionadas = fusionar_shards(archivo_destino)
+    print(f"[OK] {fusionadas} filas fusionadas en {archivo_destino}")
+    return {'procesos': len(procesos), 'pendientes': len(pendientes), 'fusionadas': fusionadas}
+
+def main():
+    parser = argparse.ArgumentParser(description="Scraping de perfiles de TikTok repartido en varios procesos")
+    parser.add_argument("--procesos", type=int, default=procesos_por_defecto(),
+                        help="Procesos (navegadores) en paralelo")
+    parser.add_argument("--contextos", type=int, default=NUM_CONTEXTOS_DEFAULT,
+                        help="Contextos del pool por proceso")
+    parser.add_argument("--paginas", type=int, default=PAGINAS_POR_CONTEXTO_DEFAULT,
+                        help="Páginas por contexto")
+    parser.add_argument("--excel", default=ARCHIVO_EXCEL, help="Excel con la columna username")
+    parser.add_argument("--limite", type=int, default=None, help="Procesar solo los N primeros usuarios")
+    args = parser.parse_args()
+
+    print("SCRAPING DE PERFILES EN PARALELO POR PROCESOS")
+    print("=" * 75)
+    inicio = datetime.now()
+
+    usuarios = cargar_usuarios_desde_excel(args.excel, limite=args.limite)
+    if not usuarios:
+        print("[ERROR] No se pudieron cargar usuarios. Terminando.")
+        return
+
+    resumen = lanzar_shards(usuarios, max(1, args.procesos), args.contextos, args.paginas)
+    print(f"[CHART] Resumen: {resumen} en {(datetime.now() - inicio).total_seconds():.0f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the offline batch-job path: write -> submit -> poll -> ingest,
+using the in-memory LocalBatchProvider instead of the OpenAI Batch API.
+"""
+
+import os
+import sys
+import json
+import uuid
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+import batch_jobs
+import profile_categorizer
+from batch_jobs import (
+    BatchProvider, write_batch_input, read_batch_output, wait_for_batch, find_pending_job
+)
+from llm_cache import LLMResponseCache
+
+
+class LocalBatchProvider(BatchProvider):
+    """
+    Local stand-in that answers every request with a responder function
+
+    Jobs live in memory. The job reports 'in_progress' for the first
+    polls_until_complete polls so the polling path is exercised, then
+    writes output in the OpenAI format.
+    """
+
+    name = "local"
+    cacheable = False
+
+    def __init__(self, responder, polls_until_complete=1):
+        self.responder = responder
+        self.polls_until_complete = polls_until_complete
+        self._jobs = {}
+
+    def submit(self, input_path):
+        job_id = f"local_batch_{uuid.uuid4().hex[:12]}"
+        self._jobs[job_id] = {"input_path": input_path, "polls": 0}
+        return job_id
+
+    def get_status(self, job_id):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return {"status": "failed", "error": "unknown job id"}
+
+        job["polls"] += 1
+        if job["polls"] <= self.polls_until_complete:
+            return {"status": "in_progress"}
+        return {"status": "completed"}
+
+    def download_results(self, job_id, output_path):
+        job = self._jobs[job_id]
+
+        with open(job["input_path"], 'r', encoding='utf-8') as source, \
+             open(output_path, 'w', encoding='utf-8') as target:
+            for line in source:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                entry = {"id": f"local_req_{uuid.uuid4().hex[:12]}", "custom_id": request["custom_id"]}
+                try:
+                    content = self.responder(request["body"])
+                    entry["response"] = {
+                        "status_code": 200,
+                        "body": {"choices": [{"message": {"role": "assistant", "content": content}}]}
+                    }
+                    entry["error"] = None
+                except Exception as e:
+                    entry["response"] = None
+                    entry["error"] = {"message": str(e)}
+                target.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        return output_path
+
+
+CATEGORIZATION = {
+    "profile_category": "travel_creator",
+    "category_reasoning": "Cruise vlogs",
+    "account_nature": "individual",
+    "content_focus": "travel",
+    "engagement_level": "high",
+    "authenticity_assessment": "authentic"
+}
+
+
+def echo_responder(body):
+    """Answer with the categorization, tagged with the prompt it received"""
+    return json.dumps(dict(CATEGORIZATION, category_reasoning=body["messages"][-1]["content"]))
+
+
+def failing_responder(body):
+    if "fail" in body["messages"][-1]["content"]:
+        raise RuntimeError("model error")
+    return json.dumps(CATEGORIZATION)
+
+
+def test_round_trip_write_submit_poll_ingest(tmp_path):
+    input_path = str(tmp_path / "batch" / "requests.jsonl")
+    write_batch_input(
+        [
+            ("0-alice", {"messages": [{"role": "user", "content": "alice"}]}),
+            ("1-bob", {"messages": [{"role": "user", "content": "fail bob"}]})
+        ],
+        input_path
+    )
+
+    provider = LocalBatchProvider(failing_responder, polls_until_complete=2)
+    job_id = provider.submit(input_path)
+
+    status = wait_for_batch(provider, job_id, poll_interval=0)
+    assert status["status"] == "completed"
+    assert provider._jobs[job_id]["polls"] == 3
+
+    output_path = provider.download_results(job_id, str(tmp_path / "batch" / "output.jsonl"))
+    results = read_batch_output(output_path)
+
+    assert json.loads(results["0-alice"]) == CATEGORIZATION
+    assert results["1-bob"] is None
+
+
+def test_wait_for_batch_times_out_without_terminal_status(tmp_path):
+    input_path = write_batch_input([], str(tmp_path / "requests.jsonl"))
+    provider = LocalBatchProvider(echo_responder, polls_until_complete=10)
+
+    status = wait_for_batch(provider, provider.submit(input_path), poll_interval=0, timeout=0)
+    assert status == {"status": "timeout"}
+
+
+def test_categorize_users_offline_ingests_into_rows(tmp_path, monkeypatch):
+    cache = LLMResponseCache(db_path=str(tmp_path / "llm_cache.db"))
+    monkeypatch.setattr(profile_categorizer, "get_default_cache", lambda: cache)
+
+    def fake_user_data(username):
+        available = username != "ghost"
+        return {
+            "username": username,
+            "profile_info": {"nickname": username, "signature": "bio"},
+            "profile_stats": {"follower_count": 10, "following_count": 5, "heart_count": 100},
+            "videos_data": [],
+            "is_private": False,
+            "is_verified": False,
+            "data_available": {"user_info": available, "videos_info": False}
+        }
+
+    monkeypatch.setattr(profile_categorizer, "load_user_data", fake_user_data)
+
+    users = [
+        {"username": "alice", "url": "https://www.tiktok.com/@alice"},
+        {"username": "ghost", "url": "https://www.tiktok.com/@ghost"}
+    ]
+    api_config = {"api_key": "unused", "model": "gpt-4", "batch_poll_interval": 0}
+    batch_dir = str(tmp_path / "batch_jobs")
+
+    results = profile_categorizer.categorize_users_offline(
+        api_config, users, profile_categorizer.create_categorization_prompt_template(),
+        provider=LocalBatchProvider(echo_responder), batch_dir=batch_dir
+    )
+
+    assert results[0]["username"] == "alice"
+    assert results[0]["category"] == "travel_creator"
+    assert results[1]["category"] == "no_data_available"
+
+    # The manifest is marked as ingested so a later run does not resume it
+    assert find_pending_job("local", batch_dir) is None
+
+    # Answers from a non-cacheable provider are never written to the shared response cache
+    prompt = profile_categorizer.create_final_prompt(
+        profile_categorizer.create_categorization_prompt_template(),
+        profile_categorizer.prepare_user_data_for_prompt(fake_user_data("alice"))
+    )
+    assert cache.get(profile_categorizer.categorization_cache_key(api_config, prompt)) is None
+
+
+def test_create_batch_provider_rejects_unknown_providers():
+    assert isinstance(profile_categorizer.create_batch_provider({"api_key": "k"}), batch_jobs.OpenAIBatchProvider)
+
+    # Only real providers can be selected from the config
+    with pytest.raises(ValueError):
+        profile_categorizer.create_batch_provider({"api_key": "k", "batch_provider": "local"})